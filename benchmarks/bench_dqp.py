@@ -0,0 +1,109 @@
+"""
+Benchmark for the per-batch overhead of censo.parallel.dqp.
+The processor is replaced by a dummy that returns the job immediately, so the measured time consists only of the
+scheduling overhead (executor startup, core accounting, pickling of the jobs).
+
+For comparison, the cost of the former core accounting via a multiprocessing.Manager (server startup and one
+round-trip per reserve/release) is measured as well.
+
+Usage:
+    python benchmarks/bench_dqp.py [--jobs 500] [--batches 5] [--cores 16]
+"""
+import argparse
+import multiprocessing
+from statistics import median
+from time import perf_counter
+
+from censo import parallel
+from censo.datastructure import MoleculeData, ParallelJob
+from censo.params import OMPMIN
+
+
+class DummyProc:
+    """
+    Processor stand-in without any calculations.
+    """
+
+    def run(self, job: ParallelJob) -> ParallelJob:
+        job.meta["total_time"] = 0.0
+        return job
+
+
+def make_jobs(njobs: int) -> list[ParallelJob]:
+    conf = MoleculeData("CONF", ["H 0.0 0.0 0.0\n", "H 0.0 0.0 0.7\n"])
+    jobs = [ParallelJob(conf.geom, ["xtb_sp"]) for _ in range(njobs)]
+    for job in jobs:
+        job.omp = OMPMIN
+    return jobs
+
+
+def bench_dqp(njobs: int, nbatches: int) -> list[float]:
+    times = []
+    for _ in range(nbatches):
+        jobs = make_jobs(njobs)
+        start = perf_counter()
+        parallel.dqp(jobs, DummyProc())
+        times.append(perf_counter() - start)
+    return times
+
+
+def bench_manager(njobs: int, nbatches: int, cores: int) -> list[float]:
+    times = []
+    for _ in range(nbatches):
+        start = perf_counter()
+        with multiprocessing.Manager() as manager:
+            free_cores = manager.Value(int, cores)
+            enough_cores = manager.Condition()
+            for _ in range(njobs):
+                with enough_cores:
+                    enough_cores.wait_for(
+                        lambda: free_cores.value >= OMPMIN)
+                    free_cores.value -= OMPMIN
+                with enough_cores:
+                    free_cores.value += OMPMIN
+                    enough_cores.notify()
+        times.append(perf_counter() - start)
+    return times
+
+
+def bench_corepool(njobs: int, nbatches: int, cores: int) -> list[float]:
+    times = []
+    for _ in range(nbatches):
+        start = perf_counter()
+        free_cores = parallel.CorePool(cores)
+        for _ in range(njobs):
+            free_cores.reserve(OMPMIN)
+            free_cores.release(OMPMIN)
+        times.append(perf_counter() - start)
+    return times
+
+
+def report(name: str, times: list[float], njobs: int) -> None:
+    t = median(times)
+    print(
+        f"{name:<30}{t * 1000:>10.1f} ms/batch{t / njobs * 1e6:>12.1f} us/job"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--batches", type=int, default=5)
+    parser.add_argument("--cores", type=int, default=16)
+    args = parser.parse_args()
+
+    parallel.ncores = args.cores
+
+    print(
+        f"{args.batches} batches of {args.jobs} jobs on {args.cores} cores (median)"
+    )
+    report("dqp (dummy processor)", bench_dqp(args.jobs, args.batches),
+           args.jobs)
+    report("core accounting: Manager",
+           bench_manager(args.jobs, args.batches, args.cores), args.jobs)
+    report("core accounting: CorePool",
+           bench_corepool(args.jobs, args.batches, args.cores), args.jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+End-to-end benchmark of the CENSO pipeline (Prescreening, Screening, Optimization, Refinement, NMR, UVVis via
+censo.cli.interface.entry_point) with recorded outputs of ORCA and xtb.
+
+The programs are called through the record/replay wrapper in benchmarks/fake_programs (orca_replay, xtb_replay).
+The first run records every call (running the fake programs, or the real ones via --orca and --xtb), the following
+runs serve the recordings instantly, so that their runtime is CENSO's own. Every run is done in a fresh directory and
+a fresh interpreter.
+
+Reported per part:
+    record:      wall time of the part in the recording run (includes the programs, unless already recorded),
+    replay:      wall time of the part with replayed programs,
+    calls:       summed duration of the replayed calls in the replay run (startup of the wrapper, copying of the
+                 recorded files), taken from the trace (--trace),
+    programs:    summed runtime of the recorded program calls,
+    CENSO's own time in the replay run, from cProfile (--profile cprofile) of the main process and of all jobs:
+        input:     input generation (prepinfo, ORCA inputs, coordinate files),
+        parsing:   reading the outputs of the programs and geometries,
+        filtering: energy evaluation, thresholds and Boltzmann weights,
+        writing:   result tables, json/npz files, ensemble files and printouts,
+        other:     everything else (scheduling, journal, telemetry, job setup), waiting for jobs and the replayed
+                   calls are not included.
+Nested calls of functions of the same category are counted once. The profiled run is slower than the unprofiled
+replay, so the categories are meant to be compared with each other (and across releases), not with the wall times.
+
+The seed ensemble is taken from the tests (tests/testfiles/crest_conformers.xyz).
+
+Usage:
+    python benchmarks/bench_pipeline.py [--recordings DIR] [--ensemble tests/testfiles/crest_conformers.xyz]
+        [--maxcores 4] [--orca PATH] [--xtb PATH] [--orcaversion 5.0.4] [--repeat 1] [--json results.json]
+        [--keep DIR]
+"""
+import argparse
+import configparser
+import json
+import os
+import pstats
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+FAKE_PROGRAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "fake_programs")
+SEED_ENSEMBLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                             "tests", "testfiles", "crest_conformers.xyz")
+
+ENTRY_POINT = "import sys; from censo.cli.interface import entry_point; sys.exit(entry_point(sys.argv[1:]))"
+
+# functions per category, as (file name, function names), None matches any file or any function
+CATEGORIES = {
+    "input": [
+        (None, {"setup_prepinfo"}),
+        ("orca_processor.py", {"__prep", "write_input", "__tolines"}),
+        ("datastructure.py", {"toorca", "tocoord", "toxyz"}),
+    ],
+    "parsing": [
+        ("orca_output.py", None),
+        ("xtb_parser.py", None),
+        ("datastructure.py", {"fromxyz", "fromcoord"}),
+        ("ensembledata.py", {"read_input", "read_xyz_blocks", "read_binary_ensemble"}),
+    ],
+    "filtering": [
+        (None, {"gsolv", "grrho", "gtot"}),
+        ("ensembledata.py", {"update_conformers", "remove_conformers", "calc_boltzmannweights"}),
+    ],
+    "writing": [
+        (None, {"write_results", "write_results2", "write_json", "print_update", "print_comparison",
+                "print_opt_update", "__generate_anmr"}),
+        ("results.py", None),
+        ("ensembledata.py", {"dump_ensemble", "write_binary_ensemble"}),
+    ],
+}
+
+# time not spent in CENSO: waiting for the jobs (main process) and the program calls (jobs)
+WAITING = [("~", {"<method 'acquire' of '_thread.lock' objects>"})]
+PROGRAMS = [("qm_processor.py", {"_make_call"})]
+
+# merging the profiles of the jobs is part of the profiling itself
+PROFILING = [("profiling.py", None)]
+
+RUNTIME_LINE = re.compile(r"^Ran (\w+) in ([\d.]+) seconds!$", re.MULTILINE)
+
+
+def matches(func: tuple[str, int, str], patterns: list) -> bool:
+    filename, _, name = func
+    return any((file is None or filename.endswith(file)) and (names is None or name in names)
+               for file, names in patterns)
+
+
+def cumulative(stats: pstats.Stats, patterns: list) -> float:
+    """
+    Cumulative time of all matching functions, without the calls from other matching functions (nested calls are
+    counted once).
+    """
+    total = 0.0
+    for func, (_, _, _, ct, callers) in stats.stats.items():
+        if matches(func, patterns):
+            total += ct - sum(edge[3] for caller, edge in callers.items()
+                              if matches(caller, patterns))
+    return total
+
+
+def breakdown(partdir: str) -> dict[str, float]:
+    """
+    CENSO's own time per category for a part, from the profiles of the main process and of the jobs.
+    """
+    times = {category: 0.0 for category in CATEGORIES}
+    own = 0.0
+    for name, excluded in [("profile_part.pstats", WAITING + PROFILING),
+                           ("profile_jobs.pstats", PROGRAMS)]:
+        path = os.path.join(partdir, name)
+        if not os.path.isfile(path):
+            continue
+        stats = pstats.Stats(path)
+        own += stats.total_tt - cumulative(stats, excluded)
+        for category, patterns in CATEGORIES.items():
+            times[category] += cumulative(stats, patterns)
+    times["other"] = max(0.0, own - sum(times.values()))
+    return times
+
+
+def write_rc(rundir: str, args: argparse.Namespace) -> str:
+    """
+    Writes a configuration with all parts enabled and the programs replaced by the replay wrapper.
+    """
+    subprocess.run([sys.executable, "-c", ENTRY_POINT, "--new-config"],
+                   cwd=rundir, check=True, capture_output=True)
+    parser = configparser.ConfigParser()
+    parser.read(os.path.join(rundir, "censo2rc_NEW"))
+    parser["paths"]["orcapath"] = os.path.join(FAKE_PROGRAMS, "orca_replay")
+    parser["paths"]["xtbpath"] = os.path.join(FAKE_PROGRAMS, "xtb_replay")
+    parser["paths"]["orcaversion"] = args.orcaversion
+    for part in ["prescreening", "screening", "optimization", "refinement", "nmr", "uvvis"]:
+        parser[part]["run"] = "True"
+    parser["general"]["cache"] = "False"
+    parser["general"]["resume"] = "False"
+    path = os.path.join(rundir, "censorc")
+    with open(path, "w") as f:
+        parser.write(f)
+    return path
+
+
+def run(workdir: str, name: str, args: argparse.Namespace, strict: bool,
+        profile: bool) -> tuple[str, dict[str, float]]:
+    """
+    Runs CENSO in a fresh directory (with trace) and returns the directory and the wall time per part.
+    """
+    rundir = os.path.join(workdir, name)
+    os.makedirs(rundir)
+    shutil.copy(args.ensemble, os.path.join(rundir, "crest_conformers.xyz"))
+    rcpath = write_rc(rundir, args)
+
+    env = dict(os.environ)
+    env["CENSO_REPLAY_DIR"] = args.recordings
+    env["CENSO_REPLAY_LOG"] = os.path.join(rundir, "replay.jsonl")
+    env["CENSO_REPLAY_STRICT"] = "1" if strict else "0"
+    if args.orca is not None:
+        env["CENSO_REPLAY_ORCA"] = args.orca
+    if args.xtb is not None:
+        env["CENSO_REPLAY_XTB"] = args.xtb
+
+    call = [
+        sys.executable, "-c", ENTRY_POINT, "-i", "crest_conformers.xyz", "--inprc", rcpath, "--maxcores",
+        str(args.maxcores), "--trace"
+    ]
+    if profile:
+        call += ["--profile", "cprofile"]
+    sub = subprocess.run(call, cwd=rundir, env=env, capture_output=True, text=True)
+    if sub.returncode != 0 or "CENSO all done!" not in sub.stdout:
+        sys.exit(f"CENSO failed in {rundir}:\n{sub.stdout[-2000:]}\n{sub.stderr[-2000:]}")
+
+    return rundir, {part: float(t) for part, t in RUNTIME_LINE.findall(sub.stdout)}
+
+
+def program_times(rundir: str) -> tuple[dict[str, float], int]:
+    """
+    Summed recorded runtime of the program calls per part, and the number of calls that were not replayed.
+    """
+    times, recorded = {}, 0
+    with open(os.path.join(rundir, "replay.jsonl"), "r") as f:
+        for line in f:
+            call = json.loads(line)
+            recorded += not call["replayed"]
+
+            # the part directories are named like 0_PRESCREENING
+            # (calls outside of them, e.g. 'xtb --version' during the configuration, do not belong to a part)
+            partdir = os.path.relpath(call["cwd"], rundir).split(os.sep)[0]
+            if "_" not in partdir:
+                continue
+            part = partdir.split("_", 1)[1].lower()
+            times[part] = times.get(part, 0.0) + call["runtime"]
+    return times, recorded
+
+
+def call_times(rundir: str) -> dict[str, float]:
+    """
+    Summed duration of the program calls per part from the trace.
+    """
+    with open(os.path.join(rundir, "censo_trace.json"), "r") as f:
+        events = json.load(f)["traceEvents"]
+
+    # the spans of every job directly follow the job (see censo.tracing.Tracer.finished)
+    times, part = {}, None
+    for e in events:
+        if e.get("cat") == "job":
+            part = e["args"]["part"]
+        elif e.get("cat") == "call":
+            times[part] = times.get(part, 0.0) + e["dur"] / 1e6
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recordings", type=str, default=None,
+                        help="Directory of the recordings (kept between runs, default: temporary).")
+    parser.add_argument("--ensemble", type=str, default=SEED_ENSEMBLE)
+    parser.add_argument("--maxcores", type=int, default=4)
+    parser.add_argument("--orca", type=str, default=None, help="ORCA used for recording (default: fake ORCA).")
+    parser.add_argument("--xtb", type=str, default=None, help="xtb used for recording (default: fake xtb).")
+    parser.add_argument("--orcaversion", type=str, default="5.0.4")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of replay runs (the fastest one is reported).")
+    parser.add_argument("--json", type=str, default=None, help="Write the results to this file.")
+    parser.add_argument("--keep", type=str, default=None, help="Keep the run directories in this directory.")
+    args = parser.parse_args()
+    args.ensemble = os.path.abspath(args.ensemble)
+
+    workdir = args.keep or tempfile.mkdtemp()
+    if args.keep is not None:
+        os.makedirs(workdir, exist_ok=True)
+    cleanup = []
+    if args.recordings is None:
+        args.recordings = tempfile.mkdtemp()
+        cleanup.append(args.recordings)
+    if args.keep is None:
+        cleanup.append(workdir)
+    args.recordings = os.path.abspath(args.recordings)
+
+    try:
+        rundir, record = run(workdir, "record", args, strict=False, profile=False)
+        programs, recorded = program_times(rundir)
+
+        replay, calls = None, None
+        for i in range(args.repeat):
+            replaydir, walls = run(workdir, f"replay{i}", args, strict=True, profile=False)
+            if replay is None or sum(walls.values()) < sum(replay.values()):
+                replay, calls = walls, call_times(replaydir)
+
+        rundir, _ = run(workdir, "profile", args, strict=True, profile=True)
+        results = {}
+        for partdir in sorted(os.listdir(rundir)):
+            if not os.path.isdir(os.path.join(rundir, partdir)) or "_" not in partdir:
+                continue
+            part = partdir.split("_", 1)[1].lower()
+            results[part] = {
+                "record": record.get(part, 0.0),
+                "replay": replay.get(part, 0.0),
+                "calls": calls.get(part, 0.0),
+                "programs": programs.get(part, 0.0),
+                **breakdown(os.path.join(rundir, partdir)),
+            }
+    finally:
+        for path in cleanup:
+            shutil.rmtree(path, ignore_errors=True)
+
+    columns = ["record", "replay", "calls", "programs", *CATEGORIES, "other"]
+    print(f"CENSO pipeline on {os.path.basename(args.ensemble)} with {args.maxcores} cores "
+          f"({recorded} program calls recorded, times in seconds)")
+    print(f"{'part':<14}" + "".join(f"{c:>11}" for c in columns))
+    for part, times in results.items():
+        print(f"{part:<14}" + "".join(f"{times[c]:>11.3f}" for c in columns))
+    print(f"{'total':<14}" + "".join(f"{sum(t[c] for t in results.values()):>11.3f}" for c in columns))
+
+    if args.json is not None:
+        # the version is printed last by 'censo --version'
+        version = subprocess.run([sys.executable, "-c", ENTRY_POINT, "--version"],
+                                 capture_output=True, text=True).stdout.split()[-1]
+        with open(args.json, "w") as f:
+            json.dump({
+                "version": version,
+                "ensemble": os.path.basename(args.ensemble),
+                "maxcores": args.maxcores,
+                "parts": results,
+            }, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
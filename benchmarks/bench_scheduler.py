@@ -0,0 +1,188 @@
+"""
+Benchmark of the scheduling hot path (censo.parallel.execute and dqp) with synthetic calculations.
+Ensembles of different sizes are run with censo.synthetic_processor.SyntheticProc and the fake programs in
+benchmarks/fake_programs, which spend time according to a runtime model (per atom count and omp scaling).
+
+Reported per ensemble size (from the timeline recorded by censo.tracing):
+    makespan:        wall time of execute,
+    occupancy:       core-seconds reserved by running jobs / (makespan * cores),
+    utilization:     core-seconds spent in the external programs / (makespan * cores),
+    worker overhead: mean time per job spent in CENSO instead of the external programs (input generation, parsing,
+                     bookkeeping, pickling of the job is not included),
+    setup/teardown:  time of execute before the first job starts and after the last one ends.
+
+The geometries are taken from the seed ensemble (cycled and randomly perturbed, so every conformer has its own energy).
+
+Usage:
+    python benchmarks/bench_scheduler.py [--sizes 10 100 1000 10000] [--cores 16] [--omp 4] [--jobtype sp]
+        [--base 0.05] [--per-atom 0.0] [--exponent 1.0] [--parallel 0.9] [--mode sleep] [--failrate 0.0]
+        [--schedule chunked] [--executor process] [--no-balance] [--ensemble tests/testfiles/crest_conformers.xyz]
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+from censo import parallel
+from censo.datastructure import MoleculeData
+from censo.parallel import ExecutionContext, execute
+from censo.procfact import ProcessorFactory
+from censo.qm_processor import QmProc
+from censo.synthetic_processor import SyntheticProc
+from censo.telemetry import Telemetry
+
+FAKE_PROGRAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "fake_programs")
+SEED_ENSEMBLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                             "tests", "testfiles", "crest_conformers.xyz")
+
+
+def read_seed(path: str) -> list[list[str]]:
+    with open(path, "r") as f:
+        lines = f.readlines()
+    geometries = []
+    i = 0
+    while i < len(lines) and lines[i].strip() != "":
+        nat = int(lines[i])
+        geometries.append(lines[i + 2:i + 2 + nat])
+        i += nat + 2
+    return geometries
+
+
+def make_conformers(seed: list[list[str]], n: int) -> list[MoleculeData]:
+    rng = random.Random(0)
+    conformers = []
+    for i in range(n):
+        xyz = []
+        for line in seed[i % len(seed)]:
+            element, *coords = line.split()
+            coords = [float(x) + rng.uniform(-0.01, 0.01) for x in coords]
+            xyz.append(f"{element} {coords[0]} {coords[1]} {coords[2]}\n")
+        conformers.append(MoleculeData(f"CONF{i + 1}", xyz))
+    return conformers
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    Silences the progress output of CENSO (also of the worker processes, which inherit the file descriptor).
+    """
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def bench(conformers: list[MoleculeData], args: argparse.Namespace) -> dict:
+    prepinfo = {
+        "general": {
+            "cache": False,
+            "resume": False,
+            "schedule": args.schedule,
+            "executor": args.executor,
+        },
+        "partname": "benchmark",
+        "charge": 0,
+        "unpaired": 0,
+        "synthetic": {
+            "base": args.base,
+            "per_atom": args.per_atom,
+            "exponent": args.exponent,
+            "parallel": args.parallel,
+            "mode": args.mode,
+            "failrate": args.failrate,
+        },
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        telemetry = Telemetry(
+            trace_path=os.path.join(workdir, "censo_trace.json"))
+        with quiet(), ExecutionContext(args.cores, telemetry=telemetry):
+            start = perf_counter()
+            execute(conformers,
+                    workdir,
+                    "synthetic",
+                    prepinfo, [args.jobtype],
+                    balance=args.balance,
+                    maxcores=args.cores,
+                    omp=args.omp)
+            makespan = perf_counter() - start
+
+        events = telemetry.tracer.events
+
+    # the spans of every job directly follow the job (see censo.tracing.Tracer.finished)
+    jobs, calls, omp = [], [], 0
+    for e in events:
+        if e.get("cat") == "job":
+            jobs.append(e)
+            omp = e["args"]["omp"]
+        elif e.get("cat") == "call":
+            calls.append((e, omp))
+
+    capacity = makespan * args.cores * 1e6
+    first = min(e["ts"] for e in jobs)
+    last = max(e["ts"] + e["dur"] for e in jobs)
+    return {
+        "makespan":
+        makespan,
+        "occupancy":
+        sum(e["dur"] * e["args"]["omp"] for e in jobs) / capacity,
+        "utilization":
+        sum(e["dur"] * omp for e, omp in calls) / capacity,
+        "worker overhead":
+        (sum(e["dur"] for e in jobs) - sum(e["dur"]
+                                           for e, _ in calls)) / len(jobs) / 1e6,
+        "setup/teardown":
+        makespan - (last - first) / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--cores", type=int, default=16)
+    parser.add_argument("--omp", type=int, default=4)
+    parser.add_argument("--jobtype", type=str, default="sp")
+    parser.add_argument("--base", type=float, default=0.05)
+    parser.add_argument("--per-atom", dest="per_atom", type=float, default=0.0)
+    parser.add_argument("--exponent", type=float, default=1.0)
+    parser.add_argument("--parallel", type=float, default=0.9)
+    parser.add_argument("--mode", choices=["sleep", "burn"], default="sleep")
+    parser.add_argument("--failrate", type=float, default=0.0)
+    parser.add_argument("--schedule", choices=["chunked", "duration"], default="chunked")
+    parser.add_argument("--executor", choices=["process", "thread"], default="process")
+    parser.add_argument("--no-balance", dest="balance", action="store_false")
+    parser.add_argument("--ensemble", type=str, default=SEED_ENSEMBLE)
+    args = parser.parse_args()
+
+    ProcessorFactory.register("synthetic", SyntheticProc)
+
+    # the worker processes inherit the paths (fork)
+    QmProc._paths["xtbpath"] = os.path.join(FAKE_PROGRAMS, "xtb")
+    QmProc._paths["orcapath"] = os.path.join(FAKE_PROGRAMS, "orca")
+    parallel.ncores = args.cores
+
+    seed = read_seed(args.ensemble)
+    print(f"{args.jobtype} jobs on {args.cores} cores (omp {args.omp}, {args.schedule}, "
+          f"{args.executor} executor, {args.mode} mode)")
+    print(f"{'conformers':>10}{'makespan':>12}{'occupancy':>11}{'utilization':>13}"
+          f"{'worker overhead':>17}{'setup/teardown':>16}")
+    for size in args.sizes:
+        result = bench(make_conformers(seed, size), args)
+        print(f"{size:>10}{result['makespan']:>10.2f} s{result['occupancy']:>10.1%}"
+              f"{result['utilization']:>12.1%}{result['worker overhead'] * 1000:>13.1f} ms"
+              f"{result['setup/teardown'] * 1000:>13.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
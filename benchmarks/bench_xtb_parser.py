@@ -0,0 +1,133 @@
+"""
+Benchmark for parsing xtb outputs of realistic size.
+Synthetic outputs are generated for a geometry optimization (many cycles, padded with the usual per-cycle output) and
+for a multitemp mRRHO calculation (long temperature range). They are parsed with censo.xtb_parser and, for
+comparison, with the former approach of reading all lines and scanning them once per quantity.
+
+Usage:
+    python benchmarks/bench_xtb_parser.py [--cycles 500] [--temps 200] [--repeats 5]
+"""
+import argparse
+import os
+import tempfile
+from statistics import median
+from time import perf_counter
+
+from censo.xtb_parser import ERROR_INDICATORS, parse_xtb_output
+
+# output printed by xtb for every optimization cycle that is not parsed
+FILLER = "".join(f"   {i:>4}  C    -0.1234567   0.1234567  -0.1234567   0.0123\n"
+                 for i in range(40))
+
+
+def write_opt(path: str, cycles: int) -> None:
+    with open(path, "w") as f:
+        for i in range(cycles):
+            f.write(f"........................................\n"
+                    f".            CYCLE {i + 1:>5}                .\n"
+                    f"........................................\n")
+            f.write(FILLER)
+            f.write(f" * total energy  :   -40.{i:08d} Eh     change   -0.1E-05 Eh\n"
+                    f"   gradient norm :     0.{i:07d} Eh/α   predicted   -0.1E-05\n"
+                    f" cycle {i + 1}  av. E: -40.1 -> -40.{i:08d}\n")
+        f.write(
+            f"   *** GEOMETRY OPTIMIZATION CONVERGED AFTER {cycles} ITERATIONS ***\n"
+        )
+        f.write("          | TOTAL ENERGY              -40.100000000000 Eh   |\n")
+
+
+def write_rrho(path: str, temps: int) -> None:
+    trange = [100.0 + 5.0 * i for i in range(temps)]
+    with open(path, "w") as f:
+        f.write(FILLER * 20)
+        f.write("   temp. (K)  partition function   enthalpy   heat capacity  entropy\n")
+        for T in trange:
+            f.write(f" {T:.2f}  VIB   16.4                 2063.049     17.802     15.520\n"
+                    f"         ROT  0.169E+06              888.752      2.981     26.908\n"
+                    f"         INT  0.278E+07             2951.801     20.783     42.428\n"
+                    f"         TR   0.114E+28             1481.254      4.968     40.197\n")
+        f.write("          :  linear?                           false   :\n")
+        f.write("     T/K    H(0)-H(T)+PV         H(T)/Eh          T*S/Eh         G(T)/Eh\n")
+        f.write(" " + "-" * 72 + "\n")
+        for T in trange:
+            f.write(f"    {T:.2f}    0.46315067E-02  0.27165803E-01  0.19848889E-01  0.73169140E-02\n")
+        f.write(" " + "-" * 72 + "\n")
+        f.write("          | TOTAL ENERGY              -40.100000000000 Eh   |\n")
+
+
+def parse_legacy(path: str) -> dict:
+    """
+    The former way of parsing (all lines are kept and scanned several times).
+    """
+    with open(path, "r") as f:
+        lines = f.readlines()
+
+    output = {"energy": None, "gibbs": {}, "enthalpy": {}, "entropy": {}}
+    for line in lines:
+        if "| TOTAL ENERGY" in line:
+            output["energy"] = float(line.split()[3])
+    for line in lines:
+        if "T/K" in line:
+            for line2 in lines[lines.index(line) + 2:]:
+                if "----------------------------------" in line2:
+                    break
+                T = float(line2.split()[0])
+                output["gibbs"][T] = float(line2.split()[4])
+                output["enthalpy"][T] = float(line2.split()[2])
+    for line, line2 in ((line, lines[i + 1]) for i, line in enumerate(lines)
+                        if "VIB" in line):
+        output["entropy"][float(line.split()[0])] = float(line2.split()[4])
+    output["linear"] = next(({
+        "true": True,
+        "false": False
+    }[line.split()[2]] for line in lines if ":  linear? " in line), None)
+    output["error"] = next(
+        (x for x in lines if any(y in x for y in ERROR_INDICATORS)),
+        None) is not None
+    output["ecyc"] = [
+        float(line.split("->")[-1])
+        for line in filter(lambda x: "av. E: " in x, lines)
+    ]
+    output["gncyc"] = [
+        float(line.split()[3])
+        for line in filter(lambda x: " gradient norm " in x, lines)
+    ]
+    return output
+
+
+def bench(parser, path: str, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = perf_counter()
+        parser(path)
+        times.append(perf_counter() - start)
+    return median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cycles", type=int, default=500)
+    parser.add_argument("--temps", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        outputs = {
+            f"xtb_opt ({args.cycles} cycles)": os.path.join(tmpdir, "opt.out"),
+            f"xtb_rrho ({args.temps} temperatures)": os.path.join(tmpdir, "rrho.out"),
+        }
+        paths = list(outputs.values())
+        write_opt(paths[0], args.cycles)
+        write_rrho(paths[1], args.temps)
+
+        print(f"median of {args.repeats} repeats")
+        for name, path in outputs.items():
+            size = os.path.getsize(path) / 1024**2
+            legacy = bench(parse_legacy, path, args.repeats)
+            new = bench(parse_xtb_output, path, args.repeats)
+            print(f"{name:<30}{size:>8.1f} MB   readlines: {legacy * 1000:>8.1f} ms"
+                  f"   xtb_parser: {new * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
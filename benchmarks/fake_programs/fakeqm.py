@@ -0,0 +1,334 @@
+"""
+Fake ORCA and xtb executables for benchmarking CENSO without the real programs.
+They understand the calls made by CENSO's processors (and by censo.synthetic_processor.SyntheticProc), spend time
+according to a runtime model and write outputs that look like the ones of the real programs (same markers, so the
+parsers of CENSO can be used on them).
+
+Runtime model (in seconds):
+    t = (base + per_atom * nat^exponent) * ((1 - parallel) + parallel / nprocs)
+The time is either slept ("sleep") or burned on nprocs cores ("burn"). With probability failrate the program fails.
+
+The parameters are taken from (in increasing priority) the defaults below, the environment variable
+CENSO_FAKE_MODEL (json) and a line of the input containing "censo-fake-model <json>" (written by SyntheticProc).
+
+Only the standard library is used, so that the startup of the fake programs stays cheap.
+"""
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+
+MODEL_KEY = "censo-fake-model"
+
+DEFAULT_MODEL = {
+    "base": 0.05,
+    "per_atom": 0.0,
+    "exponent": 1.0,
+    "parallel": 0.9,
+    "mode": "sleep",
+    "failrate": 0.0,
+}
+
+# lines of filler output per atom (the real programs print basis set information, orbitals, populations etc.)
+FILLER_PER_ATOM = 20
+
+BOHR2ANG = 0.52917721067
+
+
+def load_model(lines: list[str]) -> dict:
+    model = dict(DEFAULT_MODEL)
+    if os.environ.get("CENSO_FAKE_MODEL", "") != "":
+        model.update(json.loads(os.environ["CENSO_FAKE_MODEL"]))
+    for line in lines:
+        if MODEL_KEY in line:
+            model.update(json.loads(line.split(MODEL_KEY, 1)[1]))
+            break
+    return model
+
+
+def runtime(model: dict, nat: int, nprocs: int) -> float:
+    serial = model["base"] + model["per_atom"] * nat**model["exponent"]
+    return serial * ((1.0 - model["parallel"]) +
+                     model["parallel"] / max(1, nprocs))
+
+
+def spend(seconds: float, nprocs: int, mode: str) -> None:
+    if mode != "burn":
+        time.sleep(seconds)
+        return
+
+    # burn one core per process
+    children = []
+    for _ in range(max(1, nprocs) - 1):
+        pid = os.fork()
+        if pid == 0:
+            _burn(seconds)
+            os._exit(0)
+        children.append(pid)
+    _burn(seconds)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+
+def _burn(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    x = 0
+    while time.perf_counter() < end:
+        for i in range(1000):
+            x += i * i
+
+
+def run(model: dict, nat: int, nprocs: int) -> None:
+    """
+    Spends the time of the calculation or fails.
+    """
+    spend(runtime(model, nat, nprocs), nprocs, model["mode"])
+    if random.random() < model["failrate"]:
+        sys.stderr.write("fake program failed on purpose\n")
+        sys.exit(1)
+
+
+def energy(geometry: list[str]) -> float:
+    """
+    Energy depending on the geometry (reproducible, spread over ~6 kcal/mol for the same molecule).
+    """
+    digest = hashlib.sha1("".join(geometry).encode()).digest()
+    return -0.5 * len(geometry) - 0.01 * int.from_bytes(
+        digest[:4], "little") / 2**32
+
+
+def filler(nat: int) -> str:
+    return "".join(
+        f"   {i:>6}   {i % 7:>3}s   {0.1234567 * (i % 13):>14.7f}   {0.7654321 * (i % 11):>14.7f}\n"
+        for i in range(nat * FILLER_PER_ATOM))
+
+
+def orca() -> None:
+    """
+    Usage: orca <input>.inp
+    """
+    inputpath = sys.argv[1]
+    base = os.path.splitext(inputpath)[0]
+    with open(inputpath, "r") as f:
+        lines = f.readlines()
+
+    keywords = lines[0].upper().split() if len(lines) > 0 else []
+    nprocs, nroots, geometry = 1, 0, []
+    # NMR calculations are requested either via keyword or via the %eprnmr block (couplings via 'ssfc')
+    nmr, couplings = "NMR" in keywords, False
+    for i, line in enumerate(lines):
+        spl = line.split()
+        if line.lower().startswith("%eprnmr"):
+            nmr = True
+        elif spl[:1] == ["Nuclei"] and "ssfc" in line:
+            couplings = True
+        elif len(spl) == 2 and spl[0].lower() == "nprocs":
+            nprocs = int(spl[1])
+        elif len(spl) == 2 and spl[0].lower() == "nroots":
+            nroots = int(spl[1])
+        elif line.startswith("* xyzfile"):
+            with open(spl[-1], "r") as f:
+                geometry = f.readlines()[2:]
+        elif line.startswith("* xyz"):
+            geometry = [l for l in lines[i + 1:]]
+            geometry = geometry[:next(
+                j for j, l in enumerate(geometry) if l.startswith("*"))]
+    geometry = [line for line in geometry if line.strip() != ""]
+    nat = len(geometry)
+
+    model = load_model(lines)
+    run(model, nat, nprocs)
+
+    e = energy(geometry)
+    out = sys.stdout
+    out.write("                                 * O   R   C   A *\n\n")
+    out.write(filler(nat))
+
+    if "OPT" in keywords:
+        cycles = 3 + nat // 10
+        for c in range(1, cycles + 1):
+            out.write("                                *****************************\n"
+                      f"                                * GEOMETRY OPTIMIZATION CYCLE {c:>3} *\n"
+                      "                                *****************************\n")
+            out.write(filler(nat // 4 + 1))
+            out.write(
+                f"Current Energy                                    ....   {e + 0.001 * (cycles - c):.8f} Eh\n"
+                f"Current gradient norm                             ....     {0.01 / c:.8f} Eh/bohr\n"
+            )
+            out.write(f"FINAL SINGLE POINT ENERGY     {e + 0.001 * (cycles - c):.12f}\n")
+        out.write("                    ***********************HURRAY********************\n"
+                  "                    ***        THE OPTIMIZATION HAS CONVERGED     ***\n"
+                  "                    *************************************************\n")
+        with open(base + ".xyz", "w") as f:
+            f.write(f"{nat}\ncoordinates from fake ORCA run\n")
+            f.writelines(geometry)
+    else:
+        out.write(f"FINAL SINGLE POINT ENERGY     {e:.12f}\n")
+
+    if nmr:
+        out.write("\n--------------------------\n"
+                  "CHEMICAL SHIELDING SUMMARY (ppm)\n"
+                  "--------------------------\n\n\n"
+                  "  Nucleus  Element    Isotropic     Anisotropy\n"
+                  "  -------  -------  ------------   ------------\n")
+        for i, line in enumerate(geometry):
+            out.write(
+                f"  {i:>5}       {line.split()[0]:<2}     {100.0 + i:>12.3f}   {50.0 + i:>12.3f}\n"
+            )
+        out.write("\n")
+
+    if nroots > 0:
+        out.write(
+            "-----------------------------------------------------------------------------\n"
+            "         ABSORPTION SPECTRUM VIA TRANSITION ELECTRIC DIPOLE MOMENTS\n"
+            "-----------------------------------------------------------------------------\n"
+            "State   Energy    Wavelength  fosc         T2        TX        TY        TZ\n"
+            "        (cm-1)      (nm)                 (au**2)    (au)      (au)      (au)\n"
+            "-----------------------------------------------------------------------------\n"
+        )
+        for i in range(1, nroots + 1):
+            out.write(
+                f"   {i:>2}   {30000.0 + 1000 * i:>8.1f}    {1e7 / (30000.0 + 1000 * i):>5.1f}   "
+                f"{0.01 * i:.9f}   0.10000   0.10000   0.20000   0.30000\n")
+
+    out.write("\n                             ****ORCA TERMINATED NORMALLY****\n")
+
+    with open(base + ".gbw", "wb") as f:
+        f.write(b"\0" * 1024 * nat)
+
+    if couplings:
+        write_couplings(base + "_property.txt", geometry)
+
+
+def write_couplings(path: str, geometry: list[str]) -> None:
+    """
+    Writes the spin-spin couplings between all hydrogen and carbon atoms to the property file, in the layout read by
+    censo.orca_processor.OrcaProc._nmr (header of 12 lines, three lines per pair, closed by a dashed line).
+    """
+    active = [i for i, line in enumerate(geometry) if line.split()[0] in ["H", "C"]]
+    with open(path, "w") as f:
+        f.write("$ EPRNMR_SSCoupling\n")
+        f.writelines(f"   fake property header line {i}\n" for i in range(12))
+        n = 0
+        for i in active:
+            for j in active:
+                if i == j:
+                    continue
+                n += 1
+                f.write(
+                    f"   Pair {n:>5}  Nucleus A: {i:>4} {geometry[i].split()[0]}  Distance (A) 1.0000  "
+                    f"Nucleus B: {j:>4} {geometry[j].split()[0]}\n"
+                    "   Contributions: DSO 0.0 PSO 0.0 FC 0.0 SD 0.0\n"
+                    f"   Isotropic total coupling (Hz): {(i * 7 + j * 7) % 15 - 7.0:.4f}\n")
+        f.write("-" * 60 + "\n")
+
+
+def xtb() -> None:
+    """
+    Usage: xtb <coord file> [--sp | --opt | --ohess | --bhess] [--parallel <n>] [--input <xcontrol>] ...
+    """
+    args = sys.argv[1:]
+    if args == ["--version"]:
+        print("      * xtb version 6.6.1 (fake) compiled by 'censo' on 1970-01-01")
+        return
+
+    coordpath = args[0]
+    with open(coordpath, "r") as f:
+        lines = f.readlines()
+
+    # xyz or turbomole coord format
+    if lines[0].strip().isdigit():
+        geometry = lines[2:2 + int(lines[0])]
+    else:
+        start = next(i for i, l in enumerate(lines) if l.startswith("$coord"))
+        geometry = []
+        for line in lines[start + 1:]:
+            if line.startswith("$"):
+                break
+            geometry.append(line)
+    nat = len(geometry)
+
+    def option(*names, default=None):
+        for name in names:
+            if name in args and args.index(name) + 1 < len(args):
+                return args[args.index(name) + 1]
+        return default
+
+    nprocs = int(option("--parallel", "-P", default=1))
+
+    temps = [298.15]
+    xcontrol = option("--input", "-I")
+    if xcontrol is not None and os.path.isfile(xcontrol):
+        with open(xcontrol, "r") as f:
+            for line in f:
+                if "temp=" in line:
+                    temps = [float(t) for t in line.split("=")[1].split(",")]
+
+    model = load_model(lines)
+    run(model, nat, nprocs)
+
+    e = energy(geometry)
+    out = sys.stdout
+    out.write("           -----------------------------------------------------------\n"
+              "          |                   =====================                   |\n"
+              "          |                           x T B                           |\n"
+              "          |                   =====================                   |\n"
+              "           -----------------------------------------------------------\n\n")
+    out.write(filler(nat))
+
+    if "--opt" in args:
+        cycles = 3 + nat // 10
+        for c in range(1, cycles + 1):
+            out.write("........................................\n"
+                      f".            CYCLE {c:>5}                .\n"
+                      "........................................\n")
+            out.write(filler(nat // 4 + 1))
+            out.write(f" * total energy  :   {e + 0.001 * (cycles - c):.8f} Eh     change   -0.1E-05 Eh\n"
+                      f"   gradient norm :     {0.01 / c:.8f} Eh/a0   predicted   -0.1E-05\n"
+                      f" cycle {c}  av. E: {e:.8f} -> {e + 0.001 * (cycles - c):.8f}\n")
+        out.write(f"\n   *** GEOMETRY OPTIMIZATION CONVERGED AFTER {cycles} ITERATIONS ***\n\n")
+
+        # write the final geometry in the format of the input
+        ext = os.path.splitext(coordpath)[1]
+        if lines[0].strip().isdigit():
+            with open("xtbopt" + (ext or ".xyz"), "w") as f:
+                f.write(f"{nat}\n\n")
+                f.writelines(geometry)
+        else:
+            with open("xtbopt.coord", "w") as f:
+                f.write("$coord\n")
+                f.writelines(geometry)
+                f.write("$end\n")
+
+    hess = any(flag in args for flag in ["--ohess", "--bhess", "--hess"])
+    gt = {T: 0.0073 - 1e-5 * (T - 298.15) for T in temps}
+    if hess:
+        out.write("   temp. (K)  partition function   enthalpy   heat capacity  entropy\n")
+        for T in temps:
+            out.write(f" {T:>7.2f}  VIB   16.4                 2063.049     17.802     15.520\n"
+                      f"          ROT  0.169E+06              888.752      2.981     {26.9 + T / 1000:.3f}\n"
+                      f"          INT  0.278E+07             2951.801     20.783     42.428\n"
+                      f"          TR   0.114E+28             1481.254      4.968     40.197\n")
+        out.write("          :  linear?                           false   :\n")
+        out.write("     T/K    H(0)-H(T)+PV         H(T)/Eh          T*S/Eh         G(T)/Eh\n")
+        out.write(" " + "-" * 72 + "\n")
+        for T in temps:
+            out.write(f"  {T:>7.2f}    0.46315067E-02  0.27165803E-01  0.19848889E-01  {gt[T]:.8E}\n")
+        out.write(" " + "-" * 72 + "\n")
+        if "--bhess" in args:
+            out.write("   final rmsd /     0.00120 Bohr\n")
+        if "--enso" in args:
+            with open("xtb_enso.json", "w") as f:
+                json.dump({
+                    "number of imags": 0,
+                    "ZPVE": 0.1,
+                    "G(T)": gt[temps[-1]],
+                    "linear": False,
+                    "point group": "c1",
+                }, f)
+
+    out.write("           -------------------------------------------------\n"
+              f"          | TOTAL ENERGY            {e:.12f} Eh   |\n"
+              "           -------------------------------------------------\n")
@@ -0,0 +1,174 @@
+"""
+Record/replay wrapper for ORCA and xtb, used to benchmark the pipeline of CENSO without waiting for the programs.
+Every call is identified by the program, its arguments and the files in the working directory. If a recording of the
+call exists, its output (stdout, stderr, returncode and the files written by the program) is served instantly,
+otherwise the program is run and recorded.
+
+The number of cores, memory settings, MO guesses and absolute paths are not part of the identification, since they
+change between runs without changing the results (the recordings of one run can be replayed in another directory and
+with another number of cores).
+
+Environment variables:
+    CENSO_REPLAY_DIR:   directory of the recordings (required),
+    CENSO_REPLAY_ORCA,
+    CENSO_REPLAY_XTB:   program run (and recorded) if no recording is found, defaults to the fake programs,
+    CENSO_REPLAY_STRICT: if "1", a missing recording is an error instead of being recorded,
+    CENSO_REPLAY_LOG:   file to which one json line per call is appended (key, working directory, recorded runtime of
+                        the program and whether the call was replayed).
+
+Only the standard library is used, so that the startup of the wrapper stays cheap.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+FAKE_PROGRAMS = os.path.dirname(os.path.abspath(__file__))
+
+# lines of the inputs depending on the resources or on previous runs (compared in lower case)
+IGNORED_LINES = ("nprocs", "%maxcore", "maxcore", "%moinp", "moinp")
+
+# options of the programs followed by the number of cores
+IGNORED_OPTIONS = ("--parallel", "-P")
+
+# MO guesses only change the convergence of the SCF
+IGNORED_FILES = (".gbw", )
+
+ABSPATH = re.compile(r"(?<![\w.])/(?:[^\s/\"']+/)*")
+
+
+def normalize(text: str) -> str:
+    """
+    Removes the lines depending on the resources and the directories of absolute paths.
+    """
+    lines = [
+        line for line in text.splitlines()
+        if not line.strip().lower().startswith(IGNORED_LINES)
+    ]
+    return ABSPATH.sub("", "\n".join(lines))
+
+
+def snapshot(cwd: str) -> dict[str, tuple[int, int]]:
+    files = {}
+    for root, _, names in os.walk(cwd):
+        for name in names:
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            files[os.path.relpath(path, cwd)] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def call_key(prog: str, args: list[str], cwd: str) -> str:
+    digest = hashlib.sha1(prog.encode())
+
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+            continue
+        skip = arg in IGNORED_OPTIONS
+        digest.update(b"\0" + normalize(arg).encode())
+
+    for name in sorted(snapshot(cwd)):
+        if name.endswith(IGNORED_FILES):
+            continue
+        with open(os.path.join(cwd, name), "rb") as f:
+            content = f.read()
+        try:
+            content = normalize(content.decode()).encode()
+        except UnicodeDecodeError:
+            pass
+        digest.update(b"\0" + name.encode() + b"\0" + content)
+
+    return digest.hexdigest()
+
+
+def replay(prog: str) -> None:
+    """
+    Replays the call of the program given by the command line arguments, or runs and records it.
+    """
+    args = sys.argv[1:]
+    cwd = os.getcwd()
+    recordings = os.environ["CENSO_REPLAY_DIR"]
+    key = call_key(prog, args, cwd)
+    recording = os.path.join(recordings, key)
+
+    replayed = os.path.isdir(recording)
+    if not replayed:
+        if os.environ.get("CENSO_REPLAY_STRICT", "") == "1":
+            sys.stderr.write(f"No recording of {prog} {' '.join(args)} in {cwd} (key {key}).\n")
+            sys.exit(1)
+        record(prog, args, cwd, recording)
+
+    with open(os.path.join(recording, "meta.json"), "r") as f:
+        meta = json.load(f)
+
+    if os.environ.get("CENSO_REPLAY_LOG", "") != "":
+        with open(os.environ["CENSO_REPLAY_LOG"], "a") as f:
+            f.write(json.dumps({
+                "key": key,
+                "prog": prog,
+                "cwd": cwd,
+                "runtime": meta["runtime"],
+                "replayed": replayed,
+            }) + "\n")
+
+    files = os.path.join(recording, "files")
+    for name in meta["files"]:
+        os.makedirs(os.path.dirname(os.path.join(cwd, name)), exist_ok=True)
+        shutil.copyfile(os.path.join(files, name), os.path.join(cwd, name))
+
+    with open(os.path.join(recording, "stdout"), "rb") as f:
+        shutil.copyfileobj(f, sys.stdout.buffer)
+    with open(os.path.join(recording, "stderr"), "rb") as f:
+        shutil.copyfileobj(f, sys.stderr.buffer)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    sys.exit(meta["returncode"])
+
+
+def record(prog: str, args: list[str], cwd: str, recording: str) -> None:
+    """
+    Runs the program and stores its output and the files it wrote (the recording is moved into place at once, so
+    that concurrent calls never see incomplete recordings).
+    """
+    backend = os.environ.get(f"CENSO_REPLAY_{prog.upper()}",
+                             os.path.join(FAKE_PROGRAMS, prog))
+
+    before = snapshot(cwd)
+    start = time.perf_counter()
+    sub = subprocess.run([backend] + args, cwd=cwd, capture_output=True)
+    runtime = time.perf_counter() - start
+    written = [
+        name for name, stat in snapshot(cwd).items()
+        if before.get(name) != stat
+    ]
+
+    os.makedirs(os.path.dirname(recording), exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=os.path.dirname(recording))
+    with open(os.path.join(tmp, "stdout"), "wb") as f:
+        f.write(sub.stdout)
+    with open(os.path.join(tmp, "stderr"), "wb") as f:
+        f.write(sub.stderr)
+    for name in written:
+        os.makedirs(os.path.dirname(os.path.join(tmp, "files", name)), exist_ok=True)
+        shutil.copyfile(os.path.join(cwd, name), os.path.join(tmp, "files", name))
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({
+            "prog": prog,
+            "args": args,
+            "returncode": sub.returncode,
+            "runtime": runtime,
+            "files": written,
+        }, f, indent=4)
+
+    try:
+        os.rename(tmp, recording)
+    except OSError:
+        # recorded concurrently by another call
+        shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,173 @@
+"""
+Execution of ParallelJobs as job arrays of a batch scheduler (SLURM or PBS).
+Every job is pickled into a task file, one job array is submitted per number of cores (each with its own
+directory) and the pickled results are collected after all arrays finished.
+
+The tasks are run via:
+    python -m censo.batch <arraydir> <task index>
+"""
+import os
+import pickle
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from .datastructure import ParallelJob
+from .logging import setup_logger
+from .qm_processor import QmProc
+
+logger = setup_logger(__name__)
+
+# directives for the job array scripts, the submission command (blocking until the array is finished)
+# and the environment variable containing the array index
+SCHEDULERS = {
+    "slurm": {
+        "header":
+        "#SBATCH --job-name=censo\n#SBATCH --array=0-{last}\n#SBATCH --cpus-per-task={omp}\n"
+        "#SBATCH --output={arraydir}/slurm-%A_%a.out\n",
+        "submit": ["sbatch", "--wait"],
+        "index": "SLURM_ARRAY_TASK_ID",
+    },
+    "pbs": {
+        "header":
+        "#PBS -N censo\n#PBS -J 0-{last}\n#PBS -l select=1:ncpus={omp}\n#PBS -o {arraydir}\n#PBS -j oe\n",
+        "submit": ["qsub", "-W", "block=true"],
+        "index": "PBS_ARRAY_INDEX",
+    },
+}
+
+
+def run_array(jobs: list[ParallelJob],
+              processor: QmProc,
+              scheduler: str,
+              batch_args: str = "") -> list[ParallelJob]:
+    """
+    Runs the jobs as job arrays of a batch scheduler and waits until all of them are finished.
+
+    Args:
+        jobs (list[ParallelJob]): List of jobs.
+        processor (QmProc): Processor object.
+        scheduler (str): Name of the batch scheduler ("slurm" or "pbs").
+        batch_args (str, optional): Additional arguments for the submission command (e.g. partition, walltime).
+
+    Returns:
+        list[ParallelJob]: The finished jobs. Jobs for which no result could be collected are marked as failed.
+    """
+    settings = SCHEDULERS[scheduler]
+
+    # group the jobs by the number of cores, since all tasks of an array get the same resources
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job.omp, []).append(job)
+
+    # write the task files and submit all arrays at once
+    procs = []
+    for omp, group in groups.items():
+        # remove leftovers from previous submissions
+        arraydir = os.path.join(processor.workdir, "batch", f"omp{omp}")
+        if os.path.isdir(arraydir):
+            shutil.rmtree(arraydir)
+        os.makedirs(arraydir)
+
+        # the program paths are class attributes and have to be shipped explicitly
+        for i, job in enumerate(group):
+            with open(os.path.join(arraydir, f"task_{i}.pkl"), "wb") as f:
+                pickle.dump((processor, job, dict(QmProc._paths)), f)
+
+        script = os.path.join(arraydir, "array.sh")
+        with open(script, "w") as f:
+            f.write("#!/bin/bash\n")
+            # PBS does not allow arrays with a single task, surplus tasks just exit
+            f.write(settings["header"].format(
+                last=max(len(group) - 1, 1 if scheduler == "pbs" else 0),
+                omp=omp,
+                arraydir=arraydir,
+            ))
+            f.write(
+                f"{shlex.quote(sys.executable)} -m censo.batch {shlex.quote(arraydir)} ${settings['index']}\n"
+            )
+
+        cmd = settings["submit"] + shlex.split(batch_args) + [script]
+        logger.debug(f"Submitting job array: {' '.join(cmd)}")
+        procs.append(subprocess.Popen(cmd, cwd=arraydir))
+
+    # wait for all arrays to finish
+    for proc in procs:
+        if proc.wait() != 0:
+            logger.warning(
+                f"Job array submission {proc.args} returned {proc.returncode}."
+            )
+
+    results = []
+    for omp, group in groups.items():
+        results.extend(
+            collect(group,
+                    os.path.join(processor.workdir, "batch", f"omp{omp}")))
+
+    return results
+
+
+def collect(jobs: list[ParallelJob], arraydir: str) -> list[ParallelJob]:
+    """
+    Collects the pickled results of the tasks of one job array.
+
+    Args:
+        jobs (list[ParallelJob]): The submitted jobs (in the order of the task indices).
+        arraydir (str): The directory of the job array.
+
+    Returns:
+        list[ParallelJob]: The finished jobs.
+    """
+    results = []
+    for i, job in enumerate(jobs):
+        try:
+            with open(os.path.join(arraydir, f"result_{i}.pkl"), "rb") as f:
+                results.append(pickle.load(f))
+        except (FileNotFoundError, pickle.UnpicklingError, EOFError):
+            logger.warning(
+                f"No result found for {job.conf.name} (task {i}). Check the batch output files in {arraydir}."
+            )
+            for jt in job.jobtype:
+                job.results[jt] = None
+                job.meta[jt] = {
+                    "success": False,
+                    "error": "Batch task failed",
+                    "time": 0.0,
+                }
+            results.append(job)
+
+    return results
+
+
+def run_task(arraydir: str, index: int) -> None:
+    """
+    Runs a single task of a job array and writes its result.
+
+    Args:
+        arraydir (str): The directory of the job array.
+        index (int): The task index.
+
+    Returns:
+        None
+    """
+    task = os.path.join(arraydir, f"task_{index}.pkl")
+    if not os.path.isfile(task):
+        return
+
+    with open(task, "rb") as f:
+        processor, job, paths = pickle.load(f)
+    QmProc._paths.update(paths)
+
+    job = processor.run(job)
+
+    # write atomically, so that the collector never reads a partial result
+    fd, tmp = tempfile.mkstemp(dir=arraydir)
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(job, f)
+    os.replace(tmp, os.path.join(arraydir, f"result_{index}.pkl"))
+
+
+if __name__ == "__main__":
+    run_task(sys.argv[1], int(sys.argv[2]))
@@ -0,0 +1,144 @@
+"""
+Persistent, content-addressed storage for the results of external program calls.
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+from .logging import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class ResultCache:
+    """
+    On-disk cache mapping a hash of all inputs of a calculation to its (result, meta) tuple.
+    Entries are stored as pickle files in a two-level directory structure ('<key[:2]>/<key>.pkl').
+    The object is kept small since it is pickled together with the processor for multiprocessing.
+    """
+
+    def __init__(self, path: str, maxsize: int):
+        """
+        Args:
+            path (str): Directory in which the cache entries are stored.
+            maxsize (int): Maximum size of the cache in MB, least recently used entries are evicted first.
+        """
+        self.path: str = path
+        self.maxsize: int = maxsize
+
+    @staticmethod
+    def make_key(*args) -> str:
+        """
+        Creates a key from arbitrary (json-serializable) arguments. Dicts are serialized with sorted keys so that the
+        key does not depend on insertion order.
+
+        Returns:
+            str: sha256 hexdigest of the serialized arguments.
+        """
+        dump = json.dumps(args, sort_keys=True, default=str)
+        return hashlib.sha256(dump.encode()).hexdigest()
+
+    def get(self, key: str) -> tuple[dict, dict] | None:
+        """
+        Looks up the entry for 'key'.
+
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            tuple[dict, dict] | None: (result, meta) of the cached calculation or None if there is no (valid) entry.
+        """
+        entry = self.__entry_path(key)
+        try:
+            with open(entry, "rb") as f:
+                result, meta = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, ValueError):
+            # broken entry, e.g. from a crash during writing, just remove it
+            logger.warning(f"Removing corrupted cache entry {entry}.")
+            self.__remove(entry)
+            return None
+
+        # mark entry as recently used for eviction
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            pass
+
+        return result, meta
+
+    def put(self, key: str, result: dict, meta: dict) -> None:
+        """
+        Stores (result, meta) under 'key'. The entry is written to a temporary file first and moved afterwards, so
+        that concurrent workers never read partially written entries.
+
+        Args:
+            key (str): The key of the entry.
+            result (dict): Result of the calculation.
+            meta (dict): Metadata of the calculation.
+
+        Returns:
+            None
+        """
+        entry = self.__entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+
+        fd, tmppath = tempfile.mkstemp(dir=os.path.dirname(entry),
+                                       suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((result, meta), f)
+            os.replace(tmppath, entry)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {entry}: {e}")
+            self.__remove(tmppath)
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the cache is smaller than maxsize.
+        Should only be called from the main process (e.g. after all jobs of a batch are done).
+
+        Returns:
+            None
+        """
+        entries = []
+        for root, _, files in os.walk(self.path):
+            for file in files:
+                if not file.endswith(".pkl"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, file))
+                except FileNotFoundError:
+                    continue
+                entries.append(
+                    (stat.st_mtime, stat.st_size, os.path.join(root, file)))
+
+        size = sum(entry[1] for entry in entries)
+        limit = self.maxsize * 1024**2
+        if size <= limit:
+            return
+
+        # oldest entries first
+        entries.sort()
+        nremoved = 0
+        for _, entrysize, entry in entries:
+            if size <= limit:
+                break
+            self.__remove(entry)
+            size -= entrysize
+            nremoved += 1
+
+        logger.debug(f"Evicted {nremoved} entries from cache at {self.path}.")
+
+    def __entry_path(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f"{key}.pkl")
+
+    @staticmethod
+    def __remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
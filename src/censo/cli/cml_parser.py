@@ -118,6 +118,14 @@ def parse(startup_description, argv=None) -> argparse.Namespace:
         dest="loglevel",
         help="Set the loglevel for all modules to a specified level.",
         choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"])
+    groups[0].add_argument(
+        "--trace",
+        dest="trace",
+        action="store_true",
+        help=
+        "Write a timeline of all calculations (jobs, jobtypes, calls to external programs and occupied cores) "
+        "to censo_trace.json in Chrome Trace Event format (open with chrome://tracing or ui.perfetto.dev).",
+    )
 
     # GENERAL SETTINGS
     groups.append(parser.add_argument_group("GENERAL SETTINGS"))
@@ -214,6 +222,97 @@ def parse(startup_description, argv=None) -> argparse.Namespace:
         "Number of cores that should be used for CENSO on the machine. If this is not provided CENSO will use "
         "the maximum number available.",
     )
+    groups[1].add_argument(
+        "--schedule",
+        dest="schedule",
+        type=str,
+        help=
+        "Scheduling mode used for load balancing. Options are 'chunked' (all jobs are assumed to take equally "
+        "long) or 'duration' (cores are distributed according to runtimes predicted from the molecule size and "
+        "previous timings, jobs are run longest first).",
+    )
+    groups[1].add_argument(
+        "--executor",
+        dest="executor",
+        type=str,
+        help=
+        "Executor backend for the calculations. Options are 'process' (local process pool), 'thread' (thread "
+        "pool in the main process, saves memory and pickling), 'distributed' "
+        "(worker agents on the nodes given via --hosts) or 'slurm'/'pbs' (job arrays submitted to the batch "
+        "scheduler). All options except 'process' require a shared filesystem.",
+    )
+    groups[1].add_argument(
+        "--hosts",
+        dest="hosts",
+        nargs="+",
+        type=str,
+        help=
+        "Hosts to run worker agents on for distributed execution (one agent per entry, every agent uses "
+        "--maxcores cores). Agents on remote hosts are started via ssh.",
+    )
+    groups[1].add_argument(
+        "--batch-args",
+        dest="batch_args",
+        type=str,
+        help=
+        "Additional arguments for the submission of job arrays to the batch scheduler, e.g. "
+        "\"--partition=short --time=02:00:00\".",
+    )
+    groups[1].add_argument(
+        "--cache",
+        dest="cache",
+        action=argparse.BooleanOptionalAction,
+        help=
+        "Store the results of all calculations in a persistent cache in the user assets folder (~/.censo2_assets/cache) "
+        "and reuse them for identical calculations in later runs. The size of the cache is limited by 'cache_size' "
+        "(in MB). Use --no-cache to bypass the cache, e.g. if it is enabled in the rcfile.",
+    )
+    groups[1].add_argument(
+        "--no-resume",
+        dest="resume",
+        action="store_const",
+        const=False,
+        help=
+        "Do not skip jobs that already finished in a previous run (recorded in the journal of each part).",
+    )
+    groups[1].add_argument(
+        "--npz",
+        dest="npz",
+        action="store_const",
+        const=True,
+        help="Additionally export the results of every part as a table of columns (one per quantity) to a npz file "
+        "(see censo.results.ResultsTable).",
+    )
+    groups[1].add_argument(
+        "--profile",
+        dest="profile",
+        type=str,
+        help=
+        "Profile CENSO itself (not the external programs). Options are 'cprofile' (deterministic, pstats files) or "
+        "'sampling' (sampled stacks in collapsed-stack format, e.g. for flamegraph.pl). Writes profile_part.* and "
+        "profile_jobs.* into the directory of each part.",
+    )
+    groups[1].add_argument(
+        "--prune",
+        dest="prune",
+        action="store_const",
+        const=True,
+        help="Remove duplicate conformers (heavy atom RMSD below prune_rmsd in Angstrom and xtb energy difference "
+        "below prune_ethr in kcal/mol) before the first part, their number is added to the degeneracy of the kept "
+        "conformer.",
+    )
+    groups[1].add_argument(
+        "--prune-rmsd",
+        dest="prune_rmsd",
+        type=float,
+        help="RMSD threshold in Angstrom for the pruning of duplicates, e.g. 0.125.",
+    )
+    groups[1].add_argument(
+        "--prune-ethr",
+        dest="prune_ethr",
+        type=float,
+        help="Energy threshold in kcal/mol for the pruning of duplicates, e.g. 0.05.",
+    )
     groups[1].add_argument(
         "--imagthr",
         dest="imagthr",
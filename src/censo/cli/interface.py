@@ -9,8 +9,11 @@ from .cml_parser import parse
 from ..configuration import configure, override_rc
 from ..ensembledata import EnsembleData
 from ..ensembleopt import Prescreening, Screening, Optimization, Refinement
+from ..journal import remove_journals
+from ..parallel import ExecutionContext
 from ..part import CensoPart
 from ..properties import NMR, UVVis
+from ..telemetry import Telemetry
 from ..params import START_DESCR, __version__
 from ..utilities import print
 from ..logging import setup_logger, set_loglevel
@@ -54,12 +57,26 @@ def entry_point(argv: list[str] | None = None) -> int:
     if args.maxcores:
         ncores = args.maxcores
 
+    # all parts share the same worker processes
+    # (the progress is shown on stderr if it is a terminal, the metrics and the timeline are written to the workdir)
+    telemetry = Telemetry(
+        os.path.join(ensemble.workdir, "censo_metrics.prom"),
+        status=sys.stderr.isatty(),
+        trace_path=os.path.join(ensemble.workdir, "censo_trace.json")
+        if args.trace else None)
     time = 0.0
-    for part in run:
-        p = part(ensemble)
-        runtime = p.run(ncores)
-        print(f"Ran {p._name} in {runtime:.2f} seconds!")
-        time += runtime
+    with ExecutionContext(ncores, telemetry=telemetry) as context:
+        for part in run:
+            p = part(ensemble)
+            runtime = p.run(ncores)
+            print(f"Ran {p._name} in {runtime:.2f} seconds!")
+            time += runtime
+
+    # the run is complete, so there is nothing left to resume
+    remove_journals(ensemble.workdir)
+
+    logger.info(context.summary())
+    print(context.summary())
 
     runtime = timedelta(seconds=int(runtime))
     hours, r = divmod(runtime.seconds, 3600)
@@ -108,6 +125,12 @@ def startup(args) -> EnsembleData | None:
     # read input and setup conformers
     ensemble.read_input(args.inp)
 
+    # remove duplicates before any calculation is run
+    settings = CensoPart.get_general_settings()
+    if settings["prune"]:
+        ensemble.prune_conformers(settings["prune_rmsd"],
+                                  settings["prune_ethr"])
+
     # END of setup
     # -> ensemble.conformers contains all conformers with their info from input (sorted by CREST energy if possible)
 
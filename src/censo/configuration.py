@@ -1,5 +1,7 @@
 import os
+import re
 import shutil
+import subprocess
 import configparser
 from argparse import Namespace
 
@@ -95,6 +97,9 @@ def configure(rcpath: str = None, create_new: bool = False):
         # Update the paths for the processors
         QmProc._paths.update(paths)
 
+        # The xtb version is not part of the rcfile, since it changes with every update of xtb
+        QmProc._paths["xtbversion"] = find_xtb_version(QmProc._paths["xtbpath"])
+
     # create user assets folder if it does not exist
     if not os.path.isdir(USER_ASSETS_PATH):
         os.mkdir(USER_ASSETS_PATH)
@@ -243,6 +248,31 @@ def find_program_paths() -> dict[str, str]:
     return paths
 
 
+def find_xtb_version(xtbpath: str) -> str:
+    """
+    Try to determine the version of xtb by calling 'xtb --version'.
+
+    Args:
+        xtbpath (str): path to the xtb binary
+
+    Returns:
+        str: the version (e.g. '6.6.1'), empty if it could not be determined
+    """
+    if xtbpath == "":
+        return ""
+
+    try:
+        sub = subprocess.run([xtbpath, "--version"],
+                             capture_output=True,
+                             text=True,
+                             timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+    match = re.search(r"xtb version (\S+)", sub.stdout)
+    return match.group(1) if match is not None else ""
+
+
 def find_rcfile() -> str | None:
     """
     check for existing .censorc2 in $home dir
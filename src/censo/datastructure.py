@@ -1,7 +1,8 @@
-from functools import reduce
 from collections import OrderedDict
 from typing import TypedDict
 
+import numpy as np
+
 from .params import BOHR2ANG, OMPMIN
 
 
@@ -10,6 +11,24 @@ class Atom(TypedDict):
     xyz: list[float]
 
 
+# element arrays shared between all geometries with the same sequence of elements (e.g. all conformers of an
+# ensemble), the arrays are read-only so that they can be shared safely
+_element_arrays: dict[tuple[str, ...], np.ndarray] = {}
+
+
+def intern_elements(elements: list[str]) -> np.ndarray:
+    """
+    Returns a shared, read-only array for the given sequence of elements.
+    """
+    key = tuple(elements)
+    try:
+        return _element_arrays[key]
+    except KeyError:
+        array = np.array(key, dtype="U3")
+        array.flags.writeable = False
+        return _element_arrays.setdefault(key, array)
+
+
 class GeometryData:
     """
     Geometry contains geometry information as well as identifier to match it to a MoleculeData object
@@ -24,44 +43,82 @@ class GeometryData:
         # name of the linked MoleculeData
         self.name: str = name
 
-        # list of dicts preserving the order of the input file for easy mapping
-        # the coordinates should be given in Angstrom
-        # self.xyz = [{"element": "H", "xyz": [0.0, 0.0, 0.0]}, {"element": "C", "xyz": [0.0, 0.0 0.7]}, ...]
-        self.xyz: list[Atom] = []
-
-        # set up xyz dict from the input lines
+        # the coordinates are stored as (nat, 3) array in Angstrom, the elements as shared array in the same order
+        # (the 'xyz' property provides the list of dicts view, e.g.
+        # [{"element": "H", "xyz": [0.0, 0.0, 0.0]}, {"element": "C", "xyz": [0.0, 0.0 0.7]}, ...])
+        elements = []
+        coords = []
         for line in xyz:
-            spl = [s.strip() for s in line.split()]
-            element = spl[0].capitalize()
-            self.xyz.append({
-                "element": element,
-                "xyz": [float(i) for i in spl[1:]]
-            })
+            spl = line.split()
+            elements.append(spl[0].capitalize())
+            coords.append([float(i) for i in spl[1:4]])
 
-        # Count atoms
-        self.nat: int = len(self.xyz)
+        self.elements: np.ndarray = intern_elements(elements)
+        self.coords: np.ndarray = np.array(coords, dtype=np.float64).reshape(
+            -1, 3)
+
+    @classmethod
+    def fromarrays(cls, name: str, elements: np.ndarray,
+                   coords: np.ndarray) -> "GeometryData":
+        """
+        Sets up a geometry directly from an (interned) element array and a (nat, 3) coordinate array (e.g. views into
+        a memory-mapped binary ensemble), without copying them.
+        """
+        geom = cls(name, [])
+        geom.elements = elements
+        geom.coords = coords
+        return geom
+
+    def __getstate__(self) -> dict:
+        # the elements are pickled as a single string, since the array is shared anyway
+        state = self.__dict__.copy()
+        state["elements"] = " ".join(self.elements.tolist())
+        return state
+
+    def __setstate__(self, state: dict):
+        state["elements"] = intern_elements(state["elements"].split())
+        self.__dict__.update(state)
+
+    @property
+    def nat(self) -> int:
+        """
+        Number of atoms.
+        """
+        return len(self.elements)
+
+    @property
+    def xyz(self) -> list[Atom]:
+        """
+        Compatibility view of the geometry as a list of dicts preserving the order of the input file.
+        Note that modifying the returned list does not change the geometry, assign a new list instead.
+        """
+        return [{
+            "element": element,
+            "xyz": coords
+        } for element, coords in zip(self.elements.tolist(),
+                                     self.coords.tolist())]
+
+    @xyz.setter
+    def xyz(self, xyz: list[Atom]):
+        self.elements = intern_elements([atom["element"] for atom in xyz])
+        self.coords = np.array([atom["xyz"] for atom in xyz],
+                               dtype=np.float64).reshape(-1, 3)
 
     def toorca(self) -> list:
         """
         method to convert the internal cartesian coordinates to a data format usable by the OrcaParser
         """
-        coord = []
-        for atom in self.xyz:
-            coord.append([atom["element"]] + atom["xyz"])
-
-        return coord
+        return [[element] + coords for element, coords in zip(
+            self.elements.tolist(), self.coords.tolist())]
 
     def tocoord(self) -> list[str]:
         """
-        method to convert the internal cartesian coordinates (self.xyz) to coord file format (for tm or xtb)
+        method to convert the internal cartesian coordinates to coord file format (for tm or xtb)
         """
         coord = ["$coord\n"]
-        for atom in self.xyz:
-            coord.append(
-                reduce(
-                    lambda x, y: f"{x} {y}",
-                    list(map(lambda x: float(x) / BOHR2ANG, atom["xyz"])) +
-                    [f"{atom['element']}\n"]))
+        for element, (x, y, z) in zip(self.elements.tolist(),
+                                      (self.coords / BOHR2ANG).tolist()):
+            coord.append(f"{x} {y} {z} {element}\n")
 
         coord.append("$end\n")
 
@@ -69,48 +126,54 @@ class GeometryData:
 
     def fromcoord(self, path: str) -> None:
         """
-        method to convert the content of a coord file to cartesian coordinates for the 'xyz' attribute
+        method to convert the content of a coord file to cartesian coordinates
         """
         with open(path, "r") as file:
             lines = file.readlines()
 
-        self.xyz = []
+        elements = []
+        coords = []
         for line in lines:
             if not line.startswith("$"):
-                coords = line.split()
-                element = coords[-1]
-                cartesian_coords = [float(x) * BOHR2ANG for x in coords[:-1]]
-                self.xyz.append({"element": element, "xyz": cartesian_coords})
+                split = line.split()
+                elements.append(split[-1])
+                coords.append([float(x) for x in split[:-1]])
             elif line.startswith("$end"):
                 break
 
+        self.elements = intern_elements(elements)
+        self.coords = np.array(coords, dtype=np.float64).reshape(-1,
+                                                                 3) * BOHR2ANG
+
     def fromxyz(self, path: str) -> None:
         """
-        Method to convert the content of an xyz file to cartesian coordinates for the 'xyz' attribute
+        Method to convert the content of an xyz file to cartesian coordinates
         """
         with open(path, "r") as file:
             lines = file.readlines()
 
-        self.xyz = []
+        elements = []
+        coords = []
         # Just skip the first two lines
         for line in lines[2:]:
             split = line.split()
-            element = split[0]
-            coords = [float(x) for x in split[1:]]
-            self.xyz.append({"element": element, "xyz": coords})
+            elements.append(split[0])
+            coords.append([float(x) for x in split[1:]])
+
+        self.elements = intern_elements(elements)
+        self.coords = np.array(coords, dtype=np.float64).reshape(-1, 3)
 
     def toxyz(self) -> list[str]:
         """
-        method to convert self.xyz to xyz-file format
+        method to convert the geometry to xyz-file format
         """
         lines = [
             f"{self.nat}\n",
             f"{self.name}\n",
         ]
-        for atom in self.xyz:
-            lines.append(
-                f"{atom['element']} {atom['xyz'][0]:.10f} {atom['xyz'][1]:.10f} {atom['xyz'][2]:.10f}\n"
-            )
+        lines.extend(f"{element} {x:.10f} {y:.10f} {z:.10f}\n"
+                     for element, (x, y, z) in zip(self.elements.tolist(),
+                                                   self.coords.tolist()))
 
         return lines
 
@@ -129,7 +192,9 @@ class MoleculeData:
         self.name: str = name
 
         # stores the geometry info to have a small object to be used for multiprocessing
-        self.geom: GeometryData = GeometryData(self.name, xyz)
+        # (the input lines are only parsed when the geometry is accessed for the first time)
+        self.__xyz_lines: list[str] | None = xyz
+        self.__geom: GeometryData | None = None
 
         # stores the degeneration factor of the conformer
         self.degen: int = 1
@@ -158,6 +223,21 @@ class MoleculeData:
         #    to get the single-point energy: self.results["prescreening"]["sp"]["energy"]
         #    (confer to the results for each jobtype)
 
+    @property
+    def geom(self) -> GeometryData:
+        """
+        Returns the geometry, setting it up from the input lines if necessary.
+        """
+        if self.__geom is None:
+            self.__geom = GeometryData(self.name, self.__xyz_lines)
+            self.__xyz_lines = None
+        return self.__geom
+
+    @geom.setter
+    def geom(self, geom: GeometryData):
+        self.__geom = geom
+        self.__xyz_lines = None
+
 
 class ParallelJob:
 
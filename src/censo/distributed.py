@@ -0,0 +1,330 @@
+"""
+Distributed execution of ParallelJobs on several nodes sharing a filesystem.
+The main process runs a small TCP job server (based on multiprocessing.managers), worker agents are launched on every
+host (as local subprocesses or via ssh) and connect back to it. Each agent runs the jobs assigned to it in a local
+process pool.
+
+Worker agents can also be started manually:
+    python -m censo.distributed --address <server>:<port> --name <name> --cores <cores>
+in which case the authkey (hex) has to be given via stdin.
+"""
+import argparse
+import collections
+import os
+import pickle
+import queue
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from multiprocessing.managers import BaseManager
+
+from .logging import setup_logger
+from .qm_processor import QmProc
+
+logger = setup_logger(__name__)
+
+# hostnames for which the agents are started as local subprocesses
+LOCALHOSTS = ["localhost", "127.0.0.1", socket.gethostname()]
+
+# queues living in the server process, one per agent and one for the results
+_queues: dict[str, queue.Queue] = {}
+
+
+def _get_queue(name: str) -> queue.Queue:
+    return _queues.setdefault(name, queue.Queue())
+
+
+class JobManager(BaseManager):
+    pass
+
+
+JobManager.register("get_queue", callable=_get_queue)
+
+
+class DistributedExecutor(Executor):
+    """
+    Executor that distributes jobs over worker agents on several hosts. Every agent provides a fixed number of cores
+    and only receives jobs as long as their omp values fit into its free cores, jobs that do not fit anywhere are
+    kept in a pending queue until another job finishes.
+    """
+
+    def __init__(self, hosts: list[str], cores: int):
+        """
+        Starts the job server and launches one worker agent per entry in hosts.
+
+        Args:
+            hosts (list[str]): Hostnames to launch agents on (may contain duplicates, e.g. for testing).
+            cores (int): Number of cores every agent may use.
+        """
+        if len(hosts) == 0:
+            raise ValueError("No hosts given for distributed execution.")
+
+        self.hosts = list(hosts)
+        self.cores = cores
+        self.__authkey = os.urandom(32)
+        self.__manager = JobManager(address=("", 0), authkey=self.__authkey)
+        self.__manager.start()
+        self.__port = self.__manager.address[1]
+        self.__results = self.__manager.get_queue("results")
+
+        self.__lock = threading.Lock()
+        self.__shutdown = False
+        self.__next_id = 0
+        self.__pending = collections.deque()
+        self.__futures: dict[int, Future] = {}
+
+        # free cores, job queue, process and assigned tasks for each agent
+        self.__free: dict[str, int] = {}
+        self.__agent_queues = {}
+        self.__procs: dict[str, subprocess.Popen] = {}
+        self.__assigned: dict[str, dict[int, int]] = {}
+
+        for i, host in enumerate(hosts):
+            self.__launch(f"agent{i}", host)
+
+        self.__collector = threading.Thread(target=self.__collect,
+                                            daemon=True)
+        self.__collector.start()
+
+    def __launch(self, name: str, host: str) -> None:
+        """
+        Launches a worker agent on the given host.
+        """
+        local = host in LOCALHOSTS
+        address = f"{'127.0.0.1' if local else socket.gethostname()}:{self.__port}"
+        cmd = [
+            sys.executable, "-m", "censo.distributed", "--address", address,
+            "--name", name, "--cores",
+            str(self.cores)
+        ]
+        if not local:
+            # the remote shell has to start in the same directory (shared filesystem)
+            cmd = [
+                "ssh", host,
+                f"cd {shlex.quote(os.getcwd())} && {shlex.join(cmd)}"
+            ]
+
+        logger.debug(f"Launching worker agent {name} on {host}.")
+        self.__agent_queues[name] = self.__manager.get_queue(name)
+        self.__free[name] = self.cores
+        self.__assigned[name] = {}
+        self.__procs[name] = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+        # pass the authkey via stdin, so it does not show up in the process list
+        self.__procs[name].stdin.write(self.__authkey.hex().encode() + b"\n")
+        self.__procs[name].stdin.close()
+
+    @property
+    def broken(self) -> bool:
+        """
+        Whether the executor cannot run any jobs anymore (shut down or all agents died).
+        """
+        with self.__lock:
+            return self.__shutdown or len(self.__free) == 0
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        """
+        Schedules fn(*args, **kwargs) to be run on one of the agents. The number of cores needed is taken from the
+        omp attribute of the first argument (i.e. the ParallelJob).
+        """
+        if self.__shutdown:
+            raise RuntimeError("Cannot submit after shutdown.")
+
+        omp = getattr(args[0], "omp", 1) if len(args) > 0 else 1
+        if omp > self.cores:
+            raise ValueError(
+                f"Job requires {omp} cores, but every agent only has {self.cores}."
+            )
+
+        future = Future()
+
+        # the task is only unpickled in the process running it, so that errors are reported for the task
+        # instead of killing the agent
+        # (the program paths are class attributes and have to be shipped explicitly)
+        try:
+            data = pickle.dumps((fn, args, kwargs, dict(QmProc._paths)))
+        except Exception as e:
+            future.set_exception(e)
+            return future
+
+        with self.__lock:
+            task_id = self.__next_id
+            self.__next_id += 1
+            self.__futures[task_id] = future
+            self.__pending.append((task_id, omp, data))
+            self.__dispatch()
+
+        return future
+
+    def __dispatch(self) -> None:
+        """
+        Sends pending tasks to the agents with the most free cores. Has to be called with the lock acquired.
+        """
+        for _ in range(len(self.__pending)):
+            task_id, omp, data = self.__pending.popleft()
+            agent = max(self.__free, key=self.__free.get, default=None)
+            if agent is None or self.__free[agent] < omp:
+                self.__pending.append((task_id, omp, data))
+                continue
+
+            if not self.__futures[task_id].set_running_or_notify_cancel():
+                del self.__futures[task_id]
+                continue
+
+            self.__free[agent] -= omp
+            self.__assigned[agent][task_id] = omp
+            self.__agent_queues[agent].put((task_id, data))
+
+    def __collect(self) -> None:
+        """
+        Collects the results from the agents and resolves the corresponding futures.
+        Also watches the agent processes and fails all tasks of an agent that died.
+        """
+        while True:
+            try:
+                message = self.__results.get(timeout=1)
+            except queue.Empty:
+                self.__check_agents()
+                continue
+            except (EOFError, OSError):
+                break
+
+            if message is None:
+                break
+
+            task_id, result, exception = message
+            with self.__lock:
+                future = self.__futures.pop(task_id)
+                for agent, tasks in self.__assigned.items():
+                    if task_id in tasks:
+                        self.__free[agent] += tasks.pop(task_id)
+                        break
+                self.__dispatch()
+
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+
+    def __check_agents(self) -> None:
+        """
+        Removes agents that exited unexpectedly and fails their tasks.
+        """
+        with self.__lock:
+            for agent, proc in list(self.__procs.items()):
+                if proc.poll() is None or agent not in self.__free:
+                    continue
+
+                logger.warning(
+                    f"Worker agent {agent} exited with code {proc.returncode}."
+                )
+                for task_id in self.__assigned.pop(agent):
+                    self.__futures.pop(task_id).set_exception(
+                        RuntimeError(f"Worker agent {agent} died."))
+                del self.__free[agent]
+
+            # without any agents left, nothing can be run anymore
+            if len(self.__free) == 0:
+                while len(self.__pending) > 0:
+                    task_id = self.__pending.popleft()[0]
+                    self.__futures.pop(task_id).set_exception(
+                        RuntimeError("No worker agents left."))
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        """
+        Stops the agents and the job server.
+        """
+        with self.__lock:
+            if self.__shutdown:
+                return
+            self.__shutdown = True
+
+            if cancel_futures:
+                while len(self.__pending) > 0:
+                    self.__futures.pop(self.__pending.popleft()[0]).cancel()
+
+            futures = list(self.__futures.values())
+
+        if wait:
+            for future in futures:
+                try:
+                    future.exception()
+                except Exception:
+                    pass
+
+        # tell the agents to stop (after finishing their current jobs)
+        for agent in self.__procs:
+            self.__agent_queues[agent].put(None)
+        if wait:
+            for proc in self.__procs.values():
+                proc.wait()
+        else:
+            for proc in self.__procs.values():
+                proc.terminate()
+
+        self.__results.put(None)
+        self.__collector.join()
+        self.__manager.shutdown()
+
+
+def _run_task(task: bytes):
+    fn, args, kwargs, paths = pickle.loads(task)
+    QmProc._paths.update(paths)
+    return fn(*args, **kwargs)
+
+
+def agent(address: tuple[str, int], name: str, cores: int,
+          authkey: bytes) -> None:
+    """
+    Worker agent. Connects to the job server, runs the jobs assigned to it and sends back the results.
+
+    Args:
+        address (tuple[str, int]): Address of the job server.
+        name (str): Name of the agent (given by the server).
+        cores (int): Number of cores available to the agent.
+        authkey (bytes): Authentication key of the job server.
+
+    Returns:
+        None
+    """
+    manager = JobManager(address=address, authkey=authkey)
+    manager.connect()
+    jobs = manager.get_queue(name)
+    results = manager.get_queue("results")
+
+    def report(task_id, future):
+        try:
+            results.put((task_id, future.result(), None))
+        except Exception as e:
+            results.put((task_id, None, e))
+
+    # the server only assigns as many jobs as fit into the cores of the agent
+    with ProcessPoolExecutor(max_workers=cores) as pool:
+        while True:
+            task = jobs.get()
+            if task is None:
+                break
+
+            task_id, data = task
+            pool.submit(_run_task,
+                        data).add_done_callback(lambda f, task_id=task_id:
+                                                report(task_id, f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CENSO worker agent.")
+    parser.add_argument("--address", required=True, help="host:port")
+    parser.add_argument("--name", required=True)
+    parser.add_argument("--cores", type=int, required=True)
+    args = parser.parse_args()
+
+    host, port = args.address.rsplit(":", 1)
+    authkey = bytes.fromhex(sys.stdin.readline().strip())
+    agent((host, int(port)), args.name, args.cores, authkey)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,19 +3,192 @@ stores ensembledata and conformers
 functionality for program setup
 """
 
+import json
+import mmap
 import os
+import struct
+import tempfile
 from argparse import Namespace
-from collections.abc import Callable
-from math import exp
+from collections.abc import Callable, Iterator
+from itertools import islice
 
-from .datastructure import MoleculeData
+import numpy as np
+
+from .datastructure import GeometryData, MoleculeData, intern_elements
 from .logging import setup_logger
-from .params import AU2J, DESCR, DIGILEN, KB
+from .params import AU2J, AU2KCAL, DESCR, DIGILEN, KB
+from .pruning import find_duplicates
 from .utilities import check_for_float, print, t2x
 
 logger = setup_logger(__name__)
 
 
+def read_xyz_blocks(path: str) -> Iterator[tuple[str, list[str]]]:
+    """
+    Generator reading an ensemble file in (multi-)xyz format one conformer block at a time, so that the file never has
+    to be kept in memory as a whole and reading can be stopped early.
+
+    Args:
+        path (str): Path to the ensemble file.
+
+    Yields:
+        tuple[str, list[str]]: The comment line and the geometry lines of each conformer.
+
+    Raises:
+        RuntimeError: If a block is incomplete or its header is malformed.
+    """
+    with open(path, "r") as file:
+        while True:
+            header = file.readline()
+            if header == "":
+                return
+            elif header.strip() == "":
+                # skip empty lines (e.g. at the end of the file)
+                continue
+
+            try:
+                nat = int(header.split()[0])
+            except ValueError as e:
+                raise RuntimeError(
+                    "Could not read ensemble input file.") from e
+
+            comment = file.readline()
+            lines = [file.readline() for _ in range(nat)]
+            if comment == "" or (nat > 0 and lines[-1] == ""):
+                raise RuntimeError("Could not read ensemble input file.")
+
+            yield comment, lines
+
+
+# magic bytes at the beginning of binary ensemble files
+BINARY_MAGIC = b"CENSOENS"
+BINARY_VERSION = 1
+
+
+def _align(pos: int) -> int:
+    # arrays in binary ensemble files start at multiples of 8 bytes
+    return (pos + 7) // 8 * 8
+
+
+def is_binary_ensemble(path: str) -> bool:
+    """
+    Checks whether the given file is a binary ensemble file (see write_binary_ensemble).
+    """
+    with open(path, "rb") as file:
+        return file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def write_binary_ensemble(path: str, conformers: list[MoleculeData]) -> None:
+    """
+    Writes the conformers to a binary ensemble file, which can be loaded without parsing via memory-mapping.
+    Layout (little-endian, all arrays aligned to 8 bytes):
+        magic (8 bytes) | header length (uint64) | JSON header (version, nconf, natoms, names, element table) |
+        element indices (uint16, natoms) | conformer offsets (int64, nconf + 1) | xtb energies (float64, nconf) |
+        coordinates in Angstrom (float64, natoms x 3)
+
+    Args:
+        path (str): Path of the binary ensemble file.
+        conformers (list[MoleculeData]): Conformers to write.
+
+    Returns:
+        None
+    """
+    table, indices = np.unique(np.concatenate(
+        [conf.geom.elements for conf in conformers]),
+                               return_inverse=True)
+    offsets = np.zeros(len(conformers) + 1, dtype="<i8")
+    offsets[1:] = np.cumsum([conf.geom.nat for conf in conformers])
+    energies = np.array([conf.xtb_energy or 0.0 for conf in conformers],
+                        dtype="<f8")
+    coords = np.concatenate([conf.geom.coords for conf in conformers])
+
+    header = json.dumps({
+        "version": BINARY_VERSION,
+        "nconf": len(conformers),
+        "natoms": int(offsets[-1]),
+        "names": [conf.name for conf in conformers],
+        "elements": table.tolist(),
+    }).encode()
+
+    # write atomically, so that a crash never leaves a partial file behind
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(fd, "wb") as file:
+        file.write(BINARY_MAGIC + struct.pack("<Q", len(header)) + header)
+        for array in [
+                indices.astype("<u2"), offsets, energies,
+                coords.astype("<f8")
+        ]:
+            file.write(b"\0" * (_align(file.tell()) - file.tell()))
+            file.write(array.tobytes())
+    os.replace(tmp, path)
+
+
+def read_binary_ensemble(path: str,
+                         nconf: int = None) -> list[MoleculeData]:
+    """
+    Loads conformers from a binary ensemble file via memory-mapping. The coordinates of the conformers are read-only
+    views into the mapped file, so only the pages of conformers that are actually used are read.
+
+    Args:
+        path (str): Path of the binary ensemble file.
+        nconf (int, optional): Maximum number of conformers to load. Defaults to None (all).
+
+    Returns:
+        list[MoleculeData]: The conformers in the order of the file.
+
+    Raises:
+        RuntimeError: If the file is not a binary ensemble file of a supported version.
+    """
+    with open(path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+        raise RuntimeError(f"{path} is not a binary ensemble file.")
+
+    pos = len(BINARY_MAGIC)
+    (length, ) = struct.unpack_from("<Q", buffer, pos)
+    pos += 8
+    header = json.loads(buffer[pos:pos + length])
+    if header["version"] != BINARY_VERSION:
+        raise RuntimeError(
+            f"Unsupported version {header['version']} of binary ensemble file {path}."
+        )
+    pos += length
+
+    arrays = []
+    for dtype, count in [
+        ("<u2", header["natoms"]),
+        ("<i8", header["nconf"] + 1),
+        ("<f8", header["nconf"]),
+        ("<f8", header["natoms"] * 3),
+    ]:
+        pos = _align(pos)
+        arrays.append(np.frombuffer(buffer, dtype, count, pos))
+        pos += arrays[-1].nbytes
+    indices, offsets, energies, coords = arrays
+    coords = coords.reshape(-1, 3)
+    table = header["elements"]
+
+    conformers = []
+    elements = {}
+    for i in range(min(header["nconf"], nconf or header["nconf"])):
+        start, end = offsets[i], offsets[i + 1]
+
+        # the element arrays are shared between all conformers with the same sequence of elements
+        key = indices[start:end].tobytes()
+        if key not in elements:
+            elements[key] = intern_elements(
+                [table[j] for j in indices[start:end].tolist()])
+
+        conf = MoleculeData(header["names"][i], [])
+        conf.geom = GeometryData.fromarrays(conf.name, elements[key],
+                                            coords[start:end])
+        conf.xtb_energy = float(energies[i])
+        conformers.append(conf)
+
+    return conformers
+
+
 class EnsembleData:
     """ """
 
@@ -98,13 +271,20 @@ class EnsembleData:
         self.ensemble_path = ensemble_path
 
         # If $coord in file => tm format, needs to be converted to xyz
-        with open(self.ensemble_path, "r") as inp:
-            lines = inp.readlines()
-            if any("$coord" in line for line in lines):
+        # (only the first line is checked, so that large ensembles are not read completely)
+        # binary ensembles (see write_binary_ensemble) are memory-mapped instead of parsed
+        if is_binary_ensemble(self.ensemble_path):
+            self.runinfo["nat"] = None
+        else:
+            with open(self.ensemble_path, "r") as inp:
+                first = inp.readline()
+            if "$coord" in first:
                 _, self.runinfo["nat"], self.ensemble_path = t2x(
-                    self.ensemble_path, writexyz=True, outfile="converted.xyz")
+                    self.ensemble_path,
+                    writexyz=True,
+                    outfile="converted.xyz")
             else:
-                self.runinfo["nat"] = int(lines[0].split()[0])
+                self.runinfo["nat"] = int(first.split()[0])
 
         # Set charge and unpaired via funtion args or cml args
         if self.args is not None:
@@ -119,6 +299,8 @@ class EnsembleData:
                 "Charge or number of unpaired electrons not defined.")
 
         self.setup_conformers(nconf)
+        if self.runinfo["nat"] is None:
+            self.runinfo["nat"] = self.conformers[0].geom.nat
 
         # Print information about read ensemble
         print(f"Read {len(self.conformers)} conformers.\n",
@@ -132,9 +314,8 @@ class EnsembleData:
 
     def setup_conformers(self, maxconf: int) -> None:
         """
-        open ensemble input
-        split into conformers
-        create MoleculeData objects out of coord input
+        read the ensemble input conformer by conformer (stopping after nconf conformers)
+        create MoleculeData objects out of coord input (the geometries are only parsed when they are needed)
         read out energy from xyz file if possible
 
         Args: 
@@ -143,59 +324,44 @@ class EnsembleData:
         Returns:
             None
         """
-        # open ensemble input
-        with open(self.ensemble_path, "r") as file:
-            lines = file.readlines()
-            nat = self.runinfo["nat"]
-
-            # check for correct line count in input
-            # assuming consecutive xyz-file format (every conf therefore needs nat + 2 lines)
-            if len(lines) % (nat + 2) != 0:
-                # check if the last lines contain any alphanumeric characters
-                divisor = len(lines) // (nat + 2)
-                if any([line.isalnum() for line in lines[divisor:]]):
-                    raise RuntimeError("Could not read ensemble input file.")
-                else:
-                    # if not you can trim the last lines
-                    lines = lines[divisor:]
-
-            if self.args is not None and self.args.nconf is not None:
-                nconf = int(len(lines) / (nat + 2))
-                if self.args.nconf > nconf:
-                    global logger
-                    logger.warning(
-                        f"Provided nconf is larger than number of conformers in input file. Setting to "
-                        f"the max. amount automatically.")
-                else:
-                    nconf = self.args.nconf
-            else:
-                nconf = maxconf or int(len(lines) / (nat + 2))
-
-            self.runinfo["nconf"] = nconf
+        # the number of conformers from the command line has precedence
+        if self.args is not None and self.args.nconf is not None:
+            nconf = self.args.nconf
+        else:
+            nconf = maxconf
 
-            # get precalculated energies if possible
-            for i in range(nconf):
-                # Don't use the property here since the conformer list is expected to be empty, otherwise assertion
-                # would fail
+        # binary ensembles already contain the names and energies
+        if is_binary_ensemble(self.ensemble_path):
+            self.__conformers.extend(
+                read_binary_ensemble(self.ensemble_path, nconf))
+        else:
+            for i, (comment, lines) in enumerate(
+                    islice(read_xyz_blocks(self.ensemble_path), nconf)):
                 # Check whether the names are stored in the ensemble file,
                 # use those if possible because of crest rotamer files
-                if "CONF" not in lines[1 + i * (nat + 2)]:
+                if "CONF" not in comment:
                     confname = f"CONF{i + 1}"
                 else:
-                    confname = next(s
-                                    for s in lines[1 + i * (nat + 2)].split()
+                    confname = next(s for s in comment.split()
                                     if "CONF" in s)
 
-                self.__conformers.append(
-                    MoleculeData(confname,
-                                 lines[2 + i * (nat + 2):(i + 1) * (nat + 2)]))
+                # Don't use the property here since the conformer list is expected to be empty, otherwise assertion
+                # would fail
+                self.__conformers.append(MoleculeData(confname, lines))
 
                 # precalculated energy set to 0.0 if it cannot be found
-                self.conformers[i].xtb_energy = check_for_float(
-                    lines[1 + i * (nat + 2)]) or 0.0
+                self.__conformers[-1].xtb_energy = check_for_float(
+                    comment) or 0.0
 
-            # also works if xtb_energy is None for some reason (None is put first)
-            self.conformers.sort(key=lambda x: x.xtb_energy)
+        if nconf is not None and len(self.__conformers) < nconf:
+            logger.warning(
+                f"Provided nconf is larger than number of conformers in input file. Setting to "
+                f"the max. amount automatically.")
+
+        self.runinfo["nconf"] = len(self.__conformers)
+
+        # also works if xtb_energy is None for some reason (None is put first)
+        self.conformers.sort(key=lambda x: x.xtb_energy)
 
     def update_conformers(
         self,
@@ -205,61 +371,101 @@ class EnsembleData:
         boltzmann: bool = False,
     ) -> list[str]:
         """
-        Update the conformers based on a target function, a threshold, and an additional filter.
-        Logic for the additional filter is "and".
+        Update the conformers based on a target function and a threshold.
+        NOTE: the additional filter is currently ignored, only the threshold decides which conformers are removed.
         Returns a list of the names of the removed conformers.
 
         Args:
             target (Callable[[MoleculeData], float]): A function that takes a MoleculeData object as input and returns a
             float.
             threshold (float): The threshold value.
-            additional_filter (Callable[[MoleculeData], bool], optional): An optional function that takes a MoleculeData
-            object as input and returns a boolean. Defaults to None.
+            additional_filter (Callable[[MoleculeData], bool], optional): Currently not applied. Defaults to None.
             boltzmann (bool, optional): If True, the threshold is interpreted as a population threshold.
 
         Returns:
-            None
+            list[str]: Names of the removed conformers.
         """
-        if not boltzmann:
-            # pick the free enthalpy of the lowest conformer
-            limit = min([target(conf) for conf in self.conformers])
+        # evaluate the target only once per conformer
+        values = np.array([target(conf) for conf in self.conformers],
+                          dtype=np.float64)
 
-            # filter out all conformers above threshold
+        if not boltzmann:
+            # filter out all conformers above threshold (relative to the lowest conformer)
             # so that 'filtered' contains all conformers that should not be considered any further
-            filtered = [
-                conf for conf in filter(
-                    (additional_filter or True) and (
-                        lambda x: target(x) - limit > threshold),
-                    self.conformers,
-                )
-            ]
+            # (additional_filter is not applied, applying it would change which conformers are kept in the macrocycles
+            # of the optimization)
+            mask = values - values.min() > threshold
+            filtered = [self.conformers[i] for i in np.flatnonzero(mask)]
         elif boltzmann and 0.0 <= threshold <= 1.0:
-            # Sort and iterate through the conformers by target (should be the Boltzmann population) in reverse order
+            # Sort the conformers by target (should be the Boltzmann population) in reverse order
             # Therefore, the conformer with the highest population is first
-            s = 0.0
-            filtered = []
-            for conf in sorted(self.conformers, key=target, reverse=True):
-                if s > threshold:
-                    # The conformer is above the population threshold and should be removed
-                    filtered.append(conf)
-                else:
-                    # The population of the conformer is appended
-                    s += target(conf)
+            # A conformer is removed as soon as the summed up population of the conformers before it is above
+            # the threshold
+            order = np.argsort(-values, kind="stable")
+            before = np.cumsum(values[order]) - values[order]
+            filtered = [
+                self.conformers[i] for i in order[before > threshold]
+            ]
         else:
             raise RuntimeError(
                 "Invalid filter settings for updating conformer list.")
 
-        # move the sorted out conformers to rem list
-        for conf in filtered:
-            # pop item from conformers and insert this item at index 0 in rem
-            self.rem.insert(0,
-                            self.conformers.pop(self.conformers.index(conf)))
-
-            # Log removed conformers
-            logger.debug(f"Removed {conf.name}.")
+        self.__remove(filtered)
 
         return [conf.name for conf in filtered]
 
+    def prune_conformers(self, rmsd_threshold: float,
+                         energy_threshold: float) -> list[str]:
+        """
+        Removes duplicate conformers (e.g. rotamers) before any calculation is run. Two conformers are duplicates if
+        the RMSD of their heavy atoms after alignment is below rmsd_threshold and their xtb energies differ by at most
+        energy_threshold. Every duplicate is folded into the degeneracy of the lowest-energy conformer it duplicates.
+        NOTE: permutations of heavy atoms are not considered.
+
+        Args:
+            rmsd_threshold (float): RMSD threshold in Angstrom.
+            energy_threshold (float): Energy threshold in kcal/mol.
+
+        Returns:
+            list[str]: Names of the removed conformers.
+        """
+        elements = self.conformers[0].geom.elements
+        if any(conf.geom.elements is not elements
+               and not np.array_equal(conf.geom.elements, elements)
+               for conf in self.conformers):
+            logger.warning(
+                "The conformers do not share the same order of atoms, skipping the pruning of duplicates.")
+            return []
+
+        # use all atoms if there are no heavy atoms (e.g. H2)
+        heavy = elements != "H"
+        if not heavy.any():
+            heavy[:] = True
+
+        leader = find_duplicates(
+            np.stack([conf.geom.coords[heavy] for conf in self.conformers]),
+            np.array([conf.xtb_energy or 0.0 for conf in self.conformers],
+                     dtype=np.float64), rmsd_threshold,
+            energy_threshold / AU2KCAL)
+
+        duplicates = []
+        for i, j in enumerate(leader.tolist()):
+            if i != j:
+                self.conformers[j].degen += self.conformers[i].degen
+                duplicates.append(self.conformers[i])
+                logger.debug(
+                    f"{self.conformers[i].name} is a duplicate of {self.conformers[j].name}."
+                )
+
+        self.__remove(duplicates)
+        self.runinfo["nconf"] = len(self.conformers)
+
+        print(
+            f"Removed {len(duplicates)} duplicate conformers (heavy atom RMSD < {rmsd_threshold} Angstrom, "
+            f"energy difference <= {energy_threshold} kcal/mol).\n")
+
+        return [conf.name for conf in duplicates]
+
     def remove_conformers(self, confnames: list[str]) -> None:
         """
         Remove the conformers with the names listed in 'confnames' from further consideration.
@@ -272,19 +478,30 @@ class EnsembleData:
             None
         """
         if len(confnames) > 0:
-            for confname in confnames:
-                remove = next(c for c in self.conformers if c.name == confname)
+            byname = {conf.name: conf for conf in self.conformers}
+            self.__remove([byname[confname] for confname in confnames])
 
-                # pop item from conformers and insert this item at index 0 in rem
-                self.rem.insert(
-                    0, self.conformers.pop(self.conformers.index(remove)))
+    def __remove(self, confs: list[MoleculeData]) -> None:
+        """
+        Moves the given conformers from the conformers list to the front of the rem list (in reverse order, most
+        recently removed first) in a single pass.
+        """
+        if len(confs) == 0:
+            return
+
+        removed = {id(conf) for conf in confs}
+        self.__conformers[:] = [
+            conf for conf in self.__conformers if id(conf) not in removed
+        ]
+        self.rem[:0] = reversed(confs)
 
-                # Log removed conformers
-                logger.debug(f"Removed {remove.name}.")
+        # Log removed conformers
+        for conf in confs:
+            logger.debug(f"Removed {conf.name}.")
 
     def dump_ensemble(self, part: str) -> None:
         """
-        dump the conformers to a file
+        dump the conformers to a file (also as binary ensemble file for fast reloading)
         """
         with open(
                 os.path.join(f"{self.workdir}", f"censo_ensemble_{part}.xyz"),
@@ -292,6 +509,10 @@ class EnsembleData:
             for conf in self.conformers:
                 file.writelines(conf.geom.toxyz())
 
+        write_binary_ensemble(
+            os.path.join(f"{self.workdir}", f"censo_ensemble_{part}.bin"),
+            self.conformers)
+
     def calc_boltzmannweights(self, temp: float, part: str) -> None:
         """
         Calculate populations for boltzmann distribution of ensemble at given temperature and part name to search 
@@ -304,52 +525,41 @@ class EnsembleData:
         Returns:
             None
         """
-        # find lowest gtot value
+        # collect the free enthalpies (or energies as fallback)
         if all(
             ["gtot" in conf.results[part].keys() for conf in self.conformers]):
-            minfree: float = min(
-                [conf.results[part]["gtot"] for conf in self.conformers])
-
-            # calculate boltzmann factors
-            bmfactors = {
-                conf.name:
-                conf.degen *
-                exp(-(conf.results[part]["gtot"] - minfree) * AU2J /
-                    (KB * temp))
-                for conf in self.conformers
-            }
+            energies = np.array(
+                [conf.results[part]["gtot"] for conf in self.conformers],
+                dtype=np.float64)
         else:
             # NOTE: if anything went wrong in the single-point calculation ("success": False),
             # this should be handled before coming to this step
             # since then the energy might be 'None'
-            gtot_replacement = False
+            energies = None
             for jt in ["xtb_opt", "sp"]:
                 if all(jt in conf.results[part].keys()
                        for conf in self.conformers):
-                    minfree: float = min([
+                    energies = np.array([
                         conf.results[part][jt]["energy"]
                         for conf in self.conformers
-                    ])
-
-                    # calculate boltzmann factors
-                    bmfactors = {
-                        conf.name:
-                        conf.degen *
-                        exp(-(conf.results[part][jt]["energy"] - minfree) *
-                            AU2J / (KB * temp))
-                        for conf in self.conformers
-                    }
-                    gtot_replacement = True
+                    ],
+                                        dtype=np.float64)
                     break
 
-            if not gtot_replacement:
+            if energies is None:
                 raise RuntimeError(
                     f"Could not determine Boltzmann factors for {part}.")
 
-        # calculate partition function from boltzmann factors
-        bsum: float = sum(bmfactors.values())
+        # calculate the logarithms of the boltzmann factors and normalize them via log-sum-exp,
+        # so that the exponentials can neither overflow nor underflow all at once
+        degens = np.array([conf.degen for conf in self.conformers],
+                          dtype=np.float64)
+        logfactors = np.log(degens) - energies * AU2J / (KB * temp)
+        logfactors -= logfactors.max()
+        bmws = np.exp(logfactors)
+        bmws /= bmws.sum()
 
         # Store Boltzmann populations in results and also in a special list for convenience
-        for conf in self.conformers:
-            conf.results[part]["bmw"] = bmfactors[conf.name] / bsum
-            conf.bmws.append(bmfactors[conf.name] / bsum)
+        for conf, bmw in zip(self.conformers, bmws.tolist()):
+            conf.results[part]["bmw"] = bmw
+            conf.bmws.append(bmw)
@@ -187,24 +187,17 @@ class EnsembleOptimizer(CensoPart):
 
         units.extend(["[kcal/mol]" for _ in range(len(parts))])
 
-        # variables for printmap
-        gtotmin = {part: 0.0 for part in parts}
-        for part in parts:
-            gtotmin[part] = min(conf.results[part]["gtot"]
-                                for conf in self.ensemble.conformers)
-
-        # determines what to print for each conformer in each column
-        printmap = {
-            "CONF#": lambda conf: conf.name,
+        # lowest free enthalpy of every part (only gtot is needed, so it is read directly from the results)
+        gtotmin = {
+            part: min(conf.results[part]["gtot"]
+                      for conf in self.ensemble.conformers)
+            for part in parts
         }
-        for header, part in zip(headers[1:], parts):
-            # Same lambda bullshittery as in parallel.py/dqp, python needs the lambda kwargs or it will
-            # use the same values for every lambda call
-            printmap[
-                header] = lambda conf, partl=part, headerl=header: f"{(conf.results[partl]['gtot'] - gtotmin[partl]) * AU2KCAL:.2f}"
-
-        rows = [[printmap[header](conf) for header in headers]
-                for conf in self.ensemble.conformers]
+
+        rows = [[conf.name] + [
+            f"{(conf.results[part]['gtot'] - gtotmin[part]) * AU2KCAL:.2f}"
+            for part in parts
+        ] for conf in self.ensemble.conformers]
 
         lines = format_data(headers, rows, units=units)
 
@@ -0,0 +1,148 @@
+"""
+Append-only journal of successfully finished jobs, used to resume interrupted runs.
+"""
+import glob
+import os
+import pickle
+
+from .cache import ResultCache
+from .datastructure import ParallelJob
+from .logging import setup_logger
+from .qm_processor import QmProc
+
+logger = setup_logger(__name__)
+
+JOURNAL = "journal.pkl"
+
+
+class Journal:
+    """
+    Journal storing every successfully finished ParallelJob together with a fingerprint of its inputs.
+    Records are appended as consecutive pickles to a single file, so that a crash can only ever damage the last record.
+    Failed jobs are not recorded, so they are run again when resuming.
+    Every part keeps its own journal, which lives until the whole CENSO run is complete (see remove_journals).
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Path to the journal file.
+        """
+        self.path: str = path
+
+        # maps the conformer names of the current batch to the fingerprints of their jobs
+        self.keys: dict[str, str] = {}
+
+    def fingerprint(self, jobs: list[ParallelJob], processor: QmProc) -> None:
+        """
+        Computes the fingerprints for a batch of jobs. This has to be done before running the jobs, since the
+        processor might modify them (e.g. the geometry in case of optimizations).
+        The fingerprint consists of the cache keys of all jobtypes, so it changes with the geometry, the settings and
+        the program versions.
+
+        Args:
+            jobs (list[ParallelJob]): The prepared jobs.
+            processor (QmProc): The processor that is going to run the jobs.
+
+        Returns:
+            None
+        """
+        self.keys = {
+            job.conf.name:
+            ResultCache.make_key(
+                job.conf.name,
+                [processor._cache_key(job, jt) for jt in job.jobtype])
+            for job in jobs
+        }
+
+    def load(self) -> dict[str, ParallelJob]:
+        """
+        Reads all valid records from the journal. If the journal ends with a damaged record, the file is truncated
+        after the last valid record.
+
+        Returns:
+            dict[str, ParallelJob]: Finished jobs mapped by their fingerprint (the most recent record wins).
+        """
+        finished = {}
+        if not os.path.isfile(self.path):
+            return finished
+
+        with open(self.path, "r+b") as f:
+            while True:
+                offset = f.tell()
+                try:
+                    key, job = pickle.load(f)
+                except EOFError:
+                    break
+                except (pickle.UnpicklingError, AttributeError, ValueError,
+                        TypeError):
+                    logger.warning(
+                        f"Journal {self.path} is damaged after {len(finished)} records. Discarding the rest."
+                    )
+                    f.truncate(offset)
+                    break
+                finished[key] = job
+
+        return finished
+
+    def restore(self, jobs: list[ParallelJob]) -> list[ParallelJob]:
+        """
+        Copies the results of already finished jobs from the journal into the given jobs.
+
+        Args:
+            jobs (list[ParallelJob]): The prepared jobs (fingerprint has to be called before).
+
+        Returns:
+            list[ParallelJob]: The jobs that still need to be run.
+        """
+        finished = self.load()
+
+        todo = []
+        for job in jobs:
+            done = finished.get(self.keys[job.conf.name], None)
+            if done is not None:
+                job.results = done.results
+                job.meta = done.meta
+                job.flags = done.flags
+            else:
+                todo.append(job)
+
+        if len(todo) < len(jobs):
+            logger.info(
+                f"Restored {len(jobs) - len(todo)} finished jobs from {self.path}."
+            )
+
+        return todo
+
+    def record(self, job: ParallelJob) -> None:
+        """
+        Appends a finished job to the journal if all of its jobtypes were successful.
+
+        Args:
+            job (ParallelJob): The finished job.
+
+        Returns:
+            None
+        """
+        if not all(
+                job.meta.get(jt, {}).get("success", False)
+                for jt in job.jobtype):
+            return
+
+        with open(self.path, "ab") as f:
+            pickle.dump((self.keys[job.conf.name], job), f)
+
+
+def remove_journals(workdir: str) -> None:
+    """
+    Removes the journals of all parts in the working directory. The journals of completed parts are kept until the
+    whole run is complete, so that a run restarted after a crash in a later part does not repeat the earlier parts.
+
+    Args:
+        workdir (str): Working directory of the run.
+
+    Returns:
+        None
+    """
+    for path in glob.glob(os.path.join(workdir, "*", JOURNAL)):
+        os.remove(path)
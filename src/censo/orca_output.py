@@ -0,0 +1,161 @@
+"""
+Parsing of ORCA output files in a single pass.
+"""
+import os
+
+from .logging import setup_logger
+from .params import CODING
+
+logger = setup_logger(__name__)
+
+# Dict mapping specific messages from the output to error messages
+# TODO - this should be extended later
+OUT_TO_ERR = {
+    "SCF NOT CONVERGED": "scf_not_converged",
+}
+
+ENERGY_KEY = "FINAL SINGLE POINT ENERGY"
+
+
+def read_final_energy(path: str, blocksize: int = 1 << 16) -> float | None:
+    """
+    Reads the last final single-point energy from an ORCA output file by reading it backwards in blocks,
+    so only the end of the file has to be read.
+
+    Args:
+        path (str): Path to the output file.
+        blocksize (int, optional): Number of bytes read at once.
+
+    Returns:
+        float | None: The energy or None if it could not be found.
+    """
+    key = ENERGY_KEY.encode()
+    with open(path, "rb") as file:
+        end = file.seek(0, os.SEEK_END)
+        tail = b""
+        while end > 0:
+            start = max(0, end - blocksize)
+            file.seek(start)
+            buffer = file.read(end - start) + tail
+            end = start
+
+            pos = buffer.rfind(key)
+            if pos != -1:
+                line = buffer[pos:].split(b"\n", 1)[0]
+                try:
+                    return float(line.split()[4])
+                except (IndexError, ValueError):
+                    return None
+
+            # keep the beginning of the block, the key might be split between two blocks
+            tail = buffer[:512]
+
+    return None
+
+
+def parse_orca_output(path: str,
+                      fields: set[str],
+                      nroots: int = 0) -> dict[str, any]:
+    """
+    Reads an ORCA output file once, line by line, and extracts the requested fields. Reading stops as soon as all
+    requested fields are complete, the energy is then read from the end of the file (see read_final_energy).
+
+    Fields:
+        "energy": last final single-point energy,
+        "error": first error found in the output (see OUT_TO_ERR),
+        "opt": "converged", "cycles", "ecyc" (energy of every cycle) and "gncyc" (gradient norm of every cycle),
+        "shieldings": list of (atom index, isotropic shielding) from the chemical shielding summary,
+        "excitations": list of {"wavelength", "osc_str"} for the first nroots excitations of the absorption spectrum.
+
+    Args:
+        path (str): Path to the output file.
+        fields (set[str]): The fields to extract.
+        nroots (int, optional): Number of excitations to read. Defaults to 0.
+
+    Returns:
+        dict[str, any]: The extracted fields (None if a field could not be found).
+    """
+    output = {field: None for field in fields}
+    if "opt" in fields:
+        del output["opt"]
+        output.update({
+            "converged": False,
+            "cycles": None,
+            "ecyc": [],
+            "gncyc": []
+        })
+
+    # these fields can only be complete at the end of the file
+    scan_all = len(fields & {"error", "opt"}) > 0
+    # tables still to be read
+    tables = fields & {"shieldings", "excitations"}
+
+    # nothing to read in forward direction
+    if not scan_all and len(tables) == 0:
+        if "energy" in fields:
+            output["energy"] = read_final_energy(path)
+        return output
+
+    # the state consists of the table currently read and the number of lines to skip before its rows
+    state, skip = None, 0
+    complete = True
+    with open(path, "r", encoding=CODING, newline=None) as out:
+        for line in out:
+            if state is not None:
+                if skip > 0:
+                    skip -= 1
+                    continue
+
+                spl = line.split()
+                if state == "shieldings":
+                    # read until the first line that is not a row of the table
+                    try:
+                        output["shieldings"].append(
+                            (int(spl[0]), float(spl[2])))
+                    except (IndexError, ValueError):
+                        state = None
+                elif state == "excitations":
+                    output["excitations"].append({
+                        "wavelength": float(spl[2]),
+                        "osc_str": float(spl[3])
+                    })
+                    if len(output["excitations"]) == nroots:
+                        state = None
+
+                # stop reading after the last table if nothing else is needed
+                if state is None and not scan_all and len(tables) == 0:
+                    complete = False
+                    break
+                continue
+
+            if ENERGY_KEY in line:
+                if "energy" in fields:
+                    output["energy"] = float(line.split()[4])
+            elif "error" in fields and output["error"] is None and any(
+                    key in line for key in OUT_TO_ERR):
+                # Returns the first error found
+                output["error"] = next(OUT_TO_ERR[key] for key in OUT_TO_ERR
+                                       if key in line)
+            elif "opt" in fields and "Current Energy" in line:
+                output["ecyc"].append(float(line.split("....")[-1].split()[0]))
+            elif "opt" in fields and "Current gradient norm" in line:
+                output["gncyc"].append(
+                    float(line.split("....")[-1].split()[0]))
+            elif "opt" in fields and "GEOMETRY OPTIMIZATION CYCLE" in line:
+                output["cycles"] = int(line.split()[4])
+            elif "opt" in fields and "OPTIMIZATION HAS CONVERGED" in line:
+                output["converged"] = True
+            elif "shieldings" in tables and "CHEMICAL SHIELDING SUMMARY" in line:
+                tables.remove("shieldings")
+                output["shieldings"] = []
+                state, skip = "shieldings", 5
+            elif "excitations" in tables and "ABSORPTION SPECTRUM" in line and nroots > 0:
+                tables.remove("excitations")
+                output["excitations"] = []
+                state, skip = "excitations", 4
+
+    # the last energy might come after the point where reading stopped
+    if "energy" in fields and not complete:
+        output["energy"] = read_final_energy(path)
+
+    return output
@@ -6,15 +6,16 @@ import shutil
 from collections import OrderedDict
 from functools import reduce
 
-from .utilities import od_insert
+from .utilities import od_insert, do_md5
 from .logging import setup_logger
 from .datastructure import GeometryData, ParallelJob
 from .params import (
-    CODING,
     USER_ASSETS_PATH,
     WARNLEN,
 )
+from .orca_output import parse_orca_output
 from .qm_processor import QmProc
+from .xtb_parser import parse_xtb_output
 
 logger = setup_logger(__name__)
 
@@ -366,6 +367,18 @@ class OrcaProc(QmProc):
         **QmProc._req_settings_xtb
     }
 
+    _cache_sections = {
+        **QmProc._cache_sections,
+        **{
+            "sp": ["sp"],
+            "gsolv": ["sp"],
+            "xtb_opt": ["xtb_opt"],
+            "opt": ["opt"],
+            "nmr": ["nmr", "nmr_s", "nmr_j"],
+            "uvvis": ["uvvis"],
+        },
+    }
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -391,6 +404,28 @@ class OrcaProc(QmProc):
             }
         }"""
 
+    def _cache_extra(self, job: ParallelJob, jobtype: str) -> dict[str, any]:
+        """
+        Include the contents of template and constraint files in the cache key.
+        """
+        extra = {}
+        for section in self._cache_sections.get(jobtype, [jobtype]):
+            if section not in job.prepinfo:
+                continue
+
+            if job.prepinfo[section].get("template", False):
+                template = os.path.join(
+                    USER_ASSETS_PATH,
+                    f"{job.prepinfo['partname']}.orca.template")
+                if os.path.isfile(template):
+                    extra["template"] = do_md5(template)
+
+            if job.prepinfo[section].get("constraints", None) is not None:
+                extra["constraints"] = do_md5(
+                    job.prepinfo[section]["constraints"])
+
+        return extra
+
     def __prep(self,
                job: ParallelJob,
                jobtype: str,
@@ -740,29 +775,6 @@ class OrcaProc(QmProc):
 
         return indict
 
-    @staticmethod
-    def __check_output(lines: list[str]) -> str | None:
-        """
-        Checks the lines from the output file for errors and returns them.
-
-        Args:
-            lines: list of lines from the output file.
-
-        Returns:
-            str | None: error message if an error was found, None otherwise
-        """
-        # Dict mapping specific messages from the output to error messages
-        # TODO - this should be extended later
-        out_to_err = {
-            "SCF NOT CONVERGED": "scf_not_converged",
-        }
-        for line in lines:
-            if any(key in line for key in out_to_err.keys()):
-                # Returns the first error found
-                key = next(filter(lambda x: x in line, out_to_err.keys()))
-                return out_to_err[key]
-        return None
-
     def _sp(
         self,
         job: ParallelJob,
@@ -839,25 +851,21 @@ class OrcaProc(QmProc):
             logger.warning(
                 f"Job for {job.conf.name} failed. Stderr output:\n{errors}")
 
-        # read output
-        with open(outputpath, "r", encoding=CODING, newline=None) as out:
-            lines = out.readlines()
+        # read output (only the final energy is needed if the call failed anyway)
+        output = parse_orca_output(
+            outputpath, {"energy", "error"} if meta["success"] else {"energy"})
 
-            # Get final energy
-            result["energy"] = next(
-                (float(line.split()[4])
-                 for line in lines if "FINAL SINGLE POINT ENERGY" in line),
-                None,
-            )
+        # Get final energy
+        result["energy"] = output["energy"]
 
-            # Check for errors in the output file in case returncode is 0
-            if meta["success"]:
-                meta["error"] = self.__check_output(lines)
-                meta["success"] = meta["error"] is None and result[
-                    "energy"] is not None
-            else:
-                meta["error"] = self.__returncode_to_err.get(
-                    returncode, "unknown_error")
+        # Check for errors in the output file in case returncode is 0
+        if meta["success"]:
+            meta["error"] = output["error"]
+            meta["success"] = meta["error"] is None and result[
+                "energy"] is not None
+        else:
+            meta["error"] = self.__returncode_to_err.get(
+                returncode, "unknown_error")
 
         if self.copy_mo:
             # store the path to the current .gbw file for this conformer if
@@ -899,25 +907,28 @@ class OrcaProc(QmProc):
             "mo_path": None,
         }
 
-        # calculate gas phase
-        spres, spmeta = self._sp(job, jobdir, filename="sp_gas", no_solv=True)
-
-        if spmeta["success"]:
-            result["energy_gas"] = spres["energy"]
-        else:
-            meta["success"] = False
-            meta["error"] = spmeta["error"]
-            return result, meta
-
-        # calculate in solution
-        spres, spmeta = self._sp(job, jobdir, filename="sp_solv")
+        # calculate gas phase and in solution concurrently
+        # (ORCA only writes files named after the input, so both can run in the same directory)
+        calls = [
+            (self._sp, {
+                "jobdir": jobdir,
+                "filename": "sp_gas",
+                "no_solv": True
+            }),
+            (self._sp, {
+                "jobdir": jobdir,
+                "filename": "sp_solv"
+            }),
+        ]
 
-        if spmeta["success"]:
-            result["energy_solv"] = spres["energy"]
-        else:
-            meta["success"] = False
-            meta["error"] = spmeta["error"]
-            return result, meta
+        for (spres, spmeta), key in zip(self._run_concurrently(job, calls),
+                                        ["energy_gas", "energy_solv"]):
+            if spmeta["success"]:
+                result[key] = spres["energy"]
+            else:
+                meta["success"] = False
+                meta["error"] = spmeta["error"]
+                return result, meta
 
         if self.copy_mo:
             # store the path to the current .gbw file for this conformer if
@@ -1005,46 +1016,30 @@ class OrcaProc(QmProc):
                 f"Job for {job.conf.name} failed. Stderr output:\n{errors}")
 
         # read output
-        with open(outputpath, "r", encoding=CODING, newline=None) as out:
-            lines = out.readlines()
+        output = parse_orca_output(outputpath, {"energy", "error", "opt"})
 
         # Get final energy
-        result["energy"] = next(
-            (float(line.split()[4])
-             for line in lines if "FINAL SINGLE POINT ENERGY" in line),
-            None,
-        )
+        result["energy"] = output["energy"]
 
-        meta["error"] = self.__check_output(lines)
+        meta["error"] = output["error"]
         meta[
             "success"] = meta["error"] is None and result["energy"] is not None
 
         # Check for errors in the output file in case returncode is 0
         if meta["success"]:
             # Check convergence
-            if next((True for x in lines if "OPTIMIZATION HAS CONVERGED" in x),
-                    None) is True:
-                result["converged"] = True
-            else:
-                result["converged"] = False
+            result["converged"] = output["converged"]
 
             # Get the number of cycles
             if result["converged"] is not None:
-                for line in lines:
-                    if "GEOMETRY OPTIMIZATION CYCLE" in line:
-                        result["cycles"] = int(line.split()[4])
+                if output["cycles"] is not None:
+                    result["cycles"] = output["cycles"]
 
                 # Get energies for each cycle
-                result["ecyc"] = [
-                    float(line.split("....")[-1].split()[0])
-                    for line in filter(lambda x: "Current Energy" in x, lines)
-                ]
+                result["ecyc"] = output["ecyc"]
 
                 # Get all gradient norms for evaluation
-                result["gncyc"] = [
-                    float(line.split("....")[-1].split()[0]) for line in
-                    filter(lambda x: "Current gradient norm" in x, lines)
-                ]
+                result["gncyc"] = output["gncyc"]
 
                 # Get the last gradient norm
                 result["grad_norm"] = result["gncyc"][-1]
@@ -1244,58 +1239,30 @@ class OrcaProc(QmProc):
             return result, meta
 
         # read output
-        with open(outputpath, "r", encoding=CODING, newline=None) as file:
-            lines = file.readlines()
+        output = parse_xtb_output(outputpath)
 
         result["ecyc"] = []
         result["cycles"] = 0
 
-        # Substrings indicating error in xtb
-        error_ind = [
-            "external code error",
-            "|grad| > 500, something is totally wrong!",
-            "abnormal termination of xtb",
-        ]
-
         # Check if xtb terminated normally (if there are any error indicators
         # in the output)
-        meta["success"] = (False if next((x for x in lines if any(
-            y in x for y in error_ind)), None) is not None else True)
+        meta["success"] = not output["error"]
         if not meta["success"]:
             meta["error"] = "unknown_error"
             return result, meta
 
         # check convergence
-        if (next(
-            (True for x in lines if "GEOMETRY OPTIMIZATION CONVERGED" in x),
-                None) is True):
-            result["converged"] = True
-        elif (next((True for x in lines if "FAILED TO CONVERGE GEOMETRY" in x),
-                   None) is True):
-            result["converged"] = False
+        result["converged"] = output["converged"]
 
         # Get the number of cycles
         if result["converged"] is not None:
-            # tmp is one of the values from the dict defined below
-            tmp = {
-                True: ("GEOMETRY OPTIMIZATION CONVERGED", 5),
-                False: ("FAILED TO CONVERGE GEOMETRY", 7),
-            }
-            tmp = tmp[result["converged"]]
-
-            result["cycles"] = int(
-                next(x for x in lines if tmp[0] in x).split()[tmp[1]])
+            result["cycles"] = output["cycles"]
 
             # Get energies for each cycle
-            result["ecyc"].extend(
-                float(line.split("->")[-1])
-                for line in filter(lambda x: "av. E: " in x, lines))
+            result["ecyc"].extend(output["ecyc"])
 
             # Get all gradient norms for evaluation
-            result["gncyc"] = [
-                float(line.split()[3])
-                for line in filter(lambda x: " gradient norm " in x, lines)
-            ]
+            result["gncyc"] = output["gncyc"]
 
             # Get the last gradient norm
             result["grad_norm"] = result["gncyc"][-1]
@@ -1380,41 +1347,25 @@ class OrcaProc(QmProc):
                 return result, meta
 
             # Grab shieldings and energy from the output
-            with open(outputpath, "r") as f:
-                lines = f.readlines()
+            # For shieldings watch out for the line "CHEMICAL SHIELDING SUMMARY
+            # (ppm)"
+            output = parse_orca_output(
+                outputpath, {"energy", "shieldings"}
+                if ending in ["", "_s"] else {"energy"})
 
             # Get final energy
-            result["energy"] = next(
-                (float(line.split()[4])
-                 for line in lines if "FINAL SINGLE POINT ENERGY" in line),
-                None,
-            )
+            result["energy"] = output["energy"]
 
-            if result["energy"] is None:
+            if result["energy"] is None or ("shieldings" in output and
+                                            output["shieldings"] is None):
                 meta["success"] = False
                 meta["error"] = "unknown_error"
                 return result, meta
 
-            # For shieldings watch out for the line "CHEMICAL SHIELDING SUMMARY
-            # (ppm)"
             if ending in ["", "_s"]:
-                start = lines.index(
-                    next(x for x in lines
-                         if "CHEMICAL SHIELDING SUMMARY" in x)) + 6
-
-                result["shieldings"] = []
-
-                for line in lines[start:]:
-                    # Try to extract values from the lines, if that fails
-                    # (probably IndexError) stop
-                    try:
-                        result["shieldings"].append(
-                            (int(line.split()[0]), float(line.split()[2])))
-                    except IndexError:
-                        break
-
                 # Sort shieldings by atom index
-                result["shieldings"].sort(key=lambda x: x[0])
+                result["shieldings"] = sorted(output["shieldings"],
+                                              key=lambda x: x[0])
 
             if ending in ["", "_j"]:
                 # Read couplings from *_properties.txt for easier parsing
@@ -1500,38 +1451,19 @@ class OrcaProc(QmProc):
             meta["error"] = spmeta["error"]
             return result, meta
 
-        # Grab excitations and energy from the output
-        with open(outputpath, "r") as f:
-            lines = f.readlines()
+        # Grab excitations (wavelengths and oscillator strengths) and energy from the output
+        output = parse_orca_output(outputpath, {"energy", "excitations"},
+                                   nroots=job.prepinfo["uvvis"]["nroots"])
 
         # Get final energy
-        result["energy"] = next(
-            (float(line.split()[4])
-             for line in lines if "FINAL SINGLE POINT ENERGY" in line),
-            None,
-        )
+        result["energy"] = output["energy"]
 
-        if result["energy"] is None:
+        if result["energy"] is None or output["excitations"] is None:
             meta["success"] = False
             meta["error"] = "unknown_error"
             return result, meta
 
-        # Find the line index of the actual excitations information
-        start = lines.index(
-            next(filter(lambda line: "ABSORPTION SPECTRUM" in line, lines)))
-
-        # Get all the lines where the excitations are listed (+5 because of spacing in output file)
-        uvvis_table = lines[start + 5:start + 5 +
-                            job.prepinfo["uvvis"]["nroots"]]
-
-        # Extract excitation wavelengths and oscillator strengths
-        result["excitations"] = []
-        for row in uvvis_table:
-            spl = row.split()
-            result["excitations"].append({
-                "wavelength": float(spl[2]),
-                "osc_str": float(spl[3])
-            })
+        result["excitations"] = output["excitations"]
 
         meta["success"] = True
 
@@ -1,22 +1,196 @@
 """
 Performs the parallel execution of the QM calls.
 """
-import multiprocessing
+import copy
+import math
 import os
 import signal
-from concurrent.futures import ProcessPoolExecutor, as_completed
-
+import threading
+from collections import defaultdict
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed)
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+from time import perf_counter
+
+from .batch import SCHEDULERS, run_array
+from .cache import ResultCache
 from .datastructure import MoleculeData, ParallelJob
+from .distributed import DistributedExecutor
+from .journal import JOURNAL, Journal
 from .logging import setup_logger
-from .params import OMPMAX, OMPMIN
+from .params import CACHE_PATH, OMPMAX, OMPMIN
 from .procfact import ProcessorFactory
-from .qm_processor import QmProc
+from .profiling import merge_profiles
+from .qm_processor import QmProc, terminate_running
+from .results import RESULTS_STREAM, ResultsStream
+from .telemetry import Telemetry
 
 logger = setup_logger(__name__)
 
 # get number of cores
 ncores = os.cpu_count()
 
+# history of the recorded runtimes, maps "{prog}_{jobtype}" to a list of (number of atoms, core-seconds)
+timings: dict[str, list[tuple[int, float]]] = defaultdict(list)
+
+# assumed scaling of the runtime with the number of atoms if it cannot be determined from the history
+SCALING = 3.0
+
+
+class ExecutionContext:
+    """
+    Long-lived process pool that is shared by all calls to execute within the context (e.g. all parts of a CENSO run,
+    including every macrocycle of the optimization), so that the worker processes are only started once.
+    The pool is sized for the smallest possible number of cores per job, the actual load is still limited by the
+    core accounting in dqp. The executor for distributed execution is shared in the same way, so that the job server
+    and the worker agents are only started once.
+
+    The context also owns the telemetry (progress and metrics) of all jobs run within it.
+
+    Usage:
+        with ExecutionContext(maxcores) as context:
+            ...
+        print(context.summary())
+    """
+
+    def __init__(self, maxcores: int, telemetry: Telemetry = None):
+        """
+        Args:
+            maxcores (int): Maximum number of cores to be used.
+            telemetry (Telemetry, optional): Telemetry to report the progress of the jobs to.
+        """
+        self.maxcores: int = maxcores
+        self.pool: ProcessPoolExecutor | None = None
+        self.distributed: DistributedExecutor | None = None
+        self.telemetry: Telemetry | None = telemetry
+
+        # time needed to start the pool (including the worker processes) and number of times it was reused
+        self.startup_time: float = 0.0
+        self.reuses: int = 0
+
+    def __enter__(self):
+        global context
+        context = self
+        if self.telemetry is not None:
+            self.telemetry.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global context
+        context = None
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.distributed is not None:
+            self.distributed.shutdown()
+            self.distributed = None
+        if self.telemetry is not None:
+            self.telemetry.__exit__(exc_type, exc_value, traceback)
+        return False
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        """
+        Returns the shared pool, starting it if necessary.
+
+        Returns:
+            ProcessPoolExecutor: The shared pool.
+        """
+        if self.pool is not None:
+            self.reuses += 1
+            return self.pool
+
+        return self.__start_pool()
+
+    def restart_pool(self) -> ProcessPoolExecutor:
+        """
+        Replaces the shared pool after it broke (e.g. because a worker was killed), i.e. a submission raised
+        BrokenProcessPool.
+
+        Returns:
+            ProcessPoolExecutor: The new pool.
+        """
+        logger.warning("Worker pool is broken. Starting a new one.")
+        self.pool.shutdown(wait=False)
+        self.pool = None
+        return self.__start_pool()
+
+    def __start_pool(self) -> ProcessPoolExecutor:
+        """
+        Starts the pool including all of its workers.
+
+        Returns:
+            ProcessPoolExecutor: The new pool.
+        """
+        start = perf_counter()
+        max_workers = max(1, min(ncores, self.maxcores) // OMPMIN)
+        self.pool = ProcessPoolExecutor(max_workers=max_workers)
+
+        # start all workers right away (they are otherwise started lazily on submission)
+        for future in [
+                self.pool.submit(os.getpid) for _ in range(max_workers)
+        ]:
+            future.result()
+        self.startup_time = perf_counter() - start
+        logger.debug(
+            f"Started worker pool with {max_workers} workers in {self.startup_time:.3f} seconds."
+        )
+
+        return self.pool
+
+    def get_distributed(self, hosts: list[str],
+                        cores: int) -> DistributedExecutor:
+        """
+        Returns the shared executor for distributed execution, starting it if necessary (or if it broke, e.g. because
+        all agents died, or if the hosts or cores changed).
+
+        Args:
+            hosts (list[str]): Hostnames to launch agents on.
+            cores (int): Number of cores every agent may use.
+
+        Returns:
+            DistributedExecutor: The shared executor.
+        """
+        if self.distributed is not None:
+            if (not self.distributed.broken
+                    and self.distributed.hosts == list(hosts)
+                    and self.distributed.cores == cores):
+                self.reuses += 1
+                return self.distributed
+
+            logger.warning(
+                "Worker agents cannot be reused. Starting new ones.")
+            self.distributed.shutdown(wait=False)
+
+        start = perf_counter()
+        self.distributed = DistributedExecutor(hosts, cores)
+        self.startup_time = perf_counter() - start
+        logger.debug(
+            f"Started {len(hosts)} worker agents in {self.startup_time:.3f} seconds."
+        )
+
+        return self.distributed
+
+    def summary(self) -> str:
+        """
+        Returns:
+            str: Summary of the pool reuse and the approximate time saved by it.
+        """
+        summary = (
+            f"Reused worker pool {self.reuses} times, saving approx. {self.reuses * self.startup_time:.2f} seconds "
+            f"of worker startup (startup time: {self.startup_time:.3f} seconds).")
+        if self.telemetry is not None and len(self.telemetry.runtimes) > 0:
+            summary += "\nRuntimes per jobtype:\n" + self.telemetry.runtime_summary(
+            )
+        if self.telemetry is not None and len(self.telemetry.usage) > 0:
+            summary += "\nResource usage per part:\n" + self.telemetry.usage_summary(
+            )
+        return summary
+
+
+# currently active execution context (set via the with-statement)
+context: ExecutionContext | None = None
+
 
 def execute(
     conformers: list[MoleculeData],
@@ -75,6 +249,14 @@ def execute(
     # Set processor to copy the MO-files
     processor.copy_mo = copy_mo
 
+    # Profile the jobs if requested (every job writes its own profile, they are merged after execution)
+    processor.profile = prepinfo["general"].get("profile", "off")
+
+    # Set up the persistent result cache (can be disabled via the 'cache' setting)
+    if prepinfo["general"].get("cache", False):
+        processor.cache = ResultCache(CACHE_PATH,
+                                      prepinfo["general"]["cache_size"])
+
     # check for the most recent mo files for each conformer
     # TODO - how would this work when multiple different programs are supported?
     for job in jobs:
@@ -84,28 +266,62 @@ def execute(
         except IndexError:
             pass
 
+    # Fingerprint the jobs for the journal and skip all jobs that already finished in a previous run
+    journal = Journal(os.path.join(workdir, JOURNAL))
+    journal.fingerprint(jobs, processor)
+    if prepinfo["general"].get("resume", False):
+        todo = journal.restore(jobs)
+    else:
+        todo = jobs
+
     # set cores per process for each job
+    schedule = prepinfo["general"].get("schedule", "chunked")
     if balance:
-        set_omp_chunking(jobs)
+        set_omp_balanced(todo, prog, schedule)
     else:
         if omp < OMPMIN:
             logger.warning(
                 f"User OMP setting is below the minimum value of {OMPMIN}. Using {OMPMIN} instead."
             )
-            for job in jobs:
+            for job in todo:
                 job.omp = OMPMIN
         elif omp <= ncores:
-            for job in jobs:
+            for job in todo:
                 job.omp = omp
         else:
             logger.warning(
                 f"Value of {omp} for OMP is larger than the number of available cores {ncores}. Using OMP = {ncores}."
             )
-            for job in jobs:
+            for job in todo:
                 job.omp = ncores
 
+    # stream the results of every job as soon as it is finished, so that they are available even if the part crashes
+    # (results that are not taken over by the conformers (update=False) are not streamed, the part decides what to
+    # keep of them)
+    stream = ResultsStream(os.path.join(workdir,
+                                        RESULTS_STREAM)) if update else None
+
     # execute the jobs
-    jobs = dqp(jobs, processor)
+    dqp_kwargs = {
+        "journal": journal,
+        "stream": stream,
+        "presorted": balance and schedule == "duration",
+        "balance": balance,
+        "backend": prepinfo["general"].get("executor", "process"),
+        "hosts": prepinfo["general"].get("hosts", []),
+        "batch_args": prepinfo["general"].get("batch_args", ""),
+    }
+    todo_names = {job.conf.name for job in todo}
+    restored = [job for job in jobs if job.conf.name not in todo_names]
+    if stream is not None and len(restored) > 0:
+        stream.append([(job.conf.name, job.results) for job in restored])
+    if len(todo) > 0:
+        jobs = restored + dqp(todo, processor, **dqp_kwargs)
+    else:
+        jobs = restored
+
+    # remember the runtimes to improve the predictions for later jobs
+    record_timings(jobs, prog)
 
     # Try to get the mo_path from metadata and store it in the respective conformer object
     mo_paths = {job.conf.name: job.meta["mo_path"] for job in jobs}
@@ -113,8 +329,19 @@ def execute(
         if mo_paths[conf.name] is not None:
             conf.mo_paths.append(mo_paths[conf.name])
 
+    # conformers with at least one failed jobtype (updated if the failed jobs are retried)
+    failed_confs = [
+        job.conf.name for job in jobs
+        if not all(job.meta[jt]["success"] for jt in job.jobtype)
+    ]
+
     if retry_failed:
-        retried, failed_confs = retry_failed_jobs(jobs, processor, balance)
+        # (balance is passed on with the arguments for dqp)
+        retried, failed_confs = retry_failed_jobs(jobs,
+                                                  processor,
+                                                  prog=prog,
+                                                  schedule=schedule,
+                                                  **dqp_kwargs)
 
         # Again, try to get the mo_path from metadata and store it in the respective conformer object
         mo_paths = {
@@ -125,6 +352,16 @@ def execute(
             if mo_paths.get(conf.name, None) is not None:
                 conf.mo_paths.append(mo_paths[conf.name])
 
+    # Keep the cache below its maximum size
+    if processor.cache is not None:
+        processor.cache.evict()
+
+    # collect the profiles of all jobs into the profile of the part
+    if processor.profile != "off":
+        merge_profiles([processor.profile_path(job) for job in jobs],
+                       os.path.join(workdir, "profile_jobs"),
+                       processor.profile)
+
     # special warning if all jobs failed
     if len(jobs) == len(failed_confs):
         logger.warning("All jobs failed and could not be recovered!")
@@ -146,7 +383,8 @@ def execute(
 def prepare_jobs(conformers: list[MoleculeData], prepinfo: dict[str, dict],
                  jobtype: list[str]) -> list[ParallelJob]:
     # create jobs from conformers
-    jobs = [ParallelJob(conf.geom, jobtype) for conf in conformers]
+    # (every job gets its own jobtype list, since it might be modified when retrying failed jobs)
+    jobs = [ParallelJob(conf.geom, list(jobtype)) for conf in conformers]
 
     # put settings into jobs
     for job in jobs:
@@ -155,88 +393,371 @@ def prepare_jobs(conformers: list[MoleculeData], prepinfo: dict[str, dict],
     return jobs
 
 
-def reduce_cores(free_cores: multiprocessing.Value, omp: int,
-                 enough_cores: multiprocessing.Condition):
-    # acquire lock on the condition and wait until enough cores are available
-    with enough_cores:
-        enough_cores.wait_for(lambda: free_cores.value >= omp)
-        free_cores.value -= omp
-        logger.debug(
-            f"Free cores decreased {free_cores.value + omp} -> {free_cores.value}."
-        )
+class CorePool:
+    """
+    Counts the free cores in the submitting process. The counter is only accessed by the thread submitting the jobs
+    and by the done callbacks of the futures (which are run in threads of the same process), so a threading.Condition
+    suffices and no inter-process communication is necessary.
+    """
 
-
-def increase_cores(free_cores: multiprocessing.Value, omp: int,
-                   enough_cores: multiprocessing.Condition):
-    # acquire lock on the condition and increase the number of cores, notifying one waiting process
-    with enough_cores:
-        free_cores.value += omp
-        logger.debug(
-            f"Free cores increased {free_cores.value - omp} -> {free_cores.value}."
-        )
-        enough_cores.notify()
+    def __init__(self, cores: int):
+        self.free: int = cores
+        self.__enough_cores = threading.Condition()
+
+    def reserve(self, omp: int, queued: int = None) -> int:
+        """
+        Waits until enough cores are available and reserves them.
+        If the total omp of the jobs still in the queue (including this one) is given and the free cores are enough
+        to run all of them at once, the number of cores for this job is scaled up, so that the remaining cores are
+        shared proportionally among the queued jobs (capped at OMPMAX).
+
+        Args:
+            omp (int): Number of cores requested for the job.
+            queued (int, optional): Sum of the omp values of the jobs still in the queue.
+
+        Returns:
+            int: The number of cores reserved for the job.
+        """
+        # acquire lock on the condition and wait until enough cores are available
+        with self.__enough_cores:
+            self.__enough_cores.wait_for(lambda: self.free >= omp)
+
+            # use the live value to hand out idle cores to the last jobs of the queue
+            # (a single job can never use more than the cores of one node)
+            if queued is not None and self.free >= queued:
+                omp = max(omp, min(OMPMAX, ncores,
+                                   omp * self.free // queued))
+
+            self.free -= omp
+            logger.debug(
+                f"Free cores decreased {self.free + omp} -> {self.free}.")
+
+        return omp
+
+    def release(self, omp: int) -> None:
+        """
+        Gives back the cores of a finished job, notifying the waiting thread.
+
+        Args:
+            omp (int): Number of cores to give back.
+
+        Returns:
+            None
+        """
+        with self.__enough_cores:
+            self.free += omp
+            logger.debug(
+                f"Free cores increased {self.free - omp} -> {self.free}.")
+            self.__enough_cores.notify()
 
 
 def handle_sigterm(signum, frame, executor):
     logger.critical("Received SIGTERM. Terminating.")
     executor.shutdown(wait=False)
-
-
-def dqp(jobs: list[ParallelJob], processor: QmProc) -> list[ParallelJob]:
+    # external programs started from threads of this process
+    terminate_running()
+
+
+def dqp(jobs: list[ParallelJob],
+        processor: QmProc,
+        journal: Journal = None,
+        stream: ResultsStream = None,
+        presorted: bool = False,
+        balance: bool = False,
+        backend: str = "process",
+        hosts: list[str] = None,
+        batch_args: str = "") -> list[ParallelJob]:
     """
     D ynamic Q ueue P rocessing
+
+    If a journal is given, every job is recorded in it as soon as it is finished.
+    If a results stream is given, the results of every job are appended to it as soon as the job is finished.
+    If presorted is True, the jobs are submitted in the given order (e.g. longest first), otherwise they are
+    sorted by the number of cores.
+    If balance is True, the number of cores of jobs that have not been started yet is increased as soon as the
+    free cores are enough to run all of the remaining jobs at once.
+    The executor backend can be "process" (local process pool), "thread" (thread pool in this process, the jobs
+    are not pickled but run on shallow copies of their geometries), "distributed" (worker agents on the given hosts,
+    each of which may use ncores cores), or the name of a batch scheduler ("slurm" or "pbs") in which case the jobs
+    are submitted as job arrays (with batch_args passed to the submission command).
     """
 
     global ncores
 
-    with multiprocessing.Manager() as manager:
-        # execute calculations for given list of conformers
-        with ProcessPoolExecutor(max_workers=ncores //
-                                 min(job.omp for job in jobs)) as executor:
-            # make sure that the executor exits gracefully on termination
-            # TODO - is using wait=False a good option here?
-            # should be fine since workers will kill programs with SIGTERM
-            # wait=True leads to the workers waiting for their current task to be finished before terminating
-            # Register the signal handler
-            signal.signal(
-                signal.SIGTERM,
-                lambda signum, frame: handle_sigterm(signum, frame, executor),
-            )
+    # progress and metrics of the jobs (if available)
+    telemetry = context.telemetry if context is not None else None
+
+    # batch schedulers take care of the resources themselves
+    if backend in SCHEDULERS:
+        if telemetry is not None:
+            telemetry.start_batch(jobs, None, ncores)
+            for job in jobs:
+                telemetry.submitted(job)
+        results = run_array(jobs, processor, backend, batch_args=batch_args)
+        for job in results:
+            if journal is not None:
+                journal.record(job)
+            if stream is not None:
+                stream.append([(job.conf.name, job.results)])
+            if telemetry is not None:
+                telemetry.finished(job)
+        if telemetry is not None:
+            telemetry.end_batch()
+        return results
+
+    # set up the executor backend and the total number of cores available to it
+    if backend == "distributed" and context is not None:
+        # the shared agents must not be stopped after this batch
+        pool = nullcontext(context.get_distributed(hosts, ncores))
+        totalcores = ncores * len(hosts)
+    elif backend == "distributed":
+        pool = DistributedExecutor(hosts, ncores)
+        totalcores = ncores * len(hosts)
+    elif backend == "thread":
+        pool = ThreadPoolExecutor(max_workers=ncores //
+                                  min(job.omp for job in jobs))
+        totalcores = ncores
+    elif context is not None:
+        # the shared pool must not be shut down after this batch
+        pool = nullcontext(context.get_pool())
+        totalcores = ncores
+    else:
+        pool = ProcessPoolExecutor(max_workers=ncores //
+                                   min(job.omp for job in jobs))
+        totalcores = ncores
+
+    # execute calculations for given list of conformers
+    with pool as executor:
+        # make sure that the executor exits gracefully on termination
+        # TODO - is using wait=False a good option here?
+        # should be fine since workers will kill programs with SIGTERM
+        # wait=True leads to the workers waiting for their current task to be finished before terminating
+        # Register the signal handler
+        signal.signal(
+            signal.SIGTERM,
+            lambda signum, frame: handle_sigterm(signum, frame, executor),
+        )
 
-            # define shared variables that can be safely asynchronously accessed
-            free_cores = manager.Value(int, ncores)
-            enough_cores = manager.Condition()
+        # keep track of the free cores (only accessed from within this process)
+        free_cores = CorePool(totalcores)
+        if telemetry is not None:
+            telemetry.start_batch(jobs, free_cores, totalcores)
 
-            # sort the jobs by the number of cores used
-            # (the first item will be the one with the lowest number of cores)
+        # sort the jobs by the number of cores used
+        # (the first item will be the one with the lowest number of cores)
+        if not presorted:
             jobs.sort(key=lambda x: x.omp)
 
-            tasks = []
-            for i in range(len(jobs)):
-                # TODO - something to readjust omp based on expected time to finish and the timings of other jobs
-                # try to reduce the number of cores by job.omp, if there are not enough cores available we wait
-                reduce_cores(free_cores, jobs[i].omp, enough_cores)
+        # total number of cores requested by the jobs that have not been submitted yet
+        queued = sum(job.omp for job in jobs)
+
+        tasks = []
+        for i in range(len(jobs)):
+            # try to reduce the number of cores by job.omp, if there are not enough cores available we wait
+            omp = free_cores.reserve(jobs[i].omp,
+                                     queued=queued if balance else None)
+            queued -= jobs[i].omp
+            if omp != jobs[i].omp:
+                logger.debug(
+                    f"Increasing cores for {jobs[i].conf.name} from {jobs[i].omp} to {omp}."
+                )
+                jobs[i].omp = omp
 
+            # in a thread the job would otherwise modify the geometry of the conformer directly
+            if backend == "thread":
+                jobs[i].conf = copy.copy(jobs[i].conf)
+
+            try:
+                # submit the job (the shared pool is replaced if it broke, e.g. because a worker was killed)
                 try:
-                    # submit the job
                     tasks.append(executor.submit(processor.run, jobs[i]))
-                    # NOTE: explanation of the lambda: the first argument passed to the done_callback is always the future
-                    # itself, it is not assigned (_), the second parameter is the number of openmp threads of the job (i.e.
-                    # job.omp) if this is not specified like this (omp=jobs[i].omp) the done_callback will instead use the
-                    # omp of the current item in the for-iterator (e.g. the submitted job has omp=4, but the current jobs[i]
-                    # has omp=7, so the callback would use 7 instead of 4)
-                    tasks[-1].add_done_callback(lambda _, omp=jobs[
-                        i].omp: increase_cores(free_cores, omp, enough_cores))
-                except RuntimeError:
-                    # Makes this exit gracefully in case that the main process is killed
-                    return None
-
-            # wait for all jobs to finish and collect results
-            results = [task.result() for task in as_completed(tasks)]
+                except BrokenProcessPool:
+                    if context is None or executor is not context.pool:
+                        raise
+                    executor = context.restart_pool()
+                    tasks.append(executor.submit(processor.run, jobs[i]))
+                # NOTE: explanation of the lambda: the first argument passed to the done_callback is always the future
+                # itself, it is not assigned (_), the second parameter is the number of openmp threads of the job (i.e.
+                # job.omp) if this is not specified like this (omp=jobs[i].omp) the done_callback will instead use the
+                # omp of the current item in the for-iterator (e.g. the submitted job has omp=4, but the current jobs[i]
+                # has omp=7, so the callback would use 7 instead of 4)
+                tasks[-1].add_done_callback(
+                    lambda _, omp=jobs[i].omp: free_cores.release(omp))
+                if telemetry is not None:
+                    telemetry.submitted(jobs[i])
+            except RuntimeError:
+                # Makes this exit gracefully in case that the main process is killed
+                return None
+
+        # wait for all jobs to finish and collect results
+        results = []
+        for task in as_completed(tasks):
+            results.append(task.result())
+            if journal is not None:
+                journal.record(results[-1])
+            if stream is not None:
+                stream.append([(results[-1].conf.name, results[-1].results)])
+            if telemetry is not None:
+                telemetry.finished(results[-1])
+
+        if telemetry is not None:
+            telemetry.end_batch()
 
     return results
 
 
+def set_omp_balanced(jobs: list[ParallelJob], prog: str,
+                     schedule: str) -> None:
+    """
+    Sets the number of cores for every job according to the chosen scheduling mode.
+
+    Args:
+        jobs (list[ParallelJob]): List of jobs.
+        prog (str): Name of the program used for the jobs.
+        schedule (str): Either "chunked" (jobs are assumed to take equally long) or "duration" (cores are
+            distributed according to the predicted runtimes, jobs are sorted longest first).
+
+    Returns:
+        None
+    """
+    if schedule == "duration":
+        set_omp_duration(jobs, [predict_runtime(job, prog) for job in jobs])
+    else:
+        set_omp_chunking(jobs)
+
+
+def record_timings(jobs: list[ParallelJob], prog: str) -> None:
+    """
+    Stores the runtimes of all successful, non-cached calculations in the timing history.
+    The runtimes are stored as core-seconds, i.e. wall time multiplied with the number of cores.
+
+    Args:
+        jobs (list[ParallelJob]): List of finished jobs.
+        prog (str): Name of the program used for the jobs.
+
+    Returns:
+        None
+    """
+    for job in jobs:
+        for jt in job.jobtype:
+            meta = job.meta.get(jt, {})
+            if meta.get("success", False) and not meta.get("cached", False):
+                timings[f"{prog}_{jt}"].append(
+                    (job.conf.nat, meta["time"] * job.omp))
+
+
+def predict_runtime(job: ParallelJob, prog: str) -> float:
+    """
+    Predicts the runtime of a job in core-seconds from the timing history.
+    For every jobtype the runtime is modeled as t = a * nat^b. The exponent b is fitted to the history if it contains
+    different molecule sizes, otherwise SCALING is used. Jobtypes without any history get the average prefactor of
+    the known jobtypes (or 1), so the predictions are at least correct relative to each other.
+
+    Args:
+        job (ParallelJob): The job to predict the runtime for.
+        prog (str): Name of the program used for the job.
+
+    Returns:
+        float: Predicted runtime in core-seconds.
+    """
+    models = {}
+    for jt in job.jobtype:
+        history = timings.get(f"{prog}_{jt}", [])
+        if len(history) > 0:
+            models[jt] = _fit_runtime_model(history)
+
+    if len(models) > 0:
+        default = (sum(a for a, _ in models.values()) / len(models), SCALING)
+    else:
+        default = (1.0, SCALING)
+
+    runtime = 0.0
+    for jt in job.jobtype:
+        a, b = models.get(jt, default)
+        runtime += a * job.conf.nat**b
+
+    return runtime
+
+
+def _fit_runtime_model(history: list[tuple[int, float]]) -> tuple[float, float]:
+    """
+    Least squares fit of log(t) = log(a) + b * log(nat).
+    The exponent is limited to the range 1 to 4 to stay reasonable for noisy data.
+
+    Args:
+        history (list[tuple[int, float]]): List of (number of atoms, runtime).
+
+    Returns:
+        tuple[float, float]: Prefactor a and exponent b.
+    """
+    x = [math.log(nat) for nat, _ in history]
+    y = [math.log(max(t, 1e-6)) for _, t in history]
+    xmean, ymean = sum(x) / len(x), sum(y) / len(y)
+
+    sxx = sum((xi - xmean)**2 for xi in x)
+    if sxx > 1e-8:
+        b = sum((xi - xmean) * (yi - ymean) for xi, yi in zip(x, y)) / sxx
+        b = min(max(b, 1.0), 4.0)
+    else:
+        b = SCALING
+
+    return math.exp(ymean - b * xmean), b
+
+
+def set_omp_duration(jobs: list[ParallelJob], runtimes: list[float]) -> None:
+    """
+    Determines and sets the number of cores for every job based on its predicted runtime (makespan minimization).
+    Each job gets a number of cores proportional to its predicted runtime, so that all jobs would finish at the same
+    time if they could all be run at once. If there are more jobs than can be run at once, they are submitted
+    longest first (LPT), so that short jobs fill the gaps at the end.
+    The jobs are sorted in place by descending predicted runtime.
+
+    Args:
+        jobs (list[ParallelJob]): List of jobs.
+        runtimes (list[float]): Predicted runtimes of the jobs (in core-seconds).
+
+    Returns:
+        None
+    """
+    global ncores
+
+    if len(jobs) == 0:
+        return
+
+    ompmax = min(OMPMAX, ncores)
+    ompmin = min(OMPMIN, ompmax)
+
+    order = sorted(range(len(jobs)), key=lambda i: runtimes[i], reverse=True)
+    runtimes = [runtimes[i] for i in order]
+    jobs[:] = [jobs[i] for i in order]
+
+    # ideal makespan if every core is used all the time
+    makespan = sum(runtimes) / ncores
+
+    # ideal number of cores for each job
+    ideal = [t / makespan for t in runtimes]
+    for job, cores in zip(jobs, ideal):
+        job.omp = min(max(int(cores), ompmin), ompmax)
+
+    # if all jobs can run at once, take away cores from the jobs that are furthest above their ideal number of
+    # cores until they fit
+    free = ncores - sum(job.omp for job in jobs)
+    while free < 0 and len(jobs) * ompmin <= ncores:
+        i = max((i for i in range(len(jobs)) if jobs[i].omp > ompmin),
+                key=lambda i: jobs[i].omp - ideal[i])
+        jobs[i].omp -= 1
+        free += 1
+
+    # distribute the remaining cores to the jobs that are furthest below their ideal number of cores
+    while free > 0:
+        candidates = [i for i in range(len(jobs)) if jobs[i].omp < ompmax]
+        if len(candidates) == 0:
+            break
+        i = max(candidates, key=lambda i: ideal[i] - jobs[i].omp)
+        jobs[i].omp += 1
+        free -= 1
+
+
 def set_omp_chunking(jobs: list[ParallelJob]) -> None:
     """
     Determines and sets the number of cores that are supposed to be used for every job.
@@ -249,7 +770,8 @@ def set_omp_chunking(jobs: list[ParallelJob]) -> None:
     jobs_left, tot_jobs = len(jobs), len(jobs)
 
     # Calculate the maximum and minimum number of processes (number of jobs that can be executed simultaneously)
-    maxprocs = ncores // OMPMIN  # Calculate the maximum number of processes
+    # (at least one, otherwise no job could be assigned on machines with less than OMPMIN cores)
+    maxprocs = max(1, ncores // OMPMIN)  # Calculate the maximum number of processes
     # Calculate the minimum number of processes
     minprocs = max(1, ncores // OMPMAX)
 
@@ -277,14 +799,23 @@ def set_omp_chunking(jobs: list[ParallelJob]) -> None:
             jobs_left -= p  # Decrement the number of remaining jobs
 
 
-def retry_failed_jobs(jobs: list[ParallelJob], processor: QmProc,
-                      balance: bool) -> tuple[list[int], list[str]]:
+def retry_failed_jobs(
+        jobs: list[ParallelJob],
+        processor: QmProc,
+        balance: bool,
+        prog: str = "",
+        schedule: str = "chunked",
+        **kwargs) -> tuple[list[int], list[str]]:
     """
     Tries to recover failed jobs.
 
     Args:
         jobs (list[ParallelJob]): List of jobs.
         processor (QmProc): Processor object.
+        balance (bool): Whether to balance the number of cores used per job.
+        prog (str, optional): Name of the program used for the jobs (needed for runtime predictions).
+        schedule (str, optional): Scheduling mode used for balancing.
+        **kwargs: Further arguments passed to dqp (e.g. the journal or the executor backend).
 
     Returns:
         tuple[list[int], list[str]]: List of indices of jobs that should be retried, list of names of conformers
@@ -331,12 +862,14 @@ def retry_failed_jobs(jobs: list[ParallelJob], processor: QmProc,
 
         if len(retry) > 0:
             # Rebalancing necessary
+            retry_jobs = [jobs[i] for i in retry]
             if balance:
-                set_omp_chunking([jobs[i] for i in retry])
+                set_omp_balanced(retry_jobs, prog, schedule)
 
-            for i, job in zip([i for i in retry],
-                              dqp([jobs[i] for i in retry], processor)):
-                jobs[i] = job
+            # dqp returns the jobs in order of completion
+            index = {jobs[i].conf.name: i for i in retry}
+            for job in dqp(retry_jobs, processor, balance=balance, **kwargs):
+                jobs[index[job.conf.name]] = job
 
         # any jobs that still failed will lead to the conformer being marked as unrecoverable
         failed_confs = []
@@ -67,6 +67,8 @@ ASSETS_PATH = __file__.replace("params.py", "assets")
 
 USER_ASSETS_PATH = os.path.join(os.path.expanduser("~"), ".censo2_assets")
 
+CACHE_PATH = os.path.join(USER_ASSETS_PATH, "cache")
+
 PROGS = ("orca", "tm")
 
 SOLV_MODS: dict[str, tuple] = {
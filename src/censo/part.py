@@ -1,5 +1,4 @@
 import functools
-import json
 import os
 import ast
 from collections.abc import Callable
@@ -11,7 +10,10 @@ from .params import (
     OMPMIN,
     OMPMAX,
 )
+from .journal import JOURNAL
 from .logging import setup_logger
+from .profiling import PROFILE_EXT, PROFILE_MODES, Profiler
+from .results import RESULTS_STREAM, ResultsStream, ResultsTable
 from .utilities import print, h1, h2
 
 logger = setup_logger(__name__)
@@ -90,6 +92,45 @@ class CensoPart:
         "trange": {
             "default": [273.15, 373.15, 5]
         },
+        "cache": {
+            "default": False
+        },
+        "cache_size": {
+            "default": 2048
+        },
+        "resume": {
+            "default": True
+        },
+        "schedule": {
+            "default": "chunked",
+            "options": ["chunked", "duration"]
+        },
+        "executor": {
+            "default": "process",
+            "options": ["process", "thread", "distributed", "slurm", "pbs"]
+        },
+        "hosts": {
+            "default": ["localhost"]
+        },
+        "batch_args": {
+            "default": ""
+        },
+        "npz": {
+            "default": False
+        },
+        "profile": {
+            "default": "off",
+            "options": PROFILE_MODES
+        },
+        "prune": {
+            "default": False
+        },
+        "prune_rmsd": {
+            "default": 0.125
+        },
+        "prune_ethr": {
+            "default": 0.05
+        },
     }
 
     _settings = {}
@@ -292,7 +333,27 @@ class CensoPart:
                 raise RuntimeError(
                     f"Could not create directory for {self._name}.")
 
-            return runner(self, *args, **kwargs)
+            # start a new results stream (results of previous runs are in the journal)
+            stream = os.path.join(self.dir, RESULTS_STREAM)
+            if os.path.isfile(stream):
+                os.remove(stream)
+
+            # profile the part if requested (the job profiles are collected in censo.parallel.execute)
+            mode = CensoPart._settings.get("profile", "off")
+            for ext in PROFILE_EXT.values():
+                if os.path.isfile(os.path.join(self.dir,
+                                               f"profile_jobs{ext}")):
+                    os.remove(os.path.join(self.dir, f"profile_jobs{ext}"))
+
+            # the journal of an interrupted run is kept for resuming, otherwise every run starts a fresh journal
+            # (journals of completed parts are kept until the whole run is complete, see censo.journal.remove_journals)
+            journal = os.path.join(self.dir, JOURNAL)
+            if not CensoPart._settings.get("resume", False) and os.path.isfile(
+                    journal):
+                os.remove(journal)
+
+            with Profiler(mode, os.path.join(self.dir, "profile_part")):
+                return runner(self, *args, **kwargs)
 
         return wrapper
 
@@ -342,16 +403,23 @@ class CensoPart:
 
     def write_json(self) -> None:
         """
-        Writes the part's results to a json file.
+        Writes the part's results to a json file (by compacting the results stream, see ResultsStream) and, if the
+        'npz' setting is enabled, to a npz file (see ResultsTable).
 
         Returns:
             None
         """
-        results = {
-            conf.name: conf.results[self._name]
-            for conf in self.ensemble.conformers
-        }
+        # the results of the jobs are already streamed, the final results of the part take precedence
+        stream = ResultsStream(os.path.join(self.dir, RESULTS_STREAM))
         filename = f"{self._part_no}_{self._name.upper()}.json"
-        with open(os.path.join(self.ensemble.workdir, filename),
-                  "w") as outfile:
-            json.dump(results, outfile, indent=4)
+        stream.compact(os.path.join(self.ensemble.workdir, filename),
+                       [(conf.name, conf.results[self._name])
+                        for conf in self.ensemble.conformers])
+
+        # also export the results in columnar form for analysis (if requested)
+        if CensoPart._settings.get("npz", False):
+            table = ResultsTable.from_conformers(self.ensemble.conformers,
+                                                 self._name)
+            table.to_npz(
+                os.path.join(self.ensemble.workdir,
+                             f"{self._part_no}_{self._name.upper()}.npz"))
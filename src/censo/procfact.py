@@ -12,6 +12,14 @@ class ProcessorFactory:
         #    "tm": TmProc,
     }
 
+    @classmethod
+    def register(cls, prog: str, proctype: type) -> None:
+        """
+        Makes an additional processor type available under the name 'prog' (e.g. the fake processor
+        censo.synthetic_processor.SyntheticProc, which is registered by the benchmarks and tests using it).
+        """
+        cls.__proctypes[prog] = proctype
+
     @classmethod
     def create_processor(cls, prog, *args, **kwargs) -> QmProc:
         """
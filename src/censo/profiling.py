@@ -0,0 +1,167 @@
+"""
+Opt-in profiling of the parts and of the jobs run by the processors. Two modes are available:
+    "cprofile": deterministic profiling with cProfile, written as pstats file (<path>.pstats),
+    "sampling": the stack of the profiled thread is sampled periodically, written in collapsed-stack format
+                (<path>.collapsed, one "frame;frame;... count" line per stack, as read by flamegraph.pl or speedscope).
+"""
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+
+from .logging import setup_logger
+
+logger = setup_logger(__name__)
+
+PROFILE_MODES = ["off", "cprofile", "sampling"]
+
+# file extension per mode
+PROFILE_EXT = {
+    "cprofile": ".pstats",
+    "sampling": ".collapsed",
+}
+
+
+class Profiler:
+    """
+    Context manager profiling the thread that enters it and writing the profile to a file on exit.
+
+    Usage:
+        with Profiler("sampling", os.path.join(partdir, "profile_part")):
+            ...
+    """
+
+    def __init__(self, mode: str, path: str, interval: float = 0.005):
+        """
+        Args:
+            mode (str): One of PROFILE_MODES ("off" disables profiling).
+            path (str): Path of the profile file without extension (see PROFILE_EXT).
+            interval (float, optional): Seconds between two samples in sampling mode.
+        """
+        self.mode: str = mode
+        self.path: str = path
+        self.interval: float = interval
+
+        self.stacks: Counter = Counter()
+
+        self.__profile: cProfile.Profile | None = None
+        self.__sampler: threading.Thread | None = None
+        self.__stop = threading.Event()
+        self.__thread_id: int | None = None
+
+    def __enter__(self):
+        if self.mode == "cprofile":
+            self.__profile = cProfile.Profile()
+            try:
+                self.__profile.enable()
+            except ValueError as e:
+                # another profiler is already active in this thread (e.g. nested profiling with the thread backend)
+                logger.debug(f"Could not start profiler for {self.path}: {e}")
+                self.__profile = None
+        elif self.mode == "sampling":
+            self.__thread_id = threading.get_ident()
+            self.__sampler = threading.Thread(target=self.__sample,
+                                              daemon=True)
+            self.__sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.__profile is not None:
+            self.__profile.disable()
+        if self.__sampler is not None:
+            self.__stop.set()
+            self.__sampler.join()
+
+        try:
+            self.dump()
+        except OSError as e:
+            logger.warning(f"Could not write profile {self.path}: {e}")
+        return False
+
+    def dump(self) -> None:
+        """
+        Writes the profile (nothing is written if profiling is disabled).
+        """
+        if self.__profile is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)),
+                        exist_ok=True)
+            self.__profile.dump_stats(self.path + PROFILE_EXT["cprofile"])
+        elif self.mode == "sampling":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)),
+                        exist_ok=True)
+            write_collapsed(self.stacks,
+                            self.path + PROFILE_EXT["sampling"])
+
+    def __sample(self) -> None:
+        while not self.__stop.wait(self.interval):
+            frame = sys._current_frames().get(self.__thread_id, None)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if len(stack) > 0:
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+def write_collapsed(stacks: Counter, path: str) -> None:
+    """
+    Writes stack counts in collapsed-stack format (heaviest stacks first).
+    """
+    with open(path, "w") as file:
+        for stack, count in stacks.most_common():
+            file.write(f"{stack} {count}\n")
+
+
+def read_collapsed(path: str) -> Counter:
+    """
+    Reads stack counts written by write_collapsed.
+    """
+    stacks = Counter()
+    with open(path, "r") as file:
+        for line in file:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack != "":
+                stacks[stack] += int(count)
+    return stacks
+
+
+def merge_profiles(paths: list[str], path: str, mode: str) -> None:
+    """
+    Merges the profiles of several jobs into one profile (adding to it if it already exists) and removes the job
+    profiles afterwards.
+
+    Args:
+        paths (list[str]): Paths of the job profiles without extension (missing profiles are skipped).
+        path (str): Path of the merged profile without extension.
+        mode (str): Profiling mode of the profiles (see PROFILE_MODES).
+
+    Returns:
+        None
+    """
+    if mode not in PROFILE_EXT:
+        return
+
+    ext = PROFILE_EXT[mode]
+    files = [p + ext for p in paths if os.path.isfile(p + ext)]
+    if len(files) == 0:
+        return
+    if os.path.isfile(path + ext):
+        files.insert(0, path + ext)
+
+    if mode == "cprofile":
+        stats = pstats.Stats(*files)
+        stats.dump_stats(path + ext)
+    else:
+        stacks = Counter()
+        for file in files:
+            stacks.update(read_collapsed(file))
+        write_collapsed(stacks, path + ext)
+
+    for file in files:
+        if file != path + ext:
+            os.remove(file)
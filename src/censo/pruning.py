@@ -0,0 +1,145 @@
+"""
+Detection of duplicate conformers (e.g. rotamers or near-identical geometries from CREST) by RMSD after Kabsch
+alignment, gated by the energy difference. All pairs within the energy window are compared in batches with NumPy.
+"""
+import numpy as np
+
+# maximum number of pairs aligned at once (bounds the memory of the batches)
+PAIR_CHUNK = 65536
+
+
+def kabsch_rmsd(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    RMSD of the pairs of centered geometries a[k] and b[k] after optimal superposition (Kabsch).
+    The rotation is not constructed, the RMSD follows from the singular values of the covariance matrices.
+
+    Args:
+        a (np.ndarray): Centered geometries of shape (npairs, nat, 3).
+        b (np.ndarray): Centered geometries of shape (npairs, nat, 3).
+
+    Returns:
+        np.ndarray: RMSD per pair of shape (npairs,).
+    """
+    return _rmsd(a, b, (a * a).sum(axis=(1, 2)), (b * b).sum(axis=(1, 2)))
+
+
+def _rmsd(a: np.ndarray, b: np.ndarray, norm_a: np.ndarray,
+          norm_b: np.ndarray) -> np.ndarray:
+    """
+    Same as kabsch_rmsd with the squared norms of the geometries given.
+    """
+    h = np.matmul(a.transpose(0, 2, 1), b)
+    msd = (norm_a + norm_b - 2.0 * _singular_sum(h)) / a.shape[1]
+    return np.sqrt(np.maximum(msd, 0.0))
+
+
+def _singular_sum(h: np.ndarray) -> np.ndarray:
+    """
+    Sum of the singular values of the 3x3 matrices h, the smallest one with the sign of det(h) (reflections are not
+    allowed).
+    The singular values are the square roots of the eigenvalues of h^T h, which are computed in closed form
+    (trigonometric solution of the characteristic polynomial), since the batched SVD of LAPACK is much slower for 3x3
+    matrices.
+    """
+    m = np.matmul(h.transpose(0, 2, 1), h)
+    q = np.trace(m, axis1=1, axis2=2) / 3.0
+    offdiag = m[:, 0, 1]**2 + m[:, 0, 2]**2 + m[:, 1, 2]**2
+    p = np.sqrt(((m[:, 0, 0] - q)**2 + (m[:, 1, 1] - q)**2 +
+                 (m[:, 2, 2] - q)**2 + 2.0 * offdiag) / 6.0)
+
+    # for p = 0 all eigenvalues are equal to q
+    safe = np.where(p > 0.0, p, 1.0)
+    c = (m - q[:, None, None] * np.eye(3)) / safe[:, None, None]
+    r = np.clip(_det(c) / 2.0, -1.0, 1.0)
+    phi = np.arccos(r) / 3.0
+
+    largest = q + 2.0 * p * np.cos(phi)
+    smallest = q + 2.0 * p * np.cos(phi + 2.0 * np.pi / 3.0)
+    middle = 3.0 * q - largest - smallest
+
+    s = np.sqrt(np.maximum(np.stack([largest, middle, smallest]), 0.0))
+    return s[0] + s[1] + np.where(_det(h) < 0, -s[2], s[2])
+
+
+def _det(m: np.ndarray) -> np.ndarray:
+    """
+    Determinants of the 3x3 matrices m (explicitly, np.linalg.det uses a LU decomposition per matrix).
+    """
+    return (m[:, 0, 0] * (m[:, 1, 1] * m[:, 2, 2] - m[:, 1, 2] * m[:, 2, 1]) -
+            m[:, 0, 1] * (m[:, 1, 0] * m[:, 2, 2] - m[:, 1, 2] * m[:, 2, 0]) +
+            m[:, 0, 2] * (m[:, 1, 0] * m[:, 2, 1] - m[:, 1, 1] * m[:, 2, 0]))
+
+
+def find_duplicates(coords: np.ndarray,
+                    energies: np.ndarray,
+                    rmsd_threshold: float,
+                    energy_threshold: float,
+                    chunk: int = PAIR_CHUNK) -> np.ndarray:
+    """
+    Clusters the geometries, every geometry is assigned to the lowest-energy geometry that has an energy difference of
+    at most energy_threshold and an RMSD below rmsd_threshold and is not a duplicate itself.
+    Pairs are only aligned if their energies are close enough and if the difference of their radii of gyration does
+    not exceed the RMSD threshold (a lower bound of the RMSD).
+
+    Args:
+        coords (np.ndarray): Geometries of shape (nconf, nat, 3) with the same order of atoms.
+        energies (np.ndarray): Energies of shape (nconf,).
+        rmsd_threshold (float): RMSD below which two geometries are considered duplicates (same unit as coords).
+        energy_threshold (float): Maximum energy difference of duplicates (same unit as energies).
+        chunk (int, optional): Maximum number of pairs aligned at once.
+
+    Returns:
+        np.ndarray: Index of the geometry every geometry is assigned to (its own index if it is kept).
+    """
+    n, nat = coords.shape[:2]
+    leader = np.arange(n)
+    if n < 2:
+        return leader
+
+    # work in the order of increasing energy, so that for every pair (i, j) with i < j, i is the lower one
+    order = np.argsort(energies, kind="stable")
+    e = np.asarray(energies, dtype=np.float64)[order]
+    x = np.asarray(coords, dtype=np.float64)[order]
+    x = x - x.mean(axis=1, keepdims=True)
+    norms = (x * x).sum(axis=(1, 2))
+    rg = np.sqrt(norms / nat)
+
+    # every geometry i is paired with the following ones up to the end of its energy window
+    counts = np.searchsorted(e, e + energy_threshold,
+                             side="right") - np.arange(n) - 1
+    ends = np.cumsum(counts)
+
+    neighbours = [[] for _ in range(n)]
+    first = 0
+    while first < n:
+        # take as many geometries as fit into one chunk of pairs (at least one)
+        last = max(
+            first + 1,
+            int(np.searchsorted(ends, ends[first] - counts[first] + chunk,
+                                side="right")))
+        nrows = counts[first:last]
+        total = int(nrows.sum())
+        if total > 0:
+            i = np.repeat(np.arange(first, last), nrows)
+            j = i + 1 + np.arange(total) - np.repeat(
+                np.cumsum(nrows) - nrows, nrows)
+
+            close = np.abs(rg[i] - rg[j]) < rmsd_threshold
+            i, j = i[close], j[close]
+            if len(i) > 0:
+                duplicate = _rmsd(x[i], x[j], norms[i],
+                                  norms[j]) < rmsd_threshold
+                for a, b in zip(i[duplicate].tolist(),
+                                j[duplicate].tolist()):
+                    neighbours[b].append(a)
+        first = last
+
+    # every geometry is assigned to its lowest-energy duplicate that is kept
+    for b in range(n):
+        kept = [a for a in neighbours[b] if leader[a] == a]
+        if len(kept) > 0:
+            leader[b] = min(kept)
+
+    result = np.empty(n, dtype=np.int64)
+    result[order] = order[leader]
+    return result
@@ -3,13 +3,19 @@ Contains QmProc base class,
 Additionally contains functions which should be present irrespective of the QM
 code. (xTB always available)
 """
+import asyncio
+import contextvars
+import copy
 import json
 import os
 import signal
+import socket
 import subprocess
+import threading
 from time import perf_counter
 from collections.abc import Callable
 
+from .cache import ResultCache
 from .datastructure import ParallelJob
 from .params import (
     ENVIRON,
@@ -19,16 +25,120 @@ from .params import (
     DIGILEN,
     WARNLEN,
 )
+from .profiling import Profiler
+from .tracing import now_us
 from .utilities import print, frange
 from .logging import setup_logger
+from .xtb_parser import parse_xtb_output
 
 logger = setup_logger(__name__)
 
 
-def handle_sigterm(signum, frame, sub):
+# external programs currently running in this process (possibly started from several threads)
+_running: set[subprocess.Popen] = set()
+_running_lock = threading.Lock()
+
+
+# resource usage of the external program calls of the calculation currently run (set in QmProc.run, the list is
+# shared with the threads of QmProc._run_concurrently since asyncio.to_thread copies the context)
+_usage: contextvars.ContextVar[list[dict] | None] = contextvars.ContextVar(
+    "usage", default=None)
+
+
+# spans (jobtypes and external program calls) of the job currently run, see censo.tracing
+_spans: contextvars.ContextVar[list[dict] | None] = contextvars.ContextVar(
+    "spans", default=None)
+
+
+def record_span(name: str, cat: str, start: int, **args) -> None:
+    """
+    Records a span ending now for the job currently run (nothing happens outside of QmProc.run).
+
+    Args:
+        name (str): Name of the span.
+        cat (str): Category of the span (e.g. "jobtype" or "call").
+        start (int): Start time in microseconds (see censo.tracing.now_us).
+        **args: Further information shown with the span.
+
+    Returns:
+        None
+    """
+    spans = _spans.get()
+    if spans is not None:
+        spans.append({
+            "name": name,
+            "cat": cat,
+            "start": start,
+            "end": now_us(),
+            "tid": threading.get_native_id(),
+            "args": args,
+        })
+
+
+def wait_with_usage(sub: subprocess.Popen) -> dict[str, float] | None:
+    """
+    Waits for a subprocess via os.wait4 to obtain its resource usage (including all of its own children it waited
+    for, e.g. the MPI processes of ORCA).
+
+    Args:
+        sub (subprocess.Popen): The subprocess (its returncode is set).
+
+    Returns:
+        dict[str, float] | None: user and system CPU time (s), peak RSS of the largest single process (bytes) and
+            bytes read from/written to disk (from the block counts), None if the usage could not be obtained.
+    """
+    try:
+        _, status, rusage = os.wait4(sub.pid, 0)
+    except (AttributeError, ChildProcessError):
+        # no wait4 on this platform or the process was already reaped (e.g. when it was terminated)
+        sub.wait()
+        return None
+
+    sub.returncode = os.waitstatus_to_exitcode(status)
+    return {
+        "utime": rusage.ru_utime,
+        "stime": rusage.ru_stime,
+        # ru_maxrss is given in kB on Linux
+        "maxrss": rusage.ru_maxrss * 1024,
+        # block counts are given in units of 512 bytes
+        "read_bytes": rusage.ru_inblock * 512,
+        "write_bytes": rusage.ru_oublock * 512,
+    }
+
+
+def sum_usage(usages: list[dict[str, float]]) -> dict[str, float]:
+    """
+    Aggregates the resource usage of several calls (times and I/O are summed up, the peak RSS is the maximum).
+    """
+    total = {
+        "utime": 0.0,
+        "stime": 0.0,
+        "maxrss": 0,
+        "read_bytes": 0,
+        "write_bytes": 0,
+        "calls": 0,
+    }
+    for usage in usages:
+        for key in ["utime", "stime", "read_bytes", "write_bytes"]:
+            total[key] += usage[key]
+        total["maxrss"] = max(total["maxrss"], usage["maxrss"])
+        total["calls"] += usage.get("calls", 1)
+    return total
+
+
+def terminate_running() -> None:
+    """
+    Sends SIGTERM to all external programs currently running in this process.
+    """
+    with _running_lock:
+        for sub in _running:
+            sub.send_signal(signal.SIGTERM)
+
+
+def handle_sigterm(signum, frame):
     logger.critical(
         f"{f'worker{os.getpid()}:':{WARNLEN}}Received SIGTERM. Terminating.")
-    sub.send_signal(signal.SIGTERM)
+    terminate_running()
 
 
 class QmProc:
@@ -40,6 +150,7 @@ class QmProc:
         "orcapath": "",
         "orcaversion": "",
         "xtbpath": "",
+        "xtbversion": "",
         "crestpath": "",
         "cosmorssetup": "",
         "dbpath": "",
@@ -60,6 +171,29 @@ class QmProc:
         ]
     }
 
+    # prepinfo sections that are relevant for the results of each jobtype (used to build cache keys)
+    _cache_sections = {
+        "xtb_sp": ["xtb_sp"],
+        "xtb_gsolv": ["xtb_sp"],
+        "xtb_rrho": ["xtb_rrho"],
+    }
+
+    # general settings that affect the results of a calculation (all others are ignored for cache keys)
+    _cache_settings = [
+        "temperature",
+        "trange",
+        "multitemp",
+        "solvent",
+        "sm_rrho",
+        "gas-phase",
+        "bhess",
+        "consider_sym",
+        "rmsdbias",
+        "imagthr",
+        "sthr",
+        "scale",
+    ]
+
     @classmethod
     def print_paths(cls) -> None:
         """
@@ -97,9 +231,15 @@ class QmProc:
 
         self.workdir = workdir
 
+        # persistent result cache, set up in censo.parallel.execute if enabled
+        self.cache: ResultCache | None = None
+
+        # profiling mode for the jobs (see censo.profiling), set in censo.parallel.execute
+        self.profile: str = "off"
+
     def run(self, job: ParallelJob) -> ParallelJob:
         """
-        Run methods depending on jobtype.
+        Run methods depending on jobtype (profiled if enabled, see censo.profiling).
         DO NOT OVERRIDE OR OVERLOAD! this will break e.g. censo.parallel.execute
 
         Args:
@@ -108,6 +248,33 @@ class QmProc:
         Returns:
             job (ParallelJob): job with results
         """
+        # record the spans of the job for the timeline (see censo.tracing)
+        trace = {
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            "omp": job.omp,
+            "start": now_us(),
+            "spans": [],
+        }
+        token = _spans.set(trace["spans"])
+        try:
+            with Profiler(self.profile, self.profile_path(job)):
+                job = self.__run(job)
+        finally:
+            _spans.reset(token)
+        trace["end"] = now_us()
+        job.meta["trace"] = trace
+
+        return job
+
+    def profile_path(self, job: ParallelJob) -> str:
+        """
+        Path of the profile of a job (without extension).
+        """
+        return os.path.join(self.workdir, job.conf.name, "profile")
+
+    def __run(self, job: ParallelJob) -> ParallelJob:
         logger.debug(
             f"{f'worker{os.getpid()}:':{WARNLEN}}Running on {job.omp} cores.")
         # jobtype is basically an ordered (!!!) (important e.g. if sp is required before the next step)
@@ -122,14 +289,48 @@ class QmProc:
             # Create jobdir
             jobdir = self._create_jobdir(job.conf.name, j)
 
-            # Time execution
+            # Time execution and collect the resource usage of all external program calls
             start = perf_counter()
-
-            logger.info(
-                f"{f'worker{os.getpid()}:':{WARNLEN}}Running {j} calculation in {jobdir}."
-            )
-            print(f"Running {j} calculation for {job.conf.name}.")
-            job.results[j], job.meta[j] = self._jobtypes[j](job, jobdir)
+            span_start = now_us()
+            usages = []
+
+            # Look up the result in the cache first
+            cached = None
+            if self.cache is not None:
+                key = self._cache_key(job, j)
+                cached = self.cache.get(key)
+
+            if cached is not None:
+                logger.info(
+                    f"{f'worker{os.getpid()}:':{WARNLEN}}Using cached {j} result for {job.conf.name}."
+                )
+                print(f"Using cached {j} result for {job.conf.name}.")
+                job.results[j], job.meta[j] = cached
+
+                # MO-files might have been removed in the meantime
+                mo_path = job.meta[j].get("mo_path", None)
+                if mo_path is not None and not os.path.isfile(mo_path):
+                    job.meta[j]["mo_path"] = None
+
+                # Jobtypes that modify the geometry also have to do so on a cache hit,
+                # since following jobtypes depend on it
+                if job.results[j].get("geom", None) is not None:
+                    job.conf.xyz = job.results[j]["geom"]
+            else:
+                logger.info(
+                    f"{f'worker{os.getpid()}:':{WARNLEN}}Running {j} calculation in {jobdir}."
+                )
+                print(f"Running {j} calculation for {job.conf.name}.")
+                token = _usage.set(usages)
+                try:
+                    job.results[j], job.meta[j] = self._jobtypes[j](job,
+                                                                     jobdir)
+                finally:
+                    _usage.reset(token)
+
+                # Only successful calculations are cached, so that failed jobs can be retried
+                if self.cache is not None and job.meta[j]["success"]:
+                    self.cache.put(key, job.results[j], job.meta[j])
 
             # Copy mo path if possible to be used for further calculations
             # (processors grab the mo path from the 'mo_path' key that is always present in the meta dict)
@@ -139,12 +340,20 @@ class QmProc:
             end = perf_counter()
 
             job.meta[j]["time"] = end - start
+            record_span(j,
+                        "jobtype",
+                        span_start,
+                        cached=cached is not None,
+                        success=job.meta[j]["success"])
+            job.meta[j]["usage"] = sum_usage(usages)
+            # cached results should not be used to predict runtimes
+            job.meta[j]["cached"] = cached is not None
 
             # if a calculation failed all following calculations will not be executed
             if not job.meta[j]["success"]:
                 for j2 in job.jobtype[job.jobtype.index(j) + 1:]:
                     job.results[j2] = None
-                    job.meta[j2]["success"] = False
+                    job.meta.setdefault(j2, {})["success"] = False
                     job.meta[j2]["error"] = "Previous calculation failed"
                 break
 
@@ -155,6 +364,54 @@ class QmProc:
         # returns modified job object with result dict e.g.: {"sp": ..., "gsolv": ..., etc.}
         return job
 
+    def _cache_key(self, job: ParallelJob, jobtype: str) -> str:
+        """
+        Creates the key for the result cache. The key depends on the geometry, the jobtype, the prepinfo sections
+        relevant for the jobtype, charge and multiplicity, flags and the versions of the external programs.
+
+        Args:
+            job (ParallelJob): job to create the key for
+            jobtype (str): jobtype to create the key for
+
+        Returns:
+            str: the key
+        """
+        general = {
+            setting: job.prepinfo["general"][setting]
+            for setting in self._cache_settings
+            if setting in job.prepinfo["general"]
+        }
+        sections = {
+            section: job.prepinfo[section]
+            for section in self._cache_sections.get(jobtype, [jobtype])
+            if section in job.prepinfo
+        }
+        programs = {
+            path: self._paths[path]
+            for path in ["orcapath", "orcaversion", "xtbpath", "xtbversion"]
+        }
+
+        return ResultCache.make_key(
+            self.__class__.__name__,
+            jobtype,
+            job.conf.elements.tolist(),
+            job.conf.coords.tolist(),
+            job.prepinfo["charge"],
+            job.prepinfo["unpaired"],
+            general,
+            sections,
+            job.flags.get(jobtype, None),
+            programs,
+            self._cache_extra(job, jobtype),
+        )
+
+    def _cache_extra(self, job: ParallelJob, jobtype: str) -> dict[str, any]:
+        """
+        Additional information to be included in the cache key, e.g. hashes of input files that are read by the
+        processor. Can be overridden by processors.
+        """
+        return {}
+
     def _make_call(self, prog: str, call: list, outputpath: str,
                    jobdir: str) -> tuple[int, str]:
         """
@@ -187,6 +444,7 @@ class QmProc:
                 f"{f'worker{os.getpid()}:':{WARNLEN}}Running {call}...")
 
             # create subprocess for external program
+            start = now_us()
             sub = subprocess.Popen(
                 [self._paths[pathmap[prog]]] + call,
                 shell=False,
@@ -203,18 +461,76 @@ class QmProc:
             )
 
             # make sure to send SIGTERM to subprocess if program is quit
-            signal.signal(
-                signal.SIGTERM,
-                lambda signum, frame: handle_sigterm(signum, frame, sub))
-
-            # wait for process to finish
-            _, errors = sub.communicate()
+            # (signal handlers can only be set from the main thread, when running in a thread the handler of the
+            # main thread takes care of this via terminate_running)
+            with _running_lock:
+                _running.add(sub)
+            if threading.current_thread() is threading.main_thread():
+                signal.signal(signal.SIGTERM, handle_sigterm)
+
+            # wait for process to finish (stdout goes to the outputfile, so only stderr has to be read)
+            try:
+                errors = sub.stderr.read()
+                sub.stderr.close()
+                usage = wait_with_usage(sub)
+            finally:
+                with _running_lock:
+                    _running.discard(sub)
             returncode = sub.returncode
 
+            # record the resource usage for the calculation
+            usages = _usage.get()
+            if usage is not None and usages is not None:
+                usages.append(usage)
+            record_span(prog,
+                        "call",
+                        start,
+                        call=" ".join(call),
+                        returncode=returncode)
+
             logger.debug(f"{f'worker{os.getpid()}:':{WARNLEN}}Done.")
 
         return returncode, errors
 
+    @staticmethod
+    def _run_concurrently(
+            job: ParallelJob, calls: list[tuple[Callable, dict]]
+    ) -> list[tuple[dict[str, any], dict[str, any]]]:
+        """
+        Runs independent sub-calculations of a job concurrently, splitting the cores of the job between them.
+        NOTE: this is only used for the gas-phase and solvated single-points of gsolv (xtb and ORCA), there is no general
+        graph of the jobtypes of a conformer, i.e. all other jobtypes of a job still run one after another.
+
+        Args:
+            job (ParallelJob): job the sub-calculations belong to
+            calls (list[tuple[Callable, dict]]): methods with their keyword arguments, every method is called as
+                method(subjob, **kwargs) where subjob is a copy of job with its share of the cores
+
+        Returns:
+            list[tuple[dict[str, any], dict[str, any]]]: result and meta of every call (in the same order)
+        """
+        # not enough cores to split
+        if job.omp < len(calls):
+            return [method(job, **kwargs) for method, kwargs in calls]
+
+        subjobs = []
+        for i in range(len(calls)):
+            subjob = copy.copy(job)
+            subjob.omp = job.omp // len(calls) + (i < job.omp % len(calls))
+            subjobs.append(subjob)
+
+        async def gather():
+            return await asyncio.gather(*[
+                asyncio.to_thread(method, subjob, **kwargs)
+                for subjob, (method, kwargs) in zip(subjobs, calls)
+            ])
+
+        # the programs are started from other threads, so the signal handler has to be set here
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, handle_sigterm)
+
+        return list(asyncio.run(gather()))
+
     def _create_jobdir(self, confname: str, job: str) -> str:
         """
         Creates a subdir in confdir for the job.
@@ -358,13 +674,11 @@ class QmProc:
             return result, meta
 
         # read energy from outputfile
-        with open(outputpath, "r", encoding=CODING,
-                  newline=None) as outputfile:
-            for line in outputfile.readlines():
-                if "| TOTAL ENERGY" in line:
-                    result["energy"] = float(line.split()[3])
-                    meta["success"] = True
-                # TODO - important - what to do if calculation not converged?
+        output = parse_xtb_output(outputpath)
+        if output["energy"] is not None:
+            result["energy"] = output["energy"]
+            meta["success"] = True
+        # TODO - important - what to do if calculation not converged?
 
         # FIXME - right now the case meta["success"] = None might appear if "TOTAL ENERGY" is not found in outputfile
         return result, meta
@@ -374,6 +688,9 @@ class QmProc:
             jobdir: str) -> tuple[dict[str, float | None], dict[str, any]]:
         """
         Calculate additive GBSA or ALPB solvation using GFNn-xTB or GFN-FF.
+        The gas-phase and solvated single-points run concurrently in their own subdirectories of the jobdir, i.e. their
+        files are found in '<jobdir>/gas/gas.*' and '<jobdir>/solv/solv.*' (both used to be written into the jobdir
+        directly).
 
         Args:
             job (ParallelJob): job to run
@@ -400,25 +717,28 @@ class QmProc:
             "error": None,
         }
 
-        # run gas-phase GFN single-point
-        spres, spmeta = self._xtb_sp(job, jobdir, filename="gas", no_solv=True)
-        if spmeta["success"]:
-            result["energy_xtb_gas"] = spres["energy"]
-        else:
-            meta["success"] = False
-            meta["error"] = spmeta["error"]
-            return result, meta
-
-        # run single-point in solution:
+        # run gas-phase and solvated GFN single-points concurrently
+        # (in separate directories, since xtb writes files like 'charges' or 'wbo' into the working directory)
         # ''reference'' corresponds to 1\;bar of ideal gas and 1\;mol/L of liquid
         #   solution at infinite dilution,
-        spres, spmeta = self._xtb_sp(job, jobdir, filename="solv")
-        if spmeta["success"]:
-            result["energy_xtb_solv"] = spres["energy"]
-        else:
-            meta["success"] = False
-            meta["error"] = spmeta["error"]
-            return result, meta
+        calls = []
+        for filename in ["gas", "solv"]:
+            subdir = os.path.join(jobdir, filename)
+            os.makedirs(subdir, exist_ok=True)
+            calls.append((self._xtb_sp, {
+                "jobdir": subdir,
+                "filename": filename,
+                "no_solv": filename == "gas"
+            }))
+
+        for (spres, spmeta), key in zip(self._run_concurrently(job, calls),
+                                        ["energy_xtb_gas", "energy_xtb_solv"]):
+            if spmeta["success"]:
+                result[key] = spres["energy"]
+            else:
+                meta["success"] = False
+                meta["error"] = spmeta["error"]
+                return result, meta
 
         # only reached if both gas-phase and solvated sp succeeded
         result["gsolv"] = result["energy_xtb_solv"] - result["energy_xtb_gas"]
@@ -588,10 +908,8 @@ class QmProc:
                 f"Job for {job.conf.name} failed. Stderr output:\n{errors}")
             return result, meta
 
-        # read output and store lines
-        with open(outputpath, "r", encoding=CODING,
-                  newline=None) as outputfile:
-            lines = outputfile.readlines()
+        # read output
+        output = parse_xtb_output(outputpath)
 
         if job.prepinfo["general"]["multitemp"]:
             # get gibbs energy, enthalpy and entropy for given temperature range
@@ -601,48 +919,17 @@ class QmProc:
                 step=job.prepinfo["general"]["trange"][2],
             )
 
-            # gibbs energy
-            gt = {}
-
-            # enthalpy
-            ht = {}
-
-            # Get Gibbs energy and enthalpy
-            for line in lines:
-                if "T/K" in line:
-                    for line2 in lines[lines.index(line) + 2:]:
-                        if "----------------------------------" in line2:
-                            break
-
-                        T = float(line2.split()[0])
-                        gt[T] = float(line2.split()[4])
-                        ht[T] = float(line2.split()[2])
-
-            # rotational entropy
-            rotS = {}
-
-            # Get rotational entropy
-            entropy_lines = ((line, lines[i + 1])
-                             for i, line in enumerate(lines) if "VIB" in line)
-            for line in entropy_lines:
-                T = float(line[0].split()[0])
-                rotS[T] = float(line[1].split()[4])
+            # gibbs energy, enthalpy and rotational entropy
+            gt = output["gibbs"]
+            ht = output["enthalpy"]
+            rotS = output["entropy"]
 
         # Extract symmetry
-        result["linear"] = next(
-            ({
-                "true": True,
-                "false": False
-            }[line.split()[2]] for line in lines if ":  linear? " in line),
-            None,
-        )
+        result["linear"] = output["linear"]
 
         # Extract rmsd
-        result["rmsd"] = next(
-            (float(line.split()[3]) for line in lines
-             if "final rmsd / " in line and job.prepinfo["general"]["bhess"]),
-            None,
-        )
+        result["rmsd"] = (output["rmsd"]
+                          if job.prepinfo["general"]["bhess"] else None)
 
         # check if xtb calculated the temperature range correctly
         if job.prepinfo["general"]["multitemp"] and not (
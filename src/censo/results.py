@@ -0,0 +1,315 @@
+"""
+Columnar view of the results of the conformers, one column per (part, jobtype, quantity) with the conformers as rows,
+and streaming of the results of a part to disk.
+"""
+import json
+import os
+import tempfile
+from numbers import Real
+
+import numpy as np
+
+from .datastructure import MoleculeData
+from .logging import setup_logger
+
+logger = setup_logger(__name__)
+
+# key of the row names in npz files
+ROWS = "__rows__"
+
+# name of the results stream in the directory of a part
+RESULTS_STREAM = "results.jsonl"
+
+
+class ResultsTable:
+    """
+    Table of the results of an ensemble. Every quantity found in MoleculeData.results[part][jobtype][quantity] becomes
+    one column, quantities stored directly in MoleculeData.results[part] (e.g. "gtot" or "bmw") are found under the
+    jobtype "". Numeric columns are float64 arrays (missing values are NaN), all other columns are object arrays
+    (missing values are None).
+    """
+
+    def __init__(self, rows: list[str]):
+        """
+        Args:
+            rows (list[str]): The names of the conformers.
+        """
+        self.rows: list[str] = list(rows)
+        self.__columns: dict[tuple[str, str, str], np.ndarray] = {}
+
+    @classmethod
+    def from_conformers(cls,
+                        conformers: list[MoleculeData],
+                        part: str = None) -> "ResultsTable":
+        """
+        Collects the results of the conformers into a table.
+
+        Args:
+            conformers (list[MoleculeData]): The conformers (rows of the table).
+            part (str, optional): Only collect the results of this part. Defaults to None (all parts).
+
+        Returns:
+            ResultsTable: The table.
+        """
+        table = cls([conf.name for conf in conformers])
+
+        # first gather the values column by column, the arrays are created at once afterwards
+        values: dict[tuple[str, str, str], list] = {}
+        for i, conf in enumerate(conformers):
+            for partname, presults in conf.results.items():
+                if part is not None and partname != part:
+                    continue
+                for key, result in presults.items():
+                    if isinstance(result, dict):
+                        items = [((partname, key, quantity), value)
+                                 for quantity, value in result.items()]
+                    else:
+                        items = [((partname, "", key), result)]
+
+                    for column, value in items:
+                        values.setdefault(column,
+                                          [None] * len(conformers))[i] = value
+
+        for column, vals in values.items():
+            table[column] = vals
+
+        return table
+
+    @property
+    def columns(self) -> list[tuple[str, str, str]]:
+        return list(self.__columns.keys())
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, column: tuple[str, str, str]) -> bool:
+        return column in self.__columns
+
+    def __getitem__(self, column: tuple[str, str, str]) -> np.ndarray:
+        return self.__columns[column]
+
+    def __setitem__(self, column: tuple[str, str, str], values) -> None:
+        """
+        Sets a whole column. Lists containing only numbers (or missing values) are stored as float64 arrays.
+        """
+        if len(values) != len(self.rows):
+            raise ValueError(
+                f"Column {column} has {len(values)} entries, but the table has {len(self.rows)} rows."
+            )
+
+        if isinstance(values, np.ndarray) and values.dtype.kind in "fiu":
+            array = values.astype(np.float64)
+        elif all(v is None or (isinstance(v, Real) and not isinstance(v, bool))
+                 for v in values):
+            array = np.array([np.nan if v is None else v for v in values],
+                             dtype=np.float64)
+        else:
+            array = np.empty(len(values), dtype=object)
+            array[:] = list(values)
+
+        self.__columns[tuple(column)] = array
+
+    def select(self, part: str) -> "ResultsTable":
+        """
+        Returns a table containing only the columns of one part (the arrays are shared, not copied).
+        """
+        table = ResultsTable(self.rows)
+        table.__columns = {
+            column: array
+            for column, array in self.__columns.items() if column[0] == part
+        }
+        return table
+
+    def to_npz(self, path: str) -> None:
+        """
+        Exports the table to a npz file. Every column is stored under the key "<part>/<jobtype>/<quantity>", object
+        columns are stored as json encoded strings, so the file can be read without unpickling.
+
+        Args:
+            path (str): Path of the npz file.
+
+        Returns:
+            None
+        """
+        arrays = {ROWS: np.array(self.rows, dtype=str)}
+        for column, array in self.__columns.items():
+            if array.dtype == object:
+                array = np.array(
+                    [json.dumps(v, default=str) for v in array], dtype=str)
+            arrays["/".join(column)] = array
+
+        # write atomically, np.savez would append '.npz' to the temporary name otherwise
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(fd, "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def from_npz(cls, path: str) -> "ResultsTable":
+        """
+        Reads a table exported with to_npz.
+
+        Args:
+            path (str): Path of the npz file.
+
+        Returns:
+            ResultsTable: The table.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            table = cls(data[ROWS].tolist())
+            for key in data.files:
+                if key == ROWS:
+                    continue
+                array = data[key]
+                if array.dtype.kind == "U":
+                    array = [json.loads(v) for v in array.tolist()]
+                table[tuple(key.split("/", 2))] = array
+
+        return table
+
+
+class ResultsStream:
+    """
+    Append-only JSON Lines file of the results of a part. Every line holds the results of one conformer
+    ({"conf": <name>, "results": {...}, "final": <bool>}), so that everything collected so far is on disk even if the
+    part crashes. Lines are merged in order of appearance, "final" lines replace everything recorded before for their
+    conformer.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Path to the JSON Lines file.
+        """
+        self.path: str = path
+
+    def append(self,
+               records: list[tuple[str, dict]],
+               final: bool = False) -> None:
+        """
+        Appends the results of some conformers.
+
+        Args:
+            records (list[tuple[str, dict]]): Conformer names and their results.
+            final (bool, optional): Whether these are the complete results of the part. Defaults to False.
+
+        Returns:
+            None
+        """
+        with open(self.path, "a+b") as file:
+            # terminate a damaged last line (e.g. after a crash), so that it does not swallow the next record
+            if file.tell() > 0:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    file.write(b"\n")
+
+            for name, results in records:
+                file.write(
+                    json.dumps({
+                        "conf": name,
+                        "results": results,
+                        "final": final
+                    }).encode() + b"\n")
+
+    def load(self) -> dict[str, dict]:
+        """
+        Reads and merges all records. A damaged line (e.g. the last one after a crash) is skipped.
+
+        Returns:
+            dict[str, dict]: Merged results mapped by conformer name.
+        """
+        merged = {}
+        if not os.path.isfile(self.path):
+            return merged
+
+        with open(self.path, "rb") as file:
+            for i, line in enumerate(file):
+                record = self.__parse(line, i)
+                if record is not None:
+                    merged[record["conf"]] = self.__merge(
+                        merged.get(record["conf"], {}), record)
+
+        return merged
+
+    def compact(self, path: str, entries: list[tuple[str, dict]]) -> None:
+        """
+        Writes the results of the given conformers to a json file (formatted like json.dump with indent=4) and removes
+        the stream afterwards. The results of every conformer are merged from its streamed records, the given final
+        results of the part override them (e.g. results changed by the part after the jobs finished, or "gtot" and
+        "bmw", which are computed by the part itself).
+        The file is written entry by entry and only the records of one conformer are held in memory at a time.
+
+        Args:
+            path (str): Path of the json file.
+            entries (list[tuple[str, dict]]): Names of the conformers to include (in this order) and their final
+                results as known to the part.
+
+        Returns:
+            None
+        """
+        offsets = self.__index({name for name, _ in entries})
+
+        # write atomically, so that there is always either the stream or the complete json file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(fd, "w") as file:
+            stream = open(self.path, "rb") if len(offsets) > 0 else None
+            try:
+                file.write("{")
+                for i, (name, fields) in enumerate(entries):
+                    results = {}
+                    for offset in offsets.get(name, []):
+                        stream.seek(offset)
+                        results = self.__merge(results,
+                                               json.loads(stream.readline()))
+                    results.update(fields)
+
+                    file.write(",\n" if i > 0 else "\n")
+                    file.write(json.dumps({name: results}, indent=4)[2:-2])
+                file.write("\n}" if len(entries) > 0 else "}")
+            finally:
+                if stream is not None:
+                    stream.close()
+        os.replace(tmp, path)
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+
+    def __index(self, names: set[str]) -> dict[str, list[int]]:
+        """
+        Finds the valid records of the given conformers.
+
+        Returns:
+            dict[str, list[int]]: Byte offsets of the records mapped by conformer name (in order of appearance).
+        """
+        offsets = {}
+        if not os.path.isfile(self.path):
+            return offsets
+
+        with open(self.path, "rb") as file:
+            offset = 0
+            for i, line in enumerate(file):
+                record = self.__parse(line, i)
+                if record is not None and record["conf"] in names:
+                    offsets.setdefault(record["conf"], []).append(offset)
+                offset += len(line)
+
+        return offsets
+
+    def __parse(self, line: bytes, i: int) -> dict | None:
+        """
+        Parses one line of the stream, returns None (with a warning) if it is damaged.
+        """
+        try:
+            return json.loads(line)
+        except ValueError:
+            logger.warning(f"Skipping damaged line {i + 1} in {self.path}.")
+            return None
+
+    @staticmethod
+    def __merge(results: dict, record: dict) -> dict:
+        """
+        Merges a record into the results of its conformer.
+        """
+        if record["final"]:
+            return record["results"]
+        results.update(record["results"])
+        return results
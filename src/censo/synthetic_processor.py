@@ -0,0 +1,172 @@
+"""
+Processor for fake calculations, used to benchmark the scheduling and the bookkeeping of CENSO without ORCA and xtb.
+The external programs are called as usual (via xtbpath and orcapath), which are supposed to point to the fake
+programs in benchmarks/fake_programs.
+The processor is not available in CENSO runs, it has to be registered first:
+    ProcessorFactory.register("synthetic", SyntheticProc)
+"""
+import json
+import os
+
+from .datastructure import ParallelJob
+from .logging import setup_logger
+from .orca_output import parse_orca_output
+from .params import WARNLEN
+from .qm_processor import QmProc
+from .xtb_parser import parse_xtb_output
+
+logger = setup_logger(__name__)
+
+# marker of the line containing the runtime model in the inputs (see benchmarks/fake_programs/fakeqm.py)
+MODEL_KEY = "censo-fake-model"
+
+
+class SyntheticProc(QmProc):
+    """
+    Runs every jobtype as a single call to the fake xtb or ORCA. The inputs contain only the geometry, the number of
+    cores and the runtime model taken from job.prepinfo["synthetic"] (e.g. {"base": 1.0, "per_atom": 0.01,
+    "exponent": 2.0, "parallel": 0.9, "mode": "burn", "failrate": 0.0}, missing parameters are set by the fake
+    programs). The outputs are read with the parsers used for the real programs.
+    NOTE: optimizations do not change the geometry.
+    """
+
+    # jobtypes mapped to the program and the kind of calculation
+    _calculations = {
+        "xtb_sp": ("xtb", "sp"),
+        "xtb_gsolv": ("xtb", "sp"),
+        "xtb_rrho": ("xtb", "hess"),
+        "xtb_opt": ("xtb", "opt"),
+        "sp": ("orca", "sp"),
+        "gsolv": ("orca", "sp"),
+        "opt": ("orca", "opt"),
+        "nmr": ("orca", "nmr"),
+        "uvvis": ("orca", "uvvis"),
+    }
+
+    # fields read from the ORCA output per kind of calculation
+    _orca_fields = {
+        "sp": set(),
+        "opt": {"opt"},
+        "nmr": {"shieldings"},
+        "uvvis": {"excitations"},
+    }
+
+    # the runtime model is part of the cache keys, since it changes the results (e.g. failed jobs)
+    _cache_sections = {
+        jobtype: [jobtype, "synthetic"]
+        for jobtype in _calculations
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self._jobtypes = {
+            jobtype: self._synthetic
+            for jobtype in self._calculations
+        }
+
+    def _synthetic(self, job: ParallelJob,
+                   jobdir: str) -> tuple[dict[str, any], dict[str, any]]:
+        """
+        Fake calculation of the jobtype given by the name of the jobdir.
+
+        Args:
+            job: ParallelJob object containing the job information
+            jobdir: path to the job directory
+
+        Returns:
+            result (dict[str, any]): energy and further quantities depending on the kind of calculation
+            meta (dict[str, any]): metadata about the job
+        """
+        # the jobtype is not passed to the jobtype methods, but it is the name of the jobdir
+        jobtype = os.path.basename(jobdir)
+        prog, kind = self._calculations[jobtype]
+
+        result = {"energy": None}
+        meta = {
+            "success": None,
+            "error": None,
+            "mo_path": None,
+        }
+
+        header = f"{MODEL_KEY} {json.dumps(job.prepinfo.get('synthetic', {}))}"
+        outputpath = os.path.join(jobdir, f"{jobtype}.out")
+
+        if prog == "xtb":
+            inputname = f"{jobtype}.xyz"
+            lines = job.conf.toxyz()
+            lines[1] = header + "\n"
+            call = [
+                inputname,
+                {
+                    "sp": "--sp",
+                    "hess": "--ohess",
+                    "opt": "--opt"
+                }[kind],
+                "--parallel",
+                f"{job.omp}",
+            ]
+        else:
+            inputname = f"{jobtype}.inp"
+            lines = [
+                f"! {'SP' if kind == 'uvvis' else kind.upper()}\n",
+                f"# {header}\n",
+                "%pal\n",
+                f"    nprocs {job.omp}\n",
+                "end\n",
+            ]
+            if kind == "uvvis":
+                lines.extend([
+                    "%tddft\n",
+                    f"    nroots {job.prepinfo.get('uvvis', {}).get('nroots', 10)}\n",
+                    "end\n",
+                ])
+            lines.append(
+                f"* xyz {job.prepinfo['charge']} {job.prepinfo['unpaired'] + 1}\n"
+            )
+            lines.extend(f"{' '.join(str(x) for x in atom)}\n"
+                         for atom in job.conf.toorca())
+            lines.append("*\n")
+            call = [inputname]
+
+        with open(os.path.join(jobdir, inputname), "w") as f:
+            f.writelines(lines)
+
+        returncode, errors = self._make_call(prog, call, outputpath, jobdir)
+
+        if returncode != 0:
+            meta["success"] = False
+            meta["error"] = "unknown_error"
+            logger.warning(
+                f"{f'worker{os.getpid()}:':{WARNLEN}}Job for {job.conf.name} failed. Stderr output:\n{errors}"
+            )
+            return result, meta
+
+        if prog == "xtb":
+            output = parse_xtb_output(outputpath)
+            result["energy"] = output["energy"]
+            if kind == "hess" and len(output["gibbs"]) > 0:
+                for quantity in ["gibbs", "enthalpy", "entropy", "linear"]:
+                    result[quantity] = output[quantity]
+                result["energy"] = list(output["gibbs"].values())[-1]
+            elif kind == "opt":
+                for quantity in ["converged", "cycles", "ecyc", "gncyc"]:
+                    result[quantity] = output[quantity]
+            meta["error"] = "unknown_error" if output["error"] else None
+        else:
+            output = parse_orca_output(
+                outputpath, {"energy", "error"} | self._orca_fields[kind],
+                nroots=job.prepinfo.get("uvvis", {}).get("nroots", 10))
+            meta["error"] = output.pop("error")
+            result.update(output)
+
+        if kind == "opt" and len(result["gncyc"]) > 0:
+            result["grad_norm"] = result["gncyc"][-1]
+
+        if prog == "orca" and os.path.isfile(
+                os.path.join(jobdir, f"{jobtype}.gbw")):
+            meta["mo_path"] = os.path.join(jobdir, f"{jobtype}.gbw")
+
+        meta["success"] = meta["error"] is None and result["energy"] is not None
+
+        return result, meta
@@ -0,0 +1,330 @@
+"""
+Live progress and throughput metrics of the jobs run via dqp, shown as a terminal status line and written
+periodically to a metrics file in Prometheus text format.
+"""
+import os
+import sys
+import tempfile
+import threading
+from collections import defaultdict
+from time import perf_counter
+
+import numpy as np
+
+from .datastructure import ParallelJob
+from .logging import setup_logger
+from .tracing import Tracer
+
+logger = setup_logger(__name__)
+
+# quantiles of the runtimes reported in the metrics file
+QUANTILES = [0.5, 0.9, 0.99]
+
+
+class Telemetry:
+    """
+    Collects the state of the job queue (queued, running, done and failed jobs, busy cores) and the runtimes of all
+    finished calculations. All updates come from the thread running dqp, the reporting thread only reads.
+
+    Usage:
+        with Telemetry(metrics_path, status=True) as telemetry:
+            telemetry.start_batch(jobs, free_cores, totalcores)
+            telemetry.submitted(job)
+            telemetry.finished(job)
+            telemetry.end_batch()
+    """
+
+    def __init__(self,
+                 metrics_path: str = None,
+                 status: bool = False,
+                 interval: float = 5.0,
+                 trace_path: str = None):
+        """
+        Args:
+            metrics_path (str, optional): Path of the metrics file. Defaults to None (no metrics file).
+            status (bool, optional): Whether to show a status line on stderr. Defaults to False.
+            interval (float, optional): Seconds between two updates of the status line and the metrics file.
+            trace_path (str, optional): Path of the timeline of all jobs written on exit (see censo.tracing).
+                Defaults to None (no timeline).
+        """
+        self.metrics_path: str = metrics_path
+        self.status: bool = status
+        self.interval: float = interval
+        self.trace_path: str = trace_path
+        self.tracer: Tracer | None = Tracer(
+        ) if trace_path is not None else None
+
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__reporter: threading.Thread | None = None
+
+        # state of the current batch
+        self.part: str = ""
+        self.queued: int = 0
+        self.running: int = 0
+        self.done: int = 0
+        self.totalcores: int = 0
+        self.__free_cores = None
+        self.__batch_start: float = 0.0
+
+        # totals of the whole run
+        self.jobs_done: int = 0
+        self.failures: dict[str, int] = defaultdict(int)
+        self.runtimes: dict[str, list[float]] = defaultdict(list)
+
+        # resource usage of the external program calls per part (see QmProc.run), together with the reserved
+        # core-seconds (wall time times number of cores) to relate the CPU time to
+        self.usage: dict[str, dict[str, float]] = {}
+
+    def __enter__(self):
+        if self.status or self.metrics_path is not None:
+            self.__reporter = threading.Thread(target=self.__report,
+                                               daemon=True)
+            self.__reporter.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.__stop.set()
+        if self.__reporter is not None:
+            self.__reporter.join()
+        self.write_metrics()
+        if self.tracer is not None:
+            try:
+                self.tracer.write(self.trace_path)
+            except OSError as e:
+                logger.warning(f"Could not write the timeline: {e}")
+        return False
+
+    def start_batch(self, jobs: list[ParallelJob], free_cores,
+                    totalcores: int) -> None:
+        """
+        Starts tracking a new batch of jobs.
+
+        Args:
+            jobs (list[ParallelJob]): The jobs of the batch.
+            free_cores (CorePool | None): Core accounting of the batch (None if the resources are managed externally).
+            totalcores (int): Number of cores available to the batch.
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.part = jobs[0].prepinfo.get("partname", "") if len(
+                jobs) > 0 else ""
+            self.queued = len(jobs)
+            self.running = 0
+            self.done = 0
+            self.totalcores = totalcores
+            self.__free_cores = free_cores
+            self.__batch_start = perf_counter()
+            if self.tracer is not None:
+                self.tracer.start_batch(self.part)
+
+    def submitted(self, job: ParallelJob) -> None:
+        with self.__lock:
+            self.queued -= 1
+            self.running += 1
+            if self.tracer is not None:
+                self.tracer.submitted(job)
+
+    def finished(self, job: ParallelJob) -> None:
+        """
+        Records a finished job (runtimes and failures of all of its jobtypes).
+        """
+        with self.__lock:
+            self.running -= 1
+            self.done += 1
+            self.jobs_done += 1
+            if self.tracer is not None:
+                self.tracer.finished(job)
+            for jt in job.jobtype:
+                meta = job.meta.get(jt, {})
+                if not meta.get("success", False):
+                    self.failures[jt] += 1
+                elif not meta.get("cached", False) and "time" in meta:
+                    self.runtimes[jt].append(meta["time"])
+
+                if meta.get("usage", None) is not None:
+                    self.__add_usage(job.prepinfo.get("partname", ""),
+                                     meta["usage"],
+                                     meta.get("time", 0.0) * job.omp)
+
+    def __add_usage(self, part: str, usage: dict[str, float],
+                    coretime: float) -> None:
+        total = self.usage.setdefault(
+            part, {
+                "utime": 0.0,
+                "stime": 0.0,
+                "maxrss": 0,
+                "read_bytes": 0,
+                "write_bytes": 0,
+                "calls": 0,
+                "coretime": 0.0,
+            })
+        for key in ["utime", "stime", "read_bytes", "write_bytes", "calls"]:
+            total[key] += usage[key]
+        total["maxrss"] = max(total["maxrss"], usage["maxrss"])
+        if usage["calls"] > 0:
+            total["coretime"] += coretime
+
+    def end_batch(self) -> None:
+        with self.__lock:
+            self.__free_cores = None
+            self.queued = self.running = 0
+        self.write_metrics()
+        if self.status:
+            # clear the status line
+            sys.stderr.write("\r\033[K")
+            sys.stderr.flush()
+
+    @property
+    def busy_cores(self) -> int:
+        if self.__free_cores is None:
+            return self.totalcores if self.running > 0 else 0
+        return self.totalcores - self.__free_cores.free
+
+    @property
+    def eta(self) -> float | None:
+        """
+        Estimated number of seconds until the current batch is finished (based on the throughput so far).
+        """
+        if self.done == 0:
+            return None
+        rate = self.done / (perf_counter() - self.__batch_start)
+        return (self.queued + self.running) / rate
+
+    def status_line(self) -> str:
+        """
+        Returns:
+            str: One line summarizing the current batch.
+        """
+        with self.__lock:
+            eta = self.eta
+            total = self.queued + self.running + self.done
+            return (
+                f"[{self.part}] done {self.done}/{total} | running {self.running} | queued {self.queued} | "
+                f"cores {self.busy_cores}/{self.totalcores} | failed {sum(self.failures.values())} | "
+                f"ETA {'--:--:--' if eta is None else self.__format_time(eta)}"
+            )
+
+    def metrics(self) -> str:
+        """
+        Returns:
+            str: All metrics in Prometheus text format.
+        """
+        with self.__lock:
+            lines = [
+                "# HELP censo_jobs_queued Jobs of the current batch waiting for cores.",
+                "# TYPE censo_jobs_queued gauge",
+                f'censo_jobs_queued{{part="{self.part}"}} {self.queued}',
+                "# HELP censo_jobs_running Jobs of the current batch currently running.",
+                "# TYPE censo_jobs_running gauge",
+                f'censo_jobs_running{{part="{self.part}"}} {self.running}',
+                "# HELP censo_jobs_done_total Finished jobs.",
+                "# TYPE censo_jobs_done_total counter",
+                f"censo_jobs_done_total {self.jobs_done}",
+                "# HELP censo_cores_busy Cores reserved by running jobs.",
+                "# TYPE censo_cores_busy gauge",
+                f"censo_cores_busy {self.busy_cores}",
+                "# HELP censo_cores_total Cores available to the current batch.",
+                "# TYPE censo_cores_total gauge",
+                f"censo_cores_total {self.totalcores}",
+                "# HELP censo_eta_seconds Estimated time until the current batch is finished.",
+                "# TYPE censo_eta_seconds gauge",
+                f"censo_eta_seconds {'NaN' if self.eta is None else f'{self.eta:.1f}'}",
+                "# HELP censo_failures_total Failed calculations.",
+                "# TYPE censo_failures_total counter",
+            ]
+            lines.extend(f'censo_failures_total{{jobtype="{jt}"}} {n}'
+                         for jt, n in self.failures.items())
+
+            lines.extend([
+                "# HELP censo_cpu_seconds_total CPU time (user + sys) of the external program calls.",
+                "# TYPE censo_cpu_seconds_total counter",
+            ])
+            lines.extend(
+                f'censo_cpu_seconds_total{{part="{part}"}} {usage["utime"] + usage["stime"]:.3f}'
+                for part, usage in self.usage.items())
+
+            lines.extend([
+                "# HELP censo_runtime_seconds Wall time of the calculations (without cached results).",
+                "# TYPE censo_runtime_seconds summary",
+            ])
+            for jt, times in self.runtimes.items():
+                for q, value in zip(QUANTILES,
+                                    np.quantile(times, QUANTILES).tolist()):
+                    lines.append(
+                        f'censo_runtime_seconds{{jobtype="{jt}",quantile="{q}"}} {value:.3f}'
+                    )
+                lines.append(
+                    f'censo_runtime_seconds_sum{{jobtype="{jt}"}} {sum(times):.3f}'
+                )
+                lines.append(
+                    f'censo_runtime_seconds_count{{jobtype="{jt}"}} {len(times)}'
+                )
+
+        return "\n".join(lines) + "\n"
+
+    def runtime_summary(self) -> str:
+        """
+        Returns:
+            str: Mean and percentiles of the runtimes for every jobtype.
+        """
+        with self.__lock:
+            lines = []
+            for jt, times in self.runtimes.items():
+                p50, p90, p99 = np.quantile(times, QUANTILES).tolist()
+                lines.append(
+                    f"{jt}: {len(times)} calculations, mean {np.mean(times):.2f} s, p50 {p50:.2f} s, "
+                    f"p90 {p90:.2f} s, p99 {p99:.2f} s, {self.failures.get(jt, 0)} failed"
+                )
+            return "\n".join(lines)
+
+    def usage_summary(self) -> str:
+        """
+        Returns:
+            str: CPU time, CPU efficiency (CPU time per reserved core-second), peak RSS and I/O of the external
+                program calls for every part.
+        """
+        with self.__lock:
+            lines = []
+            for part, usage in self.usage.items():
+                cpu = usage["utime"] + usage["stime"]
+                efficiency = cpu / usage["coretime"] if usage[
+                    "coretime"] > 0 else 0.0
+                lines.append(
+                    f"{part}: {usage['calls']} program calls, CPU {usage['utime']:.1f} s user + "
+                    f"{usage['stime']:.1f} s sys ({efficiency:.0%} of reserved cores), "
+                    f"peak RSS {usage['maxrss'] / 1024**2:.0f} MB, read {usage['read_bytes'] / 1024**2:.0f} MB, "
+                    f"written {usage['write_bytes'] / 1024**2:.0f} MB")
+            return "\n".join(lines)
+
+    def write_metrics(self) -> None:
+        """
+        Writes the metrics file (atomically, so that scrapers never read a partial file).
+        """
+        if self.metrics_path is None:
+            return
+
+        fd, tmp = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(self.metrics_path)))
+        with os.fdopen(fd, "w") as file:
+            file.write(self.metrics())
+        os.replace(tmp, self.metrics_path)
+
+    def __report(self) -> None:
+        while not self.__stop.wait(self.interval):
+            try:
+                if self.status and self.totalcores > 0 and (self.queued +
+                                                            self.running) > 0:
+                    sys.stderr.write("\r\033[K" + self.status_line())
+                    sys.stderr.flush()
+                self.write_metrics()
+            except OSError as e:
+                logger.debug(f"Could not report progress: {e}")
+
+    @staticmethod
+    def __format_time(seconds: float) -> str:
+        hours, r = divmod(int(seconds), 3600)
+        minutes, seconds = divmod(r, 60)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
@@ -0,0 +1,148 @@
+"""
+Timeline of all jobs run via dqp in Chrome Trace Event format (readable with chrome://tracing or ui.perfetto.dev).
+Every job is shown on the lane of the worker process (and thread) it ran in, with its jobtypes and the calls to
+external programs nested below, and the number of cores occupied by running jobs is shown as a counter.
+The spans are recorded by the workers (see QmProc.run) and sent back with the job in job.meta["trace"].
+"""
+import json
+import os
+import tempfile
+from time import time_ns
+
+from .datastructure import ParallelJob
+
+
+def now_us() -> int:
+    """
+    Wall clock time in microseconds (the time base of all spans, comparable between processes and, if the clocks are
+    synchronized, between hosts).
+    """
+    return time_ns() // 1000
+
+
+class Tracer:
+    """
+    Collects the spans of all finished jobs and converts them into trace events.
+    """
+
+    # pid of the lane showing the scheduler (core occupancy and batches)
+    SCHEDULER_PID = 0
+
+    def __init__(self):
+        self.events: list[dict] = []
+
+        # (host, pid) of the workers mapped to the pids used in the trace
+        self.__processes: dict[tuple[str, int], int] = {}
+        # submission times of the jobs, mapped by part and conformer
+        self.__submitted: dict[tuple[str, str], int] = {}
+        # changes of the number of occupied cores (time, delta)
+        self.__cores: list[tuple[int, int]] = []
+
+    def start_batch(self, part: str) -> None:
+        self.events.append({
+            "name": part,
+            "cat": "batch",
+            "ph": "i",
+            "s": "g",
+            "ts": now_us(),
+            "pid": self.SCHEDULER_PID,
+            "tid": 0,
+        })
+
+    def submitted(self, job: ParallelJob) -> None:
+        self.__submitted[(job.prepinfo.get("partname", ""),
+                          job.conf.name)] = now_us()
+
+    def finished(self, job: ParallelJob) -> None:
+        """
+        Creates the events of a finished job from the spans recorded by the worker.
+        """
+        trace = job.meta.get("trace", None)
+        if trace is None:
+            return
+
+        part = job.prepinfo.get("partname", "")
+        pid = self.__process(trace["host"], trace["pid"])
+        submitted = self.__submitted.pop((part, job.conf.name), None)
+
+        self.events.append({
+            "name": job.conf.name,
+            "cat": "job",
+            "ph": "X",
+            "ts": trace["start"],
+            "dur": trace["end"] - trace["start"],
+            "pid": pid,
+            "tid": trace["tid"],
+            "args": {
+                "part": part,
+                "jobtype": list(job.jobtype),
+                "omp": trace["omp"],
+                "queued_us":
+                None if submitted is None else trace["start"] - submitted,
+            },
+        })
+        for span in trace["spans"]:
+            self.events.append({
+                "name": span["name"],
+                "cat": span["cat"],
+                "ph": "X",
+                "ts": span["start"],
+                "dur": span["end"] - span["start"],
+                "pid": pid,
+                "tid": span["tid"],
+                "args": span["args"],
+            })
+
+        self.__cores.append((trace["start"], trace["omp"]))
+        self.__cores.append((trace["end"], -trace["omp"]))
+
+    def to_dict(self) -> dict:
+        """
+        Returns:
+            dict: The trace in Chrome Trace Event format.
+        """
+        events = [{
+            "name": "process_name",
+            "ph": "M",
+            "pid": self.SCHEDULER_PID,
+            "args": {
+                "name": "scheduler"
+            },
+        }]
+        events.extend({
+            "name": "process_name",
+            "ph": "M",
+            "pid": pid,
+            "args": {
+                "name": f"worker {host}:{hostpid}"
+            },
+        } for (host, hostpid), pid in self.__processes.items())
+
+        # occupied cores over time (ends sort before starts at the same time)
+        busy = 0
+        for ts, delta in sorted(self.__cores):
+            busy += delta
+            events.append({
+                "name": "cores",
+                "ph": "C",
+                "ts": ts,
+                "pid": self.SCHEDULER_PID,
+                "args": {
+                    "busy": busy
+                },
+            })
+
+        return {"traceEvents": events + self.events, "displayTimeUnit": "ms"}
+
+    def write(self, path: str) -> None:
+        """
+        Writes the trace to a json file (atomically).
+        """
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(fd, "w") as file:
+            json.dump(self.to_dict(), file)
+        os.replace(tmp, path)
+
+    def __process(self, host: str, pid: int) -> int:
+        return self.__processes.setdefault((host, pid),
+                                           len(self.__processes) + 1)
@@ -0,0 +1,150 @@
+"""
+Parsing of xtb output files. The output is memory-mapped and the lines of interest are located via substring search
+on the mapping, only these lines (and the rows of the thermo tables) are decoded and split.
+"""
+import mmap
+
+from .params import CODING
+
+# Substrings indicating error in xtb
+ERROR_INDICATORS = [
+    "external code error",
+    "|grad| > 500, something is totally wrong!",
+    "abnormal termination of xtb",
+]
+
+# substrings marking the lines of interest mapped to the kind of line
+# (a regex alternation of all keys is much slower, since the re module cannot search for several literals at once)
+_KEYS = {
+    b"| TOTAL ENERGY": "energy",
+    b"T/K": "thermo",
+    b"VIB": "vib",
+    b":  linear? ": "linear",
+    b"final rmsd / ": "rmsd",
+    b"GEOMETRY OPTIMIZATION CONVERGED": "converged",
+    b"FAILED TO CONVERGE GEOMETRY": "failed",
+    b"av. E: ": "ecyc",
+    b" gradient norm ": "gncyc",
+    **{ind.encode(): "error"
+       for ind in ERROR_INDICATORS},
+}
+
+# end of the thermo tables
+_TABLE_END = "----------------------------------"
+
+
+def _line(buffer, pos: int) -> tuple[str, int]:
+    """
+    Returns the (decoded) line containing the position pos and the position of the beginning of the next line.
+    """
+    start = buffer.rfind(b"\n", 0, pos) + 1
+    end = buffer.find(b"\n", pos)
+    if end == -1:
+        end = len(buffer)
+    return buffer[start:end].decode(CODING), end + 1
+
+
+def parse_xtb_output(path: str) -> dict[str, any]:
+    """
+    Extracts all quantities used by CENSO from an xtb output file.
+
+    Args:
+        path (str): Path to the output file.
+
+    Returns:
+        dict[str, any]: The parsed quantities:
+            "energy": last total energy,
+            "gibbs", "enthalpy": G(T) and H(T) from the thermo tables mapped by temperature,
+            "entropy": rotational entropy mapped by temperature,
+            "linear": whether the molecule is linear (None if not found),
+            "rmsd": final rmsd of the bhess calculation (None if not found),
+            "error": whether any error indicator was found,
+            "converged": whether the geometry optimization converged (None if not found),
+            "cycles": number of optimization cycles (None if not found),
+            "ecyc", "gncyc": energies and gradient norms of all optimization cycles.
+    """
+    output = {
+        "energy": None,
+        "gibbs": {},
+        "enthalpy": {},
+        "entropy": {},
+        "linear": None,
+        "rmsd": None,
+        "error": False,
+        "converged": None,
+        "cycles": None,
+        "ecyc": [],
+        "gncyc": [],
+    }
+
+    with open(path, "rb") as file:
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            return output
+
+    # number of cycles from the first line reporting convergence/failure
+    cycles = {}
+
+    with buffer:
+        # find all occurrences of all keys and process them in the order of the file
+        matches = []
+        for key, kind in _KEYS.items():
+            pos = buffer.find(key)
+            while pos != -1:
+                matches.append((pos, kind))
+                pos = buffer.find(key, pos + len(key))
+        matches.sort()
+
+        # only one match per line and kind (a line might contain a key twice)
+        seen = set()
+        for pos, kind in matches:
+            line, nextpos = _line(buffer, pos)
+            if (kind, nextpos) in seen:
+                continue
+            seen.add((kind, nextpos))
+
+            if kind == "energy":
+                output["energy"] = float(line.split()[3])
+            elif kind == "thermo":
+                # skip the line below the header, the table ends with a line of dashes
+                _, pos = _line(buffer, nextpos)
+                while pos < len(buffer):
+                    row, pos = _line(buffer, pos)
+                    if _TABLE_END in row:
+                        break
+                    spl = row.split()
+                    T = float(spl[0])
+                    output["gibbs"][T] = float(spl[4])
+                    output["enthalpy"][T] = float(spl[2])
+            elif kind == "vib":
+                # the rotational entropy is found in the next line
+                T = float(line.split()[0])
+                output["entropy"][T] = float(
+                    _line(buffer, nextpos)[0].split()[4])
+            elif kind == "linear" and output["linear"] is None:
+                output["linear"] = {
+                    "true": True,
+                    "false": False
+                }[line.split()[2]]
+            elif kind == "rmsd" and output["rmsd"] is None:
+                output["rmsd"] = float(line.split()[3])
+            elif kind in ["converged", "failed"] and kind not in cycles:
+                cycles[kind] = int(
+                    line.split()[5 if kind == "converged" else 7])
+            elif kind == "ecyc":
+                output["ecyc"].append(float(line.split("->")[-1]))
+            elif kind == "gncyc":
+                output["gncyc"].append(float(line.split()[3]))
+            elif kind == "error":
+                output["error"] = True
+
+    if "converged" in cycles:
+        output["converged"] = True
+        output["cycles"] = cycles["converged"]
+    elif "failed" in cycles:
+        output["converged"] = False
+        output["cycles"] = cycles["failed"]
+
+    return output
@@ -0,0 +1,86 @@
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from censo.batch import run_array
+from censo.cache import ResultCache
+from censo.datastructure import MoleculeData, ParallelJob
+from censo.qm_processor import QmProc
+
+# stand-in for sbatch that runs every task of the array locally (except for the one given in FAKE_SKIP)
+FAKE_SBATCH = f"""#!{sys.executable}
+import os, re, subprocess, sys
+script = sys.argv[-1]
+last = int(re.search(r"--array=0-(\\d+)", open(script).read()).group(1))
+for i in range(last + 1):
+    if os.environ.get("FAKE_SKIP") == str(i):
+        continue
+    env = dict(os.environ, SLURM_ARRAY_TASK_ID=str(i))
+    subprocess.run(["bash", script], env=env, check=True)
+"""
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        sbatch = os.path.join(self.tmpdir, "sbatch")
+        with open(sbatch, "w") as f:
+            f.write(FAKE_SBATCH)
+        os.chmod(sbatch, os.stat(sbatch).st_mode | stat.S_IEXEC)
+
+        # results are served from the cache, so that no external program is needed
+        self.processor = QmProc(self.tmpdir)
+        self.processor.cache = ResultCache(
+            os.path.join(self.tmpdir, "cache"), 1)
+
+        self.jobs = []
+        for i in range(3):
+            conf = MoleculeData(f"CONF{i}",
+                                ["H 0.0 0.0 0.0\n", f"H 0.0 0.0 0.{i + 5}\n"])
+            job = ParallelJob(conf.geom, ["xtb_sp"])
+            job.prepinfo["xtb_sp"] = {"gfnv": "gfn2"}
+            self.processor.cache.put(
+                self.processor._cache_key(job, "xtb_sp"),
+                {"energy": -float(i)}, {
+                    "success": True,
+                    "error": None
+                })
+            self.jobs.append(job)
+
+    def test_run_array(self):
+        with patch.dict(
+                os.environ, {
+                    "PATH": self.tmpdir + os.pathsep + os.environ["PATH"],
+                    "FAKE_SKIP": "1"
+                }):
+            results = run_array(self.jobs, self.processor, "slurm")
+
+        results = {job.conf.name: job for job in results}
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results["CONF2"].results["xtb_sp"]["energy"], -2.0)
+        self.assertTrue(results["CONF0"].meta["xtb_sp"]["success"])
+
+        # the skipped task should be marked as failed
+        self.assertFalse(results["CONF1"].meta["xtb_sp"]["success"])
+
+    def doCleanups(self):
+        # perform cleanup
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from censo.cache import ResultCache
+from censo.datastructure import MoleculeData, ParallelJob
+from censo.qm_processor import QmProc
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = ResultCache(os.path.join(self.tmpdir, "cache"), 1)
+
+    def test_put_get(self):
+        key = ResultCache.make_key("xtb_sp", {"b": 1, "a": 2})
+        self.assertEqual(key, ResultCache.make_key("xtb_sp", {
+            "a": 2,
+            "b": 1
+        }))
+        self.assertIsNone(self.cache.get(key))
+
+        self.cache.put(key, {"energy": -1.0}, {"success": True})
+        self.assertEqual(self.cache.get(key), ({
+            "energy": -1.0
+        }, {
+            "success": True
+        }))
+
+    def test_evict(self):
+        # every entry is ~400 kB, so only two fit into 1 MB
+        for i in range(4):
+            self.cache.put(str(i) * 64, {"data": "x" * 400000}, {})
+            os.utime(
+                os.path.join(self.cache.path, str(i) * 2,
+                             f"{str(i) * 64}.pkl"), (i, i))
+        self.cache.evict()
+
+        self.assertIsNone(self.cache.get("0" * 64))
+        self.assertIsNone(self.cache.get("1" * 64))
+        self.assertIsNotNone(self.cache.get("3" * 64))
+
+    def test_run_cached(self):
+        processor = QmProc(self.tmpdir)
+        processor.cache = self.cache
+        mock_sp = MagicMock(return_value=({
+            "energy": -1.0
+        }, {
+            "success": True,
+            "error": None
+        }))
+        processor._jobtypes["xtb_sp"] = mock_sp
+
+        conf = MoleculeData("CONF1", ["H 0.0 0.0 0.0\n", "H 0.0 0.0 0.7\n"])
+        for _ in range(2):
+            job = ParallelJob(conf.geom, ["xtb_sp"])
+            job.prepinfo["xtb_sp"] = {"gfnv": "gfn2"}
+            job = processor.run(job)
+            self.assertEqual(job.results["xtb_sp"]["energy"], -1.0)
+
+        # the second run should not call the jobtype method again
+        mock_sp.assert_called_once()
+
+        # changing a relevant setting should lead to a cache miss
+        job = ParallelJob(conf.geom, ["xtb_sp"])
+        job.prepinfo["xtb_sp"] = {"gfnv": "gfn1"}
+        processor.run(job)
+        self.assertEqual(mock_sp.call_count, 2)
+
+    def test_key_settings(self):
+        processor = QmProc(self.tmpdir)
+        conf = MoleculeData("CONF1", ["H 0.0 0.0 0.0\n", "H 0.0 0.0 0.7\n"])
+        job = ParallelJob(conf.geom, ["xtb_rrho"])
+        job.prepinfo["xtb_rrho"] = {"gfnv": "gfn2"}
+        job.prepinfo["general"] = {"temperature": 298.15, "omp": 4}
+        key = processor._cache_key(job, "xtb_rrho")
+
+        # settings that do not affect the results (also unknown ones) do not change the key
+        job.prepinfo["general"].update({"omp": 8, "new_setting": True})
+        self.assertEqual(key, processor._cache_key(job, "xtb_rrho"))
+
+        job.prepinfo["general"]["temperature"] = 300.0
+        self.assertNotEqual(key, processor._cache_key(job, "xtb_rrho"))
+
+    def test_key_xtbversion(self):
+        processor = QmProc(self.tmpdir)
+        conf = MoleculeData("CONF1", ["H 0.0 0.0 0.0\n", "H 0.0 0.0 0.7\n"])
+        job = ParallelJob(conf.geom, ["xtb_sp"])
+        job.prepinfo["xtb_sp"] = {"gfnv": "gfn2"}
+
+        # results of different xtb versions must not be mixed up
+        paths = dict(QmProc._paths)
+        try:
+            QmProc._paths["xtbversion"] = "6.6.1"
+            key = processor._cache_key(job, "xtb_sp")
+            QmProc._paths["xtbversion"] = "6.7.0"
+            self.assertNotEqual(key, processor._cache_key(job, "xtb_sp"))
+        finally:
+            QmProc._paths.update(paths)
+
+    def doCleanups(self):
+        # perform cleanup
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from censo.datastructure import GeometryData, MoleculeData
+
+LINES = [
+    "c 0.0 0.0 0.0\n",
+    "o 0.0 0.0 1.2\n",
+]
+
+
+class TestGeometryData(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def test_compatibility(self):
+        geom = GeometryData("CONF1", LINES)
+        self.assertEqual(geom.nat, 2)
+        self.assertEqual(geom.coords.shape, (2, 3))
+        self.assertEqual(geom.xyz[1], {
+            "element": "O",
+            "xyz": [0.0, 0.0, 1.2]
+        })
+        self.assertEqual(geom.toorca()[1], ["O", 0.0, 0.0, 1.2])
+        self.assertEqual(geom.toxyz()[3], "O 0.0000000000 0.0000000000 1.2000000000\n")
+
+        # assigning the list view replaces the geometry
+        xyz = geom.xyz
+        xyz[1]["xyz"] = [0.0, 0.0, 1.1]
+        geom.xyz = xyz
+        self.assertEqual(geom.coords[1, 2], 1.1)
+
+    def test_shared_elements(self):
+        confs = [MoleculeData(f"CONF{i}", LINES) for i in range(3)]
+        self.assertTrue(
+            all(conf.geom.elements is confs[0].geom.elements
+                for conf in confs))
+        self.assertFalse(confs[0].geom.elements.flags.writeable)
+
+        geom = pickle.loads(pickle.dumps(confs[0].geom))
+        self.assertEqual(geom.xyz, confs[0].geom.xyz)
+
+    def test_coord_roundtrip(self):
+        geom = GeometryData("CONF1", LINES)
+        path = os.path.join(self.tmpdir, "coord")
+        with open(path, "w") as file:
+            file.writelines(geom.tocoord())
+
+        other = GeometryData("CONF1", [])
+        other.fromcoord(path)
+        self.assertEqual(other.nat, 2)
+        self.assertAlmostEqual(other.coords[1, 2], 1.2)
+
+    def doCleanups(self):
+        # perform cleanup
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()
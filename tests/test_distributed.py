@@ -0,0 +1,70 @@
+import os
+import shutil
+import unittest
+from concurrent.futures import as_completed
+from types import SimpleNamespace
+
+from censo.distributed import DistributedExecutor
+from censo.parallel import ExecutionContext
+
+
+class TestDistributed(unittest.TestCase):
+    def test_local_agents(self):
+        with DistributedExecutor(["localhost", "localhost"], 4) as executor:
+            futures = [executor.submit(pow, 2, i) for i in range(8)]
+            self.assertEqual(sorted(f.result() for f in futures),
+                             [2**i for i in range(8)])
+
+            # jobs that need all cores of an agent are spread over both agents
+            futures = [
+                executor.submit(getattr, SimpleNamespace(omp=4), "omp")
+                for _ in range(4)
+            ]
+            self.assertEqual([f.result() for f in as_completed(futures)],
+                             [4] * 4)
+
+            # jobs that do not fit on any agent are rejected
+            with self.assertRaises(ValueError):
+                executor.submit(getattr, SimpleNamespace(omp=8), "omp")
+
+    def test_exception(self):
+        with DistributedExecutor(["localhost"], 4) as executor:
+            future = executor.submit(pow, "a", 2)
+            self.assertIsInstance(future.exception(), TypeError)
+
+            # failed tasks must not kill the agent
+            self.assertEqual(executor.submit(pow, 2, 2).result(), 4)
+
+    def test_shared_agents(self):
+        with ExecutionContext(4) as context:
+            executor = context.get_distributed(["localhost"], 4)
+            self.assertEqual(executor.submit(pow, 2, 3).result(), 8)
+
+            # the agents are started only once per context
+            self.assertIs(context.get_distributed(["localhost"], 4), executor)
+            self.assertEqual(context.reuses, 1)
+
+            # other hosts need other agents
+            other = context.get_distributed(["localhost", "localhost"], 4)
+            self.assertIsNot(other, executor)
+            self.assertTrue(executor.broken)
+
+        self.assertIsNone(context.distributed)
+        self.assertTrue(other.broken)
+
+    def doCleanups(self):
+        # perform cleanup
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from censo.ensembledata import (EnsembleData, is_binary_ensemble,
+                                read_binary_ensemble, read_xyz_blocks)
+
+TESTFILE = os.path.join(os.path.split(__file__)[0], "testfiles",
+                        "crest_conformers.xyz")
+
+
+class TestEnsembleReader(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def test_read_xyz_blocks(self):
+        with open(TESTFILE, "r") as file:
+            lines = file.readlines()
+        nat = int(lines[0])
+
+        blocks = list(read_xyz_blocks(TESTFILE))
+        self.assertEqual(len(blocks), len(lines) // (nat + 2))
+        self.assertTrue(all(len(block) == nat for _, block in blocks))
+
+        # incomplete last block
+        path = os.path.join(self.tmpdir, "broken.xyz")
+        with open(path, "w") as file:
+            file.writelines(lines[:-1])
+        with self.assertRaises(RuntimeError):
+            list(read_xyz_blocks(path))
+
+    def test_nconf(self):
+        ensemble = EnsembleData(self.tmpdir)
+        ensemble.read_input(TESTFILE, charge=0, unpaired=0, nconf=3)
+        self.assertEqual(len(ensemble.conformers), 3)
+        self.assertEqual(ensemble.runinfo["nconf"], 3)
+
+        # the geometries are only parsed on access
+        conf = ensemble.conformers[0]
+        self.assertIsNone(conf._MoleculeData__geom)
+        self.assertEqual(conf.geom.nat, ensemble.runinfo["nat"])
+        self.assertEqual(conf.geom.name, conf.name)
+
+    def test_binary_ensemble(self):
+        ensemble = EnsembleData(self.tmpdir)
+        ensemble.read_input(TESTFILE, charge=0, unpaired=0)
+        ensemble.dump_ensemble("test")
+
+        path = os.path.join(self.tmpdir, "censo_ensemble_test.bin")
+        self.assertTrue(is_binary_ensemble(path))
+        self.assertFalse(is_binary_ensemble(TESTFILE))
+
+        reloaded = EnsembleData(self.tmpdir)
+        reloaded.read_input(path, charge=0, unpaired=0)
+        self.assertEqual(reloaded.runinfo["nat"], ensemble.runinfo["nat"])
+        for conf, ref in zip(reloaded.conformers, ensemble.conformers):
+            self.assertEqual(conf.name, ref.name)
+            self.assertEqual(conf.xtb_energy, ref.xtb_energy)
+            np.testing.assert_array_equal(conf.geom.elements,
+                                          ref.geom.elements)
+            np.testing.assert_array_equal(conf.geom.coords, ref.geom.coords)
+
+        # the coordinates are views into the mapped file
+        conf = read_binary_ensemble(path, nconf=2)[1]
+        self.assertFalse(conf.geom.coords.flags.owndata)
+        self.assertFalse(conf.geom.coords.flags.writeable)
+        self.assertEqual(conf.name, ensemble.conformers[1].name)
+
+    def test_boltzmann(self):
+        ensemble = EnsembleData(self.tmpdir)
+        ensemble.read_input(TESTFILE, charge=0, unpaired=0, nconf=4)
+
+        # energy differences that would underflow a plain exp
+        for i, conf in enumerate(ensemble.conformers):
+            conf.results["test"] = {"gtot": 1000.0 + 10.0 * i}
+        ensemble.conformers[1].results["test"]["gtot"] = 1000.0
+        ensemble.conformers[1].degen = 3
+        ensemble.calc_boltzmannweights(298.15, "test")
+
+        bmws = [conf.results["test"]["bmw"] for conf in ensemble.conformers]
+        self.assertAlmostEqual(bmws[0], 0.25)
+        self.assertAlmostEqual(bmws[1], 0.75)
+        self.assertEqual(bmws[2:], [0.0, 0.0])
+
+        # population threshold: the first conformer would already be enough for 0.7
+        names = [conf.name for conf in ensemble.conformers]
+        removed = ensemble.update_conformers(
+            lambda conf: conf.results["test"]["bmw"], 0.7, boltzmann=True)
+        self.assertEqual(removed, [names[0], names[2], names[3]])
+        self.assertEqual([conf.name for conf in ensemble.conformers],
+                         [names[1]])
+        self.assertEqual([conf.name for conf in ensemble.rem],
+                         [names[3], names[2], names[0]])
+
+    def test_update_conformers(self):
+        ensemble = EnsembleData(self.tmpdir)
+        ensemble.read_input(TESTFILE, charge=0, unpaired=0, nconf=4)
+        names = [conf.name for conf in ensemble.conformers]
+        for i, conf in enumerate(ensemble.conformers):
+            conf.results["test"] = {"gtot": 0.1 * i}
+
+        # the additional filter is not applied, only the threshold decides
+        removed = ensemble.update_conformers(
+            lambda conf: conf.results["test"]["gtot"],
+            0.15,
+            additional_filter=lambda conf: conf.name != names[3])
+        self.assertEqual(removed, [names[2], names[3]])
+
+        ensemble.remove_conformers([names[0]])
+        self.assertEqual([conf.name for conf in ensemble.conformers],
+                         [names[1]])
+        self.assertEqual([conf.name for conf in ensemble.rem],
+                         [names[0], names[3], names[2]])
+
+    def doCleanups(self):
+        # perform cleanup
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from censo.datastructure import MoleculeData, ParallelJob
+from censo.journal import JOURNAL, Journal, remove_journals
+from censo.qm_processor import QmProc
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.processor = QmProc(self.tmpdir)
+        self.confs = [
+            MoleculeData(f"CONF{i}",
+                         ["H 0.0 0.0 0.0\n", f"H 0.0 0.0 0.{i + 5}\n"])
+            for i in range(3)
+        ]
+
+    def __prepare(self) -> list[ParallelJob]:
+        jobs = [ParallelJob(conf.geom, ["xtb_sp"]) for conf in self.confs]
+        for job in jobs:
+            job.prepinfo["xtb_sp"] = {"gfnv": "gfn2"}
+        return jobs
+
+    def test_restore(self):
+        journal = Journal(os.path.join(self.tmpdir, "journal.pkl"))
+        jobs = self.__prepare()
+        journal.fingerprint(jobs, self.processor)
+
+        # finish the first two jobs
+        for job in jobs[:2]:
+            job.results["xtb_sp"] = {"energy": -1.0}
+            job.meta["xtb_sp"] = {"success": True, "error": None}
+            journal.record(job)
+
+        # simulate a crash while writing the third record
+        with open(journal.path, "ab") as f:
+            f.write(b"\x80\x04garbage")
+
+        # restart
+        journal = Journal(journal.path)
+        jobs = self.__prepare()
+        journal.fingerprint(jobs, self.processor)
+        todo = journal.restore(jobs)
+
+        self.assertEqual([job.conf.name for job in todo], ["CONF2"])
+        self.assertEqual(jobs[0].results["xtb_sp"]["energy"], -1.0)
+
+        # the damaged record should have been removed
+        self.assertEqual(len(journal.load()), 2)
+
+    def test_changed_input(self):
+        journal = Journal(os.path.join(self.tmpdir, "journal.pkl"))
+        jobs = self.__prepare()
+        journal.fingerprint(jobs, self.processor)
+        for job in jobs:
+            job.meta["xtb_sp"] = {"success": True, "error": None}
+            journal.record(job)
+
+        # different settings should not restore anything
+        jobs = self.__prepare()
+        for job in jobs:
+            job.prepinfo["xtb_sp"]["gfnv"] = "gfnff"
+        journal.fingerprint(jobs, self.processor)
+        self.assertEqual(len(journal.restore(jobs)), 3)
+
+    def test_failed_not_recorded(self):
+        journal = Journal(os.path.join(self.tmpdir, "journal.pkl"))
+        jobs = self.__prepare()
+        journal.fingerprint(jobs, self.processor)
+        for i, job in enumerate(jobs):
+            job.meta["xtb_sp"] = {
+                "success": i != 1,
+                "error": None if i != 1 else "scf_not_converged"
+            }
+            journal.record(job)
+
+        # the failed job has to be run again
+        jobs = self.__prepare()
+        journal.fingerprint(jobs, self.processor)
+        todo = journal.restore(jobs)
+        self.assertEqual([job.conf.name for job in todo], ["CONF1"])
+
+    def test_remove_journals(self):
+        paths = [
+            os.path.join(self.tmpdir, part, JOURNAL)
+            for part in ["0_PRESCREENING", "1_SCREENING"]
+        ]
+        for path in paths:
+            os.mkdir(os.path.dirname(path))
+            open(path, "wb").close()
+
+        remove_journals(self.tmpdir)
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+
+    def doCleanups(self):
+        # perform cleanup
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()
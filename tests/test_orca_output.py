@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from censo.orca_output import parse_orca_output, read_final_energy
+
+OUTPUT = """\
+                                 * O   R   C   A *
+----------------------
+                *       GEOMETRY OPTIMIZATION CYCLE   1            *
+----------------------
+FINAL SINGLE POINT ENERGY       -40.100000000000
+          Current Energy                    ....   -40.100000000 Eh
+          Current gradient norm             ....     0.010000000 Eh/bohr
+----------------------
+                *       GEOMETRY OPTIMIZATION CYCLE   2            *
+----------------------
+FINAL SINGLE POINT ENERGY       -40.200000000000
+          Current Energy                    ....   -40.200000000 Eh
+          Current gradient norm             ....     0.000100000 Eh/bohr
+                    ***        THE OPTIMIZATION HAS CONVERGED     ***
+--------------------------
+CHEMICAL SHIELDING SUMMARY (ppm)
+--------------------------
+
+
+  Nucleus  Element    Isotropic     Anisotropy
+  -------  -------  ------------   ------------
+      1       H           31.500          5.000
+      0       C          190.000         30.000
+
+-----------------------------------------------------------------------------
+         ABSORPTION SPECTRUM VIA TRANSITION ELECTRIC DIPOLE MOMENTS
+-----------------------------------------------------------------------------
+State   Energy    Wavelength  fosc         T2        TX        TY        TZ
+        (cm-1)      (nm)                 (au**2)    (au)      (au)      (au)
+-----------------------------------------------------------------------------
+   1   50000.0    200.0   0.100000000   1.0   0.1   0.2   0.3
+   2   40000.0    250.0   0.200000000   1.0   0.1   0.2   0.3
+   3   30000.0    333.3   0.300000000   1.0   0.1   0.2   0.3
+"""
+
+
+class TestOrcaOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "sp.out")
+        with open(self.path, "w") as f:
+            f.write(OUTPUT)
+
+    def test_read_final_energy(self):
+        self.assertEqual(read_final_energy(self.path), -40.2)
+
+        # the key is split between two blocks
+        self.assertEqual(read_final_energy(self.path, blocksize=16), -40.2)
+
+        empty = os.path.join(self.tmpdir, "empty.out")
+        open(empty, "w").close()
+        self.assertIsNone(read_final_energy(empty))
+
+    def test_opt(self):
+        output = parse_orca_output(self.path, {"energy", "error", "opt"})
+        self.assertEqual(output["energy"], -40.2)
+        self.assertIsNone(output["error"])
+        self.assertTrue(output["converged"])
+        self.assertEqual(output["cycles"], 2)
+        self.assertEqual(output["ecyc"], [-40.1, -40.2])
+        self.assertEqual(output["gncyc"], [0.01, 0.0001])
+
+        with open(self.path, "a") as f:
+            f.write("SCF NOT CONVERGED AFTER 125 CYCLES\n")
+        output = parse_orca_output(self.path, {"error"})
+        self.assertEqual(output["error"], "scf_not_converged")
+
+    def test_tables(self):
+        output = parse_orca_output(self.path,
+                                   {"energy", "shieldings", "excitations"},
+                                   nroots=2)
+        self.assertEqual(output["energy"], -40.2)
+        self.assertEqual(output["shieldings"], [(1, 31.5), (0, 190.0)])
+        self.assertEqual(output["excitations"], [{
+            "wavelength": 200.0,
+            "osc_str": 0.1
+        }, {
+            "wavelength": 250.0,
+            "osc_str": 0.2
+        }])
+
+        # missing table
+        output = parse_orca_output(self.path, {"energy", "excitations"})
+        self.assertIsNone(output["excitations"])
+
+    def doCleanups(self):
+        # perform cleanup
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()
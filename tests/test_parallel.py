@@ -1,19 +1,48 @@
 import os
 import random
 import shutil
+import tempfile
+import threading
 import unittest
+from concurrent.futures.process import BrokenProcessPool
 from unittest.mock import patch
 
+import censo.qm_processor
+from censo import parallel
 from censo.ensembledata import EnsembleData
-from censo.datastructure import ParallelJob
-from censo.parallel import execute
+from censo.datastructure import MoleculeData, ParallelJob
+from censo.parallel import (CorePool, ExecutionContext, dqp, execute,
+                            predict_runtime, set_omp_duration)
+from censo.qm_processor import QmProc, terminate_running
+
+TESTDIR = os.path.split(__file__)[0]
+TESTFILE = os.path.join(TESTDIR, "testfiles", "crest_conformers.xyz")
+
+
+class PidProc:
+    """
+    Processor stand-in that only records the worker process.
+    """
+
+    def run(self, job: ParallelJob) -> ParallelJob:
+        job.meta["pid"] = os.getpid()
+        job.conf.xyz = []
+        return job
+
+
+class ExitProc:
+    """
+    Processor stand-in that kills its worker process.
+    """
+
+    def run(self, job: ParallelJob) -> ParallelJob:
+        os._exit(1)
 
 
 class TestParallel(unittest.TestCase):
     def setUp(self):
-        self.ensemble = EnsembleData(os.getcwd())
-        self.ensemble.read_input(
-            "testfiles/crest_conformers.xyz", charge=2, unpaired=7)
+        self.ensemble = EnsembleData(TESTDIR)
+        self.ensemble.read_input(TESTFILE, charge=2, unpaired=7)
 
     @patch("censo.parallel.dqp")
     def test_execute(self, mock_dqp):
@@ -41,6 +70,111 @@ class TestParallel(unittest.TestCase):
 
         execute(mock_dqp_results, os.getcwd(), mock_instructions["prog"])
 
+    @patch("censo.parallel.ncores", 16)
+    def test_set_omp_duration(self):
+        jobs = [
+            ParallelJob(
+                MoleculeData(f"CONF{i}",
+                             ["H 0.0 0.0 0.0\n"] * nat).geom, ["sp"])
+            for i, nat in enumerate([10, 40, 20])
+        ]
+        set_omp_duration(jobs, [1.0, 4.0, 2.0])
+
+        # longest jobs first, cores proportional to runtime
+        self.assertEqual([job.conf.name for job in jobs],
+                         ["CONF1", "CONF2", "CONF0"])
+        self.assertEqual([job.omp for job in jobs], [8, 4, 4])
+
+    @patch("censo.parallel.timings", parallel.defaultdict(list))
+    def test_predict_runtime(self):
+        parallel.timings["orca_sp"].extend([(10, 10.0), (20, 40.0)])
+        small = ParallelJob(
+            MoleculeData("CONF1", ["H 0.0 0.0 0.0\n"] * 10).geom, ["sp"])
+        large = ParallelJob(
+            MoleculeData("CONF2", ["H 0.0 0.0 0.0\n"] * 40).geom, ["sp"])
+
+        # quadratic scaling should be recovered from the history
+        self.assertAlmostEqual(predict_runtime(small, "orca"), 10.0)
+        self.assertAlmostEqual(predict_runtime(large, "orca"), 160.0)
+
+    @patch("censo.parallel.ncores", 64)
+    def test_core_pool(self):
+        free_cores = CorePool(64)
+
+        # without the queue the requested number of cores is used
+        self.assertEqual(free_cores.reserve(4), 4)
+
+        # the last two jobs share the free cores proportionally
+        self.assertEqual(free_cores.reserve(4, queued=12), 20)
+        self.assertEqual(free_cores.reserve(8, queued=8), 32)
+        self.assertEqual(free_cores.free, 8)
+
+        free_cores.release(20)
+        self.assertEqual(free_cores.free, 28)
+
+    @patch("censo.parallel.ncores", 8)
+    def test_execution_context(self):
+        pids = []
+        with ExecutionContext(8) as context:
+            for _ in range(3):
+                jobs = [
+                    ParallelJob(conf.geom, ["sp"])
+                    for conf in self.ensemble.conformers
+                ]
+                pids.append({job.meta["pid"] for job in dqp(jobs, PidProc())})
+
+        # the same worker processes are used for every batch
+        self.assertEqual(context.reuses, 2)
+        self.assertTrue(pids[2] <= pids[0] | pids[1])
+        self.assertIsNone(context.pool)
+
+    @patch("censo.parallel.ncores", 8)
+    def test_broken_pool(self):
+        with ExecutionContext(8) as context:
+            jobs = [
+                ParallelJob(conf.geom, ["sp"])
+                for conf in self.ensemble.conformers
+            ]
+            with self.assertRaises(BrokenProcessPool):
+                dqp(jobs[:1], ExitProc())
+
+            # the broken pool is replaced on the next submission
+            broken = context.pool
+            self.assertEqual(len(dqp(jobs, PidProc())), len(jobs))
+            self.assertIsNot(context.pool, broken)
+
+    @patch("censo.parallel.ncores", 8)
+    def test_thread_backend(self):
+        jobs = [
+            ParallelJob(conf.geom, ["sp"])
+            for conf in self.ensemble.conformers
+        ]
+        jobs = dqp(jobs, PidProc(), backend="thread")
+
+        # jobs run in this process, but on copies of the geometries
+        self.assertEqual({job.meta["pid"] for job in jobs}, {os.getpid()})
+        self.assertTrue(
+            all(len(conf.geom.xyz) > 0 for conf in self.ensemble.conformers))
+
+    @patch.dict(QmProc._paths, {"xtbpath": "sleep"})
+    def test_terminate_running(self):
+        tmpdir = tempfile.mkdtemp()
+        result = []
+        thread = threading.Thread(target=lambda: result.append(
+            QmProc(tmpdir)._make_call("xtb", ["30"],
+                                      os.path.join(tmpdir, "out"), tmpdir)))
+        thread.start()
+
+        # wait for the program to be started and terminate it from the main thread
+        while len(censo.qm_processor._running) == 0:
+            thread.join(0.01)
+        terminate_running()
+        thread.join(5)
+        shutil.rmtree(tmpdir)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(result[0][0], -15)
+
     def __mock_dqp(self, instructions: dict) -> list[ParallelJob]:
         mock_dqp_results = []
         for conf in self.ensemble.conformers:
@@ -0,0 +1,82 @@
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+
+from censo.profiling import Profiler, merge_profiles, read_collapsed
+
+
+def busy():
+    total = 0
+    for i in range(300000):
+        total += i * i
+    return total
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def test_cprofile(self):
+        paths = [
+            os.path.join(self.tmpdir, f"CONF{i}", "profile") for i in range(2)
+        ]
+        for path in paths:
+            with Profiler("cprofile", path):
+                busy()
+
+        merged = os.path.join(self.tmpdir, "profile_jobs")
+        merge_profiles(paths + [os.path.join(self.tmpdir, "missing")], merged,
+                       "cprofile")
+
+        # the job profiles are merged and removed
+        self.assertFalse(any(os.path.isfile(p + ".pstats") for p in paths))
+        stats = pstats.Stats(merged + ".pstats")
+        calls = next(v[1] for k, v in stats.stats.items() if k[2] == "busy")
+        self.assertEqual(calls, 2)
+
+    def test_sampling(self):
+        paths = [
+            os.path.join(self.tmpdir, f"CONF{i}", "profile") for i in range(2)
+        ]
+        for path in paths:
+            with Profiler("sampling", path, interval=0.001):
+                for _ in range(5):
+                    busy()
+
+        counts = [
+            sum(read_collapsed(p + ".collapsed").values()) for p in paths
+        ]
+        self.assertTrue(all(c > 0 for c in counts))
+
+        merged = os.path.join(self.tmpdir, "profile_jobs")
+        merge_profiles(paths, merged, "sampling")
+        stacks = read_collapsed(merged + ".collapsed")
+        self.assertEqual(sum(stacks.values()), sum(counts))
+        frame = f"busy (test_profiling.py:{busy.__code__.co_firstlineno})"
+        self.assertTrue(any(stack.endswith(frame) for stack in stacks))
+
+    def test_off(self):
+        path = os.path.join(self.tmpdir, "profile")
+        with Profiler("off", path):
+            busy()
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+    def doCleanups(self):
+        # perform cleanup
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from censo.ensembledata import EnsembleData, read_xyz_blocks
+from censo.pruning import find_duplicates, kabsch_rmsd
+
+TESTFILE = os.path.join(os.path.split(__file__)[0], "testfiles",
+                        "crest_conformers.xyz")
+
+
+def rotation(angle: float) -> np.ndarray:
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+
+
+class TestPruning(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.rng = np.random.default_rng(0)
+
+    def test_kabsch_rmsd(self):
+        a = self.rng.normal(size=(50, 10, 3))
+        a -= a.mean(axis=1, keepdims=True)
+        noise = self.rng.normal(scale=0.1, size=a.shape)
+        b = a @ rotation(1.0).T + noise
+        b -= b.mean(axis=1, keepdims=True)
+
+        # reference via SVD including the rotation
+        ref = []
+        for x, y in zip(a, b):
+            u, _, vt = np.linalg.svd(x.T @ y)
+            d = np.sign(np.linalg.det(u @ vt))
+            r = u @ np.diag([1.0, 1.0, d]) @ vt
+            ref.append(np.sqrt(((x @ r - y)**2).sum() / len(x)))
+        np.testing.assert_allclose(kabsch_rmsd(a, b), ref, atol=1e-8)
+
+        # identical up to rotation, mirror images are not
+        np.testing.assert_allclose(kabsch_rmsd(a, a @ rotation(2.0).T),
+                                   0.0,
+                                   atol=1e-6)
+        self.assertTrue(np.all(kabsch_rmsd(a, -a) > 0.1))
+
+    def test_find_duplicates(self):
+        base = self.rng.normal(size=(3, 8, 3))
+        coords = np.stack([
+            base[0],
+            base[1],
+            base[0] @ rotation(0.5).T + 1.0,  # duplicate of 0
+            base[0] @ rotation(1.5).T,  # same geometry, but too high in energy
+            base[2],
+            base[1] + self.rng.normal(scale=0.01, size=(8, 3)),  # duplicate of 1
+        ])
+        energies = np.array([0.0, 1.0, 0.5, 5.0, 2.0, 0.9])
+
+        leader = find_duplicates(coords, energies, 0.125, 1.0)
+        np.testing.assert_array_equal(leader, [0, 5, 0, 3, 4, 5])
+
+        # the result does not depend on the size of the batches
+        np.testing.assert_array_equal(
+            find_duplicates(coords, energies, 0.125, 1.0, chunk=1), leader)
+
+    def test_prune_conformers(self):
+        blocks = list(read_xyz_blocks(TESTFILE))
+
+        # add a rotated copy of the first conformer with displaced hydrogens (rotamer)
+        comment, lines = blocks[0]
+        rotamer = []
+        for line in lines:
+            element, *xyz = line.split()
+            xyz = rotation(1.0) @ np.array(xyz, dtype=float)
+            if element == "H":
+                xyz += 0.3
+            rotamer.append(f"{element} {xyz[0]} {xyz[1]} {xyz[2]}\n")
+
+        path = os.path.join(self.tmpdir, "ensemble.xyz")
+        with open(path, "w") as f:
+            for comment, lines in blocks + [(comment, rotamer)]:
+                f.write(f"{len(lines)}\n{comment.split('CONF')[0].strip()}\n")
+                f.writelines(lines)
+
+        ensemble = EnsembleData(self.tmpdir)
+        ensemble.read_input(path, charge=0, unpaired=0)
+        first = next(conf for conf in ensemble.conformers
+                     if conf.name == "CONF1")
+
+        removed = ensemble.prune_conformers(0.125, 0.05)
+        self.assertEqual(removed, [f"CONF{len(blocks) + 1}"])
+        self.assertEqual(first.degen, 2)
+        self.assertEqual(len(ensemble.conformers), len(blocks))
+        self.assertEqual(ensemble.runinfo["nconf"], len(blocks))
+        self.assertEqual([conf.name for conf in ensemble.rem], removed)
+
+    def doCleanups(self):
+        # perform cleanup
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()
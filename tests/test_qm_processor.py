@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from censo.datastructure import MoleculeData, ParallelJob
+from censo.qm_processor import QmProc, _usage, sum_usage
+
+
+class TestQmProc(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        conf = MoleculeData("CONF1", ["H 0.0 0.0 0.0\n", "H 0.0 0.0 0.7\n"])
+        self.job = ParallelJob(conf.geom, ["xtb_gsolv"])
+        self.job.omp = 5
+
+    def test_run_concurrently(self):
+        def sleep(job, seconds):
+            time.sleep(seconds)
+            return {"omp": job.omp}, {"success": True}
+
+        start = time.perf_counter()
+        results = QmProc._run_concurrently(self.job, [(sleep, {
+            "seconds": 0.5
+        }), (sleep, {
+            "seconds": 0.5
+        })])
+
+        # both calls run at the same time and share the cores
+        self.assertLess(time.perf_counter() - start, 0.9)
+        self.assertEqual([res["omp"] for res, _ in results], [3, 2])
+        self.assertEqual(self.job.omp, 5)
+
+    def test_xtb_gsolv(self):
+        def xtb_sp(job, jobdir, filename, no_solv):
+            return {
+                "energy": -1.0 if no_solv else -1.5
+            }, {
+                "success": os.path.isdir(jobdir)
+            }
+
+        processor = QmProc(self.tmpdir)
+        with patch.object(processor, "_xtb_sp", side_effect=xtb_sp):
+            result, meta = processor._xtb_gsolv(self.job, self.tmpdir)
+
+        self.assertTrue(meta["success"])
+        self.assertAlmostEqual(result["gsolv"], -0.5)
+
+    def test_make_call_usage(self):
+        # program that spends some CPU time, writes to stderr and fails
+        script = os.path.join(self.tmpdir, "xtb")
+        with open(script, "w") as f:
+            f.write("#!/bin/sh\n"
+                    "i=0; while [ $i -lt 20000 ]; do i=$((i+1)); done\n"
+                    "echo done\n"
+                    "echo problem >&2\n"
+                    "exit 3\n")
+        os.chmod(script, 0o755)
+
+        usages = []
+        token = _usage.set(usages)
+        try:
+            with patch.dict(QmProc._paths, {"xtbpath": script}):
+                returncode, errors = QmProc(self.tmpdir)._make_call(
+                    "xtb", [], os.path.join(self.tmpdir, "xtb.out"),
+                    self.tmpdir)
+        finally:
+            _usage.reset(token)
+
+        self.assertEqual(returncode, 3)
+        self.assertEqual(errors, "problem\n")
+        with open(os.path.join(self.tmpdir, "xtb.out")) as f:
+            self.assertEqual(f.read(), "done\n")
+
+        self.assertEqual(len(usages), 1)
+        total = sum_usage(usages + usages)
+        self.assertEqual(total["calls"], 2)
+        self.assertGreater(total["utime"] + total["stime"], 0.0)
+        self.assertGreater(total["maxrss"], 0)
+        self.assertEqual(total["maxrss"], usages[0]["maxrss"])
+
+    def doCleanups(self):
+        # perform cleanup
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from censo.datastructure import MoleculeData
+from censo.results import ResultsStream, ResultsTable
+
+
+class TestResultsTable(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.confs = [
+            MoleculeData(f"CONF{i}", ["H 0.0 0.0 0.0\n", "H 0.0 0.0 0.7\n"])
+            for i in range(3)
+        ]
+        for i, conf in enumerate(self.confs):
+            conf.results["screening"] = {
+                "gtot": -1.0 - i,
+                "sp": {
+                    "energy": -1.5 - i,
+                    "success": True
+                },
+            }
+        self.confs[1].results["screening"]["gsolv"] = {
+            "gsolv": 0.1,
+            "shifts": [[1, 2.0]]
+        }
+        self.confs[2].results["prescreening"] = {"gtot": 0.0}
+
+    def test_from_conformers(self):
+        table = ResultsTable.from_conformers(self.confs)
+        self.assertEqual(table.rows, ["CONF0", "CONF1", "CONF2"])
+        np.testing.assert_array_equal(table["screening", "", "gtot"],
+                                      [-1.0, -2.0, -3.0])
+        self.assertEqual(table["screening", "sp", "energy"].dtype,
+                         np.float64)
+
+        # missing values
+        self.assertTrue(
+            np.isnan(table["screening", "gsolv", "gsolv"][[0, 2]]).all())
+        self.assertEqual(table["screening", "gsolv", "shifts"][0], None)
+
+        # booleans are not numbers here
+        self.assertEqual(table["screening", "sp", "success"].dtype, object)
+
+        screening = table.select("screening")
+        self.assertTrue(all(column[0] == "screening"
+                            for column in screening.columns))
+        self.assertNotIn(("prescreening", "", "gtot"), screening)
+
+        with self.assertRaises(ValueError):
+            table["screening", "", "bmw"] = [0.5]
+
+    def test_npz(self):
+        table = ResultsTable.from_conformers(self.confs, "screening")
+        path = os.path.join(self.tmpdir, "results.npz")
+        table.to_npz(path)
+
+        loaded = ResultsTable.from_npz(path)
+        self.assertEqual(loaded.rows, table.rows)
+        self.assertEqual(sorted(loaded.columns), sorted(table.columns))
+        np.testing.assert_array_equal(loaded["screening", "sp", "energy"],
+                                      table["screening", "sp", "energy"])
+        self.assertEqual(loaded["screening", "gsolv", "shifts"].tolist(),
+                         [None, [[1, 2.0]], None])
+
+    def test_stream(self):
+        stream = ResultsStream(os.path.join(self.tmpdir, "results.jsonl"))
+        stream.append([(conf.name, {
+            "sp": conf.results["screening"]["sp"]
+        }) for conf in self.confs])
+        stream.append([("CONF1", {"xtb_rrho": {"energy": 0.01}})])
+
+        # simulate a crash while writing
+        with open(stream.path, "a") as f:
+            f.write('{"conf": "CONF2", "res')
+
+        merged = stream.load()
+        self.assertEqual(sorted(merged["CONF1"].keys()), ["sp", "xtb_rrho"])
+        self.assertEqual(merged["CONF2"]["sp"]["energy"], -3.5)
+
+        # final records replace everything before
+        stream.append([("CONF0", {"sp": {"energy": -1.0}})], final=True)
+        self.assertEqual(stream.load()["CONF0"], {"sp": {"energy": -1.0}})
+
+        # only the given conformers are written, the given fields override the streamed ones
+        path = os.path.join(self.tmpdir, "results.json")
+        stream.compact(path, [("CONF1", {
+            "sp": {
+                "energy": 0.0
+            },
+            "gtot": -2.5
+        }), ("CONF0", {})])
+        self.assertFalse(os.path.exists(stream.path))
+
+        ref = {
+            "CONF1": {
+                "sp": {
+                    "energy": 0.0
+                },
+                "xtb_rrho": {
+                    "energy": 0.01
+                },
+                "gtot": -2.5
+            },
+            "CONF0": {
+                "sp": {
+                    "energy": -1.0
+                }
+            },
+        }
+        with open(path, "r") as f:
+            self.assertEqual(f.read(), json.dumps(ref, indent=4))
+
+        # without any records only the given fields are written
+        stream.compact(path, [("CONF2", {"gtot": 0.0})])
+        with open(path, "r") as f:
+            self.assertEqual(json.load(f), {"CONF2": {"gtot": 0.0}})
+
+    def doCleanups(self):
+        # perform cleanup
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()
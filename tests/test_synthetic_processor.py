@@ -0,0 +1,142 @@
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from censo.datastructure import MoleculeData, ParallelJob
+from censo.parallel import execute
+from censo.params import ENVIRON
+from censo.procfact import ProcessorFactory
+from censo.qm_processor import QmProc
+from censo.synthetic_processor import SyntheticProc
+
+FAKE_PROGRAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                             "benchmarks", "fake_programs")
+
+
+class TestSyntheticProc(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ProcessorFactory.register("synthetic", SyntheticProc)
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.conf = conf = MoleculeData("CONF1", [
+            "C 0.0 0.0 0.0\n", "H 0.0 0.0 1.1\n", "H 1.0 0.0 -0.4\n",
+            "H -0.5 0.9 -0.4\n"
+        ])
+        self.job = ParallelJob(conf.geom,
+                               ["xtb_rrho", "opt", "nmr", "uvvis"])
+        self.job.prepinfo["synthetic"] = {"base": 0.01}
+        self.job.prepinfo["uvvis"] = {"nroots": 3}
+
+        self.paths = {
+            "xtbpath": os.path.join(FAKE_PROGRAMS, "xtb"),
+            "orcapath": os.path.join(FAKE_PROGRAMS, "orca"),
+        }
+
+    def test_run(self):
+        processor = ProcessorFactory.create_processor("synthetic",
+                                                      self.tmpdir)
+        with patch.dict(QmProc._paths, self.paths):
+            job = processor.run(self.job)
+
+        self.assertTrue(all(job.meta[jt]["success"] for jt in job.jobtype))
+        self.assertEqual(list(job.results["xtb_rrho"]["gibbs"].keys()),
+                         [298.15])
+        self.assertTrue(job.results["opt"]["converged"])
+        self.assertEqual(job.results["opt"]["cycles"],
+                         len(job.results["opt"]["ecyc"]))
+        self.assertEqual(len(job.results["nmr"]["shieldings"]), 4)
+        self.assertEqual(len(job.results["uvvis"]["excitations"]), 3)
+
+        # the energy depends on the geometry only
+        self.assertEqual(job.results["opt"]["energy"],
+                         job.results["nmr"]["energy"])
+
+    def test_failure(self):
+        self.job.prepinfo["synthetic"]["failrate"] = 1.0
+        processor = ProcessorFactory.create_processor("synthetic",
+                                                      self.tmpdir)
+        with patch.dict(QmProc._paths, self.paths):
+            job = processor.run(self.job)
+
+        self.assertFalse(job.meta["xtb_rrho"]["success"])
+        self.assertEqual(job.meta["xtb_rrho"]["error"], "unknown_error")
+
+    @patch("censo.parallel.ncores", 4)
+    def test_execute_retry(self):
+        prepinfo = {
+            "general": {
+                "cache": False,
+                "resume": False,
+            },
+            "partname": "test",
+            "charge": 0,
+            "unpaired": 0,
+            "synthetic": {
+                "base": 0.01,
+                "failrate": 1.0
+            },
+        }
+        with patch.dict(QmProc._paths, self.paths):
+            success, _, failed = execute([self.conf],
+                                         self.tmpdir,
+                                         "synthetic",
+                                         prepinfo, ["xtb_rrho"],
+                                         retry_failed=True,
+                                         maxcores=4)
+
+        # unknown errors are not retried, the conformer is reported as failed
+        self.assertFalse(success)
+        self.assertEqual(failed, ["CONF1"])
+
+    def test_replay(self):
+        paths = {
+            "xtbpath": os.path.join(FAKE_PROGRAMS, "xtb_replay"),
+            "orcapath": os.path.join(FAKE_PROGRAMS, "orca_replay"),
+        }
+        recordings = os.path.join(self.tmpdir, "recordings")
+
+        # record in one directory, replay in another one with a different number of cores
+        runs = []
+        for name, strict, omp in [("record", "0", 4), ("replay", "1", 2)]:
+            self.job.omp = omp
+            processor = ProcessorFactory.create_processor(
+                "synthetic", os.path.join(self.tmpdir, name))
+            with patch.dict(QmProc._paths, paths), patch.dict(
+                    ENVIRON, {
+                        "CENSO_REPLAY_DIR": recordings,
+                        "CENSO_REPLAY_STRICT": strict
+                    }):
+                runs.append(copy.deepcopy(processor.run(self.job)))
+
+        self.assertEqual(len(os.listdir(recordings)), 4)
+        for jt in self.job.jobtype:
+            self.assertTrue(runs[1].meta[jt]["success"])
+            self.assertEqual(runs[0].results[jt], runs[1].results[jt])
+
+        # the files written by the programs are restored
+        self.assertTrue(
+            os.path.isfile(
+                os.path.join(self.tmpdir, "replay", "CONF1", "opt", "opt.gbw")))
+
+    def doCleanups(self):
+        # perform cleanup
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()
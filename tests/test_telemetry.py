@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from censo.datastructure import MoleculeData, ParallelJob
+from censo.parallel import CorePool
+from censo.telemetry import Telemetry
+
+
+class TestTelemetry(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        conf = MoleculeData("CONF1", ["H 0.0 0.0 0.0\n", "H 0.0 0.0 0.7\n"])
+        self.jobs = [ParallelJob(conf.geom, ["xtb_sp"]) for _ in range(4)]
+        for i, job in enumerate(self.jobs):
+            job.prepinfo["partname"] = "screening"
+            job.meta["xtb_sp"] = {
+                "success": i != 3,
+                "time": float(i + 1),
+                "cached": False
+            }
+
+    def test_batch(self):
+        path = os.path.join(self.tmpdir, "metrics.prom")
+        free_cores = CorePool(8)
+        with Telemetry(path, interval=0.01) as telemetry:
+            telemetry.start_batch(self.jobs, free_cores, 8)
+            self.assertIsNone(telemetry.eta)
+
+            for job in self.jobs[:3]:
+                free_cores.reserve(2)
+                telemetry.submitted(job)
+            free_cores.release(2)
+            telemetry.finished(self.jobs[0])
+
+            self.assertEqual(
+                (telemetry.queued, telemetry.running, telemetry.done),
+                (1, 2, 1))
+            self.assertEqual(telemetry.busy_cores, 4)
+            self.assertGreater(telemetry.eta, 0.0)
+            self.assertIn("done 1/4 | running 2 | queued 1 | cores 4/8",
+                          telemetry.status_line())
+
+            telemetry.submitted(self.jobs[3])
+            for job in self.jobs[1:]:
+                telemetry.finished(job)
+            telemetry.end_batch()
+
+        with open(path, "r") as f:
+            metrics = f.read()
+        self.assertIn("censo_jobs_done_total 4", metrics)
+        self.assertIn('censo_failures_total{jobtype="xtb_sp"} 1', metrics)
+        self.assertIn('censo_runtime_seconds_count{jobtype="xtb_sp"} 3',
+                      metrics)
+        self.assertIn(
+            'censo_runtime_seconds{jobtype="xtb_sp",quantile="0.5"} 2.000',
+            metrics)
+        self.assertIn("xtb_sp: 3 calculations, mean 2.00 s",
+                      telemetry.runtime_summary())
+
+    def test_usage(self):
+        telemetry = Telemetry()
+        for job in self.jobs[:2]:
+            job.omp = 2
+            job.meta["xtb_sp"]["usage"] = {
+                "utime": 1.5,
+                "stime": 0.5,
+                "maxrss": 100 * 1024**2,
+                "read_bytes": 0,
+                "write_bytes": 1024**2,
+                "calls": 1,
+            }
+            telemetry.submitted(job)
+            telemetry.finished(job)
+
+        # 4 s of CPU time within (1 s + 2 s) * 2 cores
+        self.assertIn(
+            "screening: 2 program calls, CPU 3.0 s user + 1.0 s sys (67% of reserved cores), "
+            "peak RSS 100 MB, read 0 MB, written 2 MB", telemetry.usage_summary())
+        self.assertIn('censo_cpu_seconds_total{part="screening"} 4.000',
+                      telemetry.metrics())
+
+    def doCleanups(self):
+        # perform cleanup
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from censo.datastructure import MoleculeData, ParallelJob
+from censo.qm_processor import QmProc
+from censo.telemetry import Telemetry
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.script = os.path.join(self.tmpdir, "xtb")
+        with open(self.script, "w") as f:
+            f.write("#!/bin/sh\nsleep 0.05\n")
+        os.chmod(self.script, 0o755)
+
+        self.jobs = []
+        for i in range(2):
+            conf = MoleculeData(f"CONF{i}",
+                                ["H 0.0 0.0 0.0\n", "H 0.0 0.0 0.7\n"])
+            job = ParallelJob(conf.geom, ["xtb_sp"])
+            job.prepinfo["partname"] = "screening"
+            job.omp = 2 + i
+            self.jobs.append(job)
+
+    def test_trace(self):
+        processor = QmProc(self.tmpdir)
+
+        def xtb_sp(job, jobdir):
+            processor._make_call("xtb", ["coord", "--sp"],
+                                 os.path.join(jobdir, "xtb.out"), jobdir)
+            return {"energy": -1.0}, {"success": True, "error": None}
+
+        processor._jobtypes["xtb_sp"] = xtb_sp
+
+        path = os.path.join(self.tmpdir, "trace.json")
+        with patch.dict(QmProc._paths, {"xtbpath": self.script}):
+            with Telemetry(trace_path=path) as telemetry:
+                telemetry.start_batch(self.jobs, None, 8)
+                for job in self.jobs:
+                    telemetry.submitted(job)
+                    telemetry.finished(processor.run(job))
+                telemetry.end_batch()
+
+        with open(path, "r") as f:
+            events = json.load(f)["traceEvents"]
+
+        jobs = [e for e in events if e.get("cat") == "job"]
+        self.assertEqual([e["name"] for e in jobs], ["CONF0", "CONF1"])
+        self.assertEqual([e["args"]["omp"] for e in jobs], [2, 3])
+        self.assertTrue(all(e["args"]["queued_us"] >= 0 for e in jobs))
+
+        # the calls are nested within the jobtypes, which are nested within the jobs
+        calls = [e for e in events if e.get("cat") == "call"]
+        jobtypes = [e for e in events if e.get("cat") == "jobtype"]
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(calls[0]["args"]["call"], "coord --sp")
+        for job, jobtype, call in zip(jobs, jobtypes, calls):
+            self.assertEqual(jobtype["name"], "xtb_sp")
+            self.assertGreaterEqual(call["dur"], 50000)
+            self.assertTrue(job["ts"] <= jobtype["ts"] <= call["ts"])
+            self.assertTrue(call["ts"] + call["dur"] <= jobtype["ts"] +
+                            jobtype["dur"] <= job["ts"] + job["dur"])
+
+        # the jobs ran one after another
+        cores = [e["args"]["busy"] for e in events if e["ph"] == "C"]
+        self.assertEqual(cores, [2, 0, 3, 0])
+
+    def doCleanups(self):
+        # perform cleanup
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()
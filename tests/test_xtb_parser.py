@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from censo.xtb_parser import parse_xtb_output
+
+OUTPUT = """\
+   *** GEOMETRY OPTIMIZATION CONVERGED AFTER 2 ITERATIONS ***
+ cycle 1  av. E: -5.0700000 -> -5.0710000
+   gradient norm :     0.0100000 Eh/α   predicted   -0.1E-03
+ cycle 2  av. E: -5.0710000 -> -5.0720000
+   gradient norm :     0.0001000 Eh/α   predicted   -0.1E-05
+          | TOTAL ENERGY               -5.070000000000 Eh   |
+   temp. (K)  partition function   enthalpy   heat capacity  entropy
+ 100.00  VIB   1.00                 100.000      1.000      1.000
+         ROT  0.100E+05              300.000      3.000     20.000
+ 298.15  VIB   2.00                 200.000      2.000      2.000
+         ROT  0.200E+05              600.000      6.000     30.000
+          :  linear?                           false   :
+     final rmsd /     0.00120 Bohr
+     T/K    H(0)-H(T)+PV         H(T)/Eh          T*S/Eh         G(T)/Eh
+ ------------------------------------------------------------------------
+    100.00    0.10000000E-02  0.20000000E-01  0.10000000E-01  0.30000000E-01
+    298.15    0.20000000E-02  0.40000000E-01  0.20000000E-01  0.60000000E-01
+ ------------------------------------------------------------------------
+          | TOTAL ENERGY               -5.080000000000 Eh   |
+"""
+
+
+class TestXtbParser(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "xtb.out")
+        with open(self.path, "w") as f:
+            f.write(OUTPUT)
+
+    def test_parse(self):
+        output = parse_xtb_output(self.path)
+        self.assertEqual(output["energy"], -5.08)
+        self.assertEqual(output["gibbs"], {100.0: 0.03, 298.15: 0.06})
+        self.assertEqual(output["enthalpy"], {100.0: 0.02, 298.15: 0.04})
+        self.assertEqual(output["entropy"], {100.0: 20.0, 298.15: 30.0})
+        self.assertFalse(output["linear"])
+        self.assertEqual(output["rmsd"], 0.0012)
+        self.assertFalse(output["error"])
+        self.assertTrue(output["converged"])
+        self.assertEqual(output["cycles"], 2)
+        self.assertEqual(output["ecyc"], [-5.071, -5.072])
+        self.assertEqual(output["gncyc"], [0.01, 0.0001])
+
+    def test_error(self):
+        with open(self.path, "a") as f:
+            f.write("#ERROR! abnormal termination of xtb\n")
+        self.assertTrue(parse_xtb_output(self.path)["error"])
+
+        # empty output
+        open(self.path, "w").close()
+        output = parse_xtb_output(self.path)
+        self.assertIsNone(output["energy"])
+        self.assertIsNone(output["converged"])
+
+    def doCleanups(self):
+        # perform cleanup
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        delete = [
+            "censo.log",
+        ]
+        for f in delete:
+            f = os.path.join(os.getcwd(), f)
+            if os.path.exists(f):
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
+
+
+if __name__ == "__main__":
+    unittest.main()